@@ -1,12 +1,16 @@
-from fastapi import FastAPI, HTTPException
-from typing import List
+from fastapi import FastAPI, HTTPException, Query
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
-from disk_manager import DiskManager
-from pocketbase_database import PocketBaseDatabase
+from source.disk_inventory import DiskInventory
+from source.disk_manager import DiskManager
+from source.constants import RANKING_PAGE_SIZE, RANKING_MAX_PAGE_SIZE
+from source.disk_scoring import (InventoryScores, ProfileScores, top_k_per_profile, score_inventory,
+                                 score_profiles, profile_column, rank_page)
+from source.storage import create_database
+from source.weight_profiles import DEFAULT_PROFILE, WeightProfile, load_profiles, save_profile, delete_profile
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-
-from constants import DATABASE_URL
+import threading
 
 # Logging setup
 logging.basicConfig(level=logging.DEBUG)
@@ -23,8 +27,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize database and DiskManager
-disk_manager = DiskManager(PocketBaseDatabase(DATABASE_URL))
+# Initialize database and DiskManager, DATABASE_BACKEND selects PocketBase or the local SQLite file
+disk_manager = DiskManager(create_database())
+
+# Weight profiles by name, from WEIGHT_PROFILES_PATH
+profiles = load_profiles()
+
+
+class RankingCache:
+    """The stored disks as a `DiskInventory` and their scores, kept between ranking requests.
+
+    The disk routes call `invalidate` after a write and the profile routes `invalidate_scores`, the
+    next ranking request loads and scores again. The lock keeps a request from caching an inventory
+    read before a write that invalidated it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inventory: Optional[DiskInventory] = None
+        self._scores: Dict[str, InventoryScores] = {}
+        self._profile_scores: Optional[ProfileScores] = None
+
+    def _load(self) -> DiskInventory:
+        if self._inventory is None:
+            self._inventory = DiskInventory.from_disks(disk_manager.get_disks())
+        return self._inventory
+
+    def scores(self, profile: str) -> Optional[Tuple[DiskInventory, InventoryScores]]:
+        """The inventory and its scores for one profile, None for a profile that does not exist."""
+        with self._lock:
+            # Looked up once under the lock, a profile deleted meanwhile is either used whole or missing
+            weight_profile = profiles.get(profile)
+            if weight_profile is None:
+                return None
+            inventory = self._load()
+            if profile not in self._scores:
+                if profile == DEFAULT_PROFILE.name:
+                    self._scores[profile] = score_inventory(inventory)
+                else:
+                    self._scores[profile] = profile_column(score_profiles(inventory, [weight_profile]), profile)
+            return inventory, self._scores[profile]
+
+    def profile_scores(self) -> Tuple[DiskInventory, ProfileScores]:
+        """The inventory and its scores for every profile, scored in one pass."""
+        with self._lock:
+            inventory = self._load()
+            if self._profile_scores is None:
+                self._profile_scores = score_profiles(inventory, list(profiles.values()))
+            return inventory, self._profile_scores
+
+    def invalidate_scores(self):
+        with self._lock:
+            self._scores.clear()
+            self._profile_scores = None
+
+    def invalidate(self):
+        with self._lock:
+            self._inventory = None
+            self._scores.clear()
+            self._profile_scores = None
+
+
+ranking_cache = RankingCache()
+
 
 # Pydantic models for request and response validation
 class StatModel(BaseModel):
@@ -39,6 +104,18 @@ class DiskModel(BaseModel):
     sub_stats: List[StatModel]
 
 
+class RankingPageModel(BaseModel):
+    total: int  # Disks matching the filters
+    offset: int
+    limit: int
+    items: List[dict]
+
+
+class WeightProfileModel(BaseModel):
+    substat_weights: Dict[str, float]
+    main_stat_weights: Optional[Dict[str, float]] = None
+
+
 # Routes
 @app.post("/disks/", response_model=dict)
 def add_disk(disk: DiskModel):
@@ -60,6 +137,9 @@ def add_disk(disk: DiskModel):
     except Exception as e:
         logging.error(f"Error adding disk: {e}")
         raise HTTPException(status_code=500, detail="Failed to add disk")
+    finally:
+        # Also after a failed write, which may have been applied in part
+        ranking_cache.invalidate()
 
 
 @app.get("/disks/", response_model=List[DiskModel])
@@ -80,6 +160,9 @@ def remove_disk(disk_id: str):
     except Exception as e:
         logging.error(f"Error removing disk with id {disk_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to remove disk")
+    finally:
+        # Also after a failed write, which may have been applied in part
+        ranking_cache.invalidate()
 
 
 @app.put("/disks/{disk_id}", response_model=dict)
@@ -103,3 +186,68 @@ def update_disk(disk_id: str, disk: DiskModel):
     except Exception as e:
         logging.error(f"Error updating disk with id {disk_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to update disk")
+    finally:
+        # Also after a failed write, which may have been applied in part
+        ranking_cache.invalidate()
+
+
+@app.get("/profiles/", response_model=List[dict])
+def get_profiles():
+    return [profile.to_dict() for profile in profiles.values()]
+
+
+@app.put("/profiles/{name}", response_model=dict)
+def put_profile(name: str, profile: WeightProfileModel):
+    if name == DEFAULT_PROFILE.name:
+        raise HTTPException(status_code=400, detail="The default profile is SUBSTAT_WEIGHTS in constants.py")
+    try:
+        weight_profile = WeightProfile.from_dict({"name": name, **profile.model_dump()})
+        save_profile(weight_profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OSError as e:
+        logging.error(f"Error saving profile {name}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to save profile")
+    profiles[name] = weight_profile
+    ranking_cache.invalidate_scores()
+    return {"message": "Profile saved successfully"}
+
+
+@app.delete("/profiles/{name}", response_model=dict)
+def remove_profile(name: str):
+    if name == DEFAULT_PROFILE.name or name not in profiles:
+        raise HTTPException(status_code=404, detail=f"No saved profile {name}")
+    delete_profile(name)
+    del profiles[name]
+    ranking_cache.invalidate_scores()
+    return {"message": "Profile removed successfully"}
+
+
+@app.get("/profiles/rankings", response_model=Dict[str, List[dict]])
+def get_profile_rankings(top: int = Query(RANKING_PAGE_SIZE, ge=1, le=RANKING_MAX_PAGE_SIZE)):
+    """The best disks for every profile, all profiles scored in one pass."""
+    try:
+        inventory, scores = ranking_cache.profile_scores()
+        return top_k_per_profile(inventory, list(profiles.values()), top, scores)
+    except Exception as e:
+        logging.error(f"Error ranking disks: {e}")
+        raise HTTPException(status_code=500, detail="Failed to rank disks")
+
+
+@app.get("/rankings/", response_model=RankingPageModel)
+def get_ranking(limit: int = Query(RANKING_PAGE_SIZE, ge=1, le=RANKING_MAX_PAGE_SIZE), offset: int = Query(0, ge=0),
+                main_stat: Optional[str] = None, min_level: Optional[int] = None, max_level: Optional[int] = None,
+                min_score: Optional[float] = None, profile: str = DEFAULT_PROFILE.name):
+    """One page of the ranking, best first. Only the disks up to the end of the page are sorted."""
+    try:
+        scored = ranking_cache.scores(profile)
+        if scored is not None:
+            inventory, scores = scored
+            page = rank_page(inventory, scores, limit, offset, main_stat=main_stat, min_level=min_level,
+                             max_level=max_level, min_score=min_score)
+    except Exception as e:
+        logging.error(f"Error ranking disks: {e}")
+        raise HTTPException(status_code=500, detail="Failed to rank disks")
+    if scored is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile}")
+    return {"total": page.total, "offset": offset, "limit": limit, "items": page.evaluations}
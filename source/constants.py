@@ -33,6 +33,11 @@ CELL_SIZE_PERCENTAGE = (HORIZONTAL_DIFF, VERTICAL_DIFF)
 CELL_SIZE = (int(HORIZONTAL_DIFF_PERCENTAGE * RESOLUTION[0]), int(VERTICAL_DIFF_PERCENTAGE * RESOLUTION[1]))
 
 DATABASE_URL = "http://localhost:8090/api"
+DATABASE_BACKEND = "pocketbase"  # "pocketbase" (DATABASE_URL) or "sqlite" (DATABASE_PATH)
+DATABASE_PATH = "../db/disk_database.db"
+WEIGHT_PROFILES_PATH = "../profiles"  # One JSON file of stat weights per character build
+RANKING_PAGE_SIZE = 20  # Disks per ranking page by default
+RANKING_MAX_PAGE_SIZE = 500  # Largest ranking page the API serves
 API_URL = "http://localhost:8000"
 
 ROWS = 4
@@ -40,7 +45,39 @@ COLS = 8
 GRAY_THRESHOLD = 120
 MAX_GRAY_VALUE = 255
 MAIN_STAT_CONFIG = '--psm 7' # Treat the image as a single text line
+SUB_STAT_BLOCK_CONFIG = '--psm 6' # Treat the image as a uniform block of text
+MOSAIC_CONFIG = '--psm 6' # A page mosaic is a single column of stat lines
+MOSAIC_PADDING = 20  # Empty rows between two crops of a page mosaic
+REOCR_MIN_CONFIDENCE = 80  # Crops with a word below this Tesseract confidence are recognized again
+REOCR_UPSCALE = 2  # Scale factor of the upscaled re-OCR variant
+ADAPTIVE_BLOCK_SIZE = 31  # Neighbourhood of the adaptive threshold re-OCR variant, in pixels
+ADAPTIVE_OFFSET = -10  # Text must be this much brighter than its neighbourhood
 TESSERACT_PATH = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+TESSDATA_PATH = r'C:\Program Files\Tesseract-OCR\tessdata'
+OCR_ENGINE = "pytesseract"  # pytesseract starts a process per image, tesserocr (installed separately) keeps the
+# model loaded, template matches the game font against TEMPLATE_BANK_PATH
+OCR_CACHE_MAX_ENTRIES = 100000  # Least recently used OCR results are evicted above this size
+OCR_STREAM_THREADS = 4  # OCR threads consuming crops while the screen is being scanned
+STREAM_QUEUE_SIZE = 64  # Disks the scanner may get ahead of the OCR stage
+PIPELINE_PARSE_WORKERS = 1  # Parser threads of the ingestion pipeline
+PIPELINE_BATCH_SIZE = 50  # Disks written to the database with one batch request
+PIPELINE_FLUSH_INTERVAL = 1.0  # Seconds without new disks after which a partial batch is written
+SETTLE_TIMEOUT = 1.0  # Seconds to wait for the stat panel to redraw after a click
+SETTLE_POLL_INTERVAL = 0.01  # Seconds between two polls of the stat panel
+SETTLE_DIFF_THRESHOLD = 2.0  # Mean gray level difference that counts as a change of the panel
+SETTLE_STABLE_POLLS = 2  # Unchanged polls in a row before the panel counts as settled
+SETTLE_DOWNSCALE = 4  # Only every n-th pixel of the panel is compared
+MANIFEST_CHECKPOINT_INTERVAL = 32  # Manifest entries written between two syncs to disk
+DEDUP_HASH_SIZE = (64, 8)  # (width, height) of the thumbnail crops are hashed from, one bit per pixel
+DEDUP_MAX_DISTANCE = 6  # Differing bits per crop hash for two captures to count as the same disk
+TEMPLATE_BANK_PATH = "../output/template_bank.npz"  # Glyph templates for the template OCR engine
+TEMPLATE_GLYPH_SIZE = (16, 24)  # (width, height) glyphs are normalized to before matching
+TEMPLATE_SAMPLES_PER_GLYPH = 5  # Templates kept per character when bootstrapping the bank
+TEMPLATE_MIN_SCORE = 0.8  # Lowest correlation accepted before falling back to Tesseract
+TEMPLATE_MAX_SPLITS = 2  # How often a badly matching span is split in two to separate touching glyphs
+TEMPLATE_SPACE_RATIO = 0.35  # Gap between glyphs, relative to the line height, that counts as a space
+FUZZY_MAX_DISTANCE_RATIO = 0.25  # Edits per character allowed when resolving a misread stat name
+FUZZY_CACHE_SIZE = 1024  # Resolved stat names kept in memory
 IMAGE_EXTENSION = "jpg" # Extension to use for the output: jpg or png, seems to be no difference
 
 MAIN_STATS = {
@@ -3,7 +3,7 @@ import math
 from dataclasses import dataclass, field
 from typing import List, Dict, Any
 
-from constants import SUBSTAT_WEIGHTS, SUBSTATS
+from source.constants import SUBSTAT_WEIGHTS, SUBSTATS
 
 
 @dataclass
@@ -22,11 +22,17 @@ class Stat:
         }
 
 
+MAX_LEVEL = 15
+LEVELS_PER_UPGRADE = 3
+POTENTIAL_DECAY = 0.15  # Exponential decay rate of the potential per level
+MAIN_STAT_SCORE = 10  # Fixed main stat score
+
+
 def disk_potential(level, substats, starting_substats=4):
     # Constants
-    max_level = 15
-    levels_per_upgrade = 3
-    alpha = 0.15  # Exponential decay rate
+    max_level = MAX_LEVEL
+    levels_per_upgrade = LEVELS_PER_UPGRADE
+    alpha = POTENTIAL_DECAY
 
     # Calculate current value of the substats
     current_value = sum(SUBSTAT_WEIGHTS[stat] * value for stat, value in substats.items())
@@ -117,4 +123,35 @@ class Disk:
 
     def __eq__(self, other: "Disk") -> bool:
         """Check equality based on main and sub stats."""
-        return self.to_dict() == other.to_dict()
+        return (self.id, self.main_stat, self.sub_stats) == (other.id, other.main_stat, other.sub_stats)
+
+
+def evaluate_disk(disk: Disk) -> dict:
+    """
+    Evaluate a single disk using its methods and the `disk_potential` function.
+    :param disk: A Disk object.
+    :return: Evaluation scores and total score as a dictionary.
+    """
+    # Fixed main stat score
+    main_stat_score = MAIN_STAT_SCORE
+
+    # Calculate current and potential substat scores
+    current_score = disk.total_substat_score(SUBSTAT_WEIGHTS)
+    potential_score = disk.calculate_potential(SUBSTAT_WEIGHTS)
+
+    if disk.main_stat.level >= MAX_LEVEL:
+        # Evaluate at 0 any disk that is maxed out
+        current_score = 0
+        potential_score = 0
+        main_stat_score = 0
+
+    # Total score combines main stat and substat scores
+    total_score = main_stat_score + current_score + potential_score
+
+    return {
+        "Disk ID": disk.id,
+        "Main Stat Score": main_stat_score,
+        "Current Substat Score": current_score,
+        "Potential Substat Score": potential_score,
+        "Total Score": total_score,
+    }
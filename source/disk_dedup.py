@@ -0,0 +1,77 @@
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from source.constants import DEDUP_HASH_SIZE, DEDUP_MAX_DISTANCE
+
+# Main stat plus four sub stat crops, disks captured as a sub stat block only use two slots
+HASHES_PER_DISK = 5
+HASH_BYTES = DEDUP_HASH_SIZE[0] * DEDUP_HASH_SIZE[1] // 8
+
+
+def crop_hash(binary) -> np.ndarray:
+    """Perceptual hash of a binary crop: the crop shrunk to DEDUP_HASH_SIZE and packed to bits.
+
+    Text lines are wide and flat, so the thumbnail keeps enough columns to tell two stat lines
+    apart, while capture noise and re-encoding only flip a handful of bits.
+    """
+    thumbnail = cv2.resize(binary, DEDUP_HASH_SIZE, interpolation=cv2.INTER_AREA)
+    return np.packbits(thumbnail > 127)
+
+
+def disk_hashes(crops: list) -> np.ndarray:
+    """Hash every crop of a disk into a fixed size (HASHES_PER_DISK, HASH_BYTES) array."""
+    hashes = np.zeros((HASHES_PER_DISK, HASH_BYTES), dtype=np.uint8)
+    for i, crop in enumerate(crops[:HASHES_PER_DISK]):
+        hashes[i] = crop_hash(crop)
+    return hashes
+
+
+def hashes_to_hex(hashes: np.ndarray) -> str:
+    """The hashes of a disk as text, e.g. for the OCR manifest."""
+    return hashes.tobytes().hex()
+
+
+def hashes_from_hex(text: str) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(text), dtype=np.uint8).reshape(HASHES_PER_DISK, HASH_BYTES)
+
+
+class DedupIndex:
+    """Perceptual hashes of the disks seen so far, used to recognize disks captured again in a later scan.
+
+    Disks of the same scan folder are never matched with each other: two identical disks on one
+    page are two different disks, while the same disk on two pages is one disk scanned twice.
+    """
+
+    def __init__(self, max_distance: int = DEDUP_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.keys: List[str] = []
+        self.folders: List[str] = []
+        self._hashes = np.zeros((64, HASHES_PER_DISK, HASH_BYTES), dtype=np.uint8)
+
+    @property
+    def hashes(self) -> np.ndarray:
+        return self._hashes[:len(self.keys)]
+
+    def find(self, folder: str, hashes: np.ndarray) -> Optional[str]:
+        """Return the key of the closest near-identical disk from another folder, or None."""
+        if not self.keys:
+            return None
+
+        # Every crop must be within max_distance bits of the corresponding crop of the candidate
+        distances = np.bitwise_count(self.hashes ^ hashes).sum(axis=2, dtype=np.int32).max(axis=1)
+        for index in np.argsort(distances, kind="stable"):
+            if distances[index] > self.max_distance:
+                break
+            if self.folders[index] != folder:
+                return self.keys[index]
+        return None
+
+    def add(self, key: str, folder: str, hashes: np.ndarray) -> None:
+        size = len(self.keys)
+        if size == len(self._hashes):
+            self._hashes = np.concatenate((self._hashes, np.zeros_like(self._hashes)))
+        self._hashes[size] = hashes
+        self.keys.append(key)
+        self.folders.append(folder)
@@ -0,0 +1,269 @@
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from source.constants import SUBSTATS, MAIN_STATS, MAIN_STAT_LEVELS, ELEMENTAL_TYPES
+from source.disk import Disk, Stat
+
+MAX_SUB_STATS = 4
+NO_STAT = -1  # Code of an empty sub stat slot or a missing main stat
+NO_LEVEL = -1  # Level of a main stat whose level could not be inferred
+
+# Closed vocabulary of stat names, a stat is stored as its index in this list
+STAT_NAMES: List[str] = list(dict.fromkeys(
+    list(SUBSTATS) + [name for names in MAIN_STATS.values() for name in names] + list(MAIN_STAT_LEVELS)
+    + [f"{element} DMG Bonus" for element in ELEMENTAL_TYPES]
+))
+STAT_CODES: Dict[str, int] = {name: code for code, name in enumerate(STAT_NAMES)}
+_names_lock = threading.Lock()
+
+
+def stat_code(name: Optional[str]) -> int:
+    """Code of a stat name. Names outside the vocabulary, e.g. OCR misreads, get a new code on first use."""
+    if name is None:
+        return NO_STAT
+    code = STAT_CODES.get(name)
+    if code is None:
+        with _names_lock:
+            code = STAT_CODES.setdefault(name, len(STAT_NAMES))
+            if code == len(STAT_NAMES):
+                STAT_NAMES.append(name)
+    return code
+
+
+def _to_float(value: np.float32) -> float:
+    """The shortest decimal of a float32, so `4.8` stored as float32 reads back as `4.8`."""
+    return float(np.format_float_positional(value))
+
+
+def _stat_fields(stat) -> tuple:
+    if stat is None:
+        return None, 0.0, None
+    if isinstance(stat, dict):
+        return stat["name"], stat["value"], stat["level"]
+    return stat.name, stat.value, stat.level
+
+
+class DiskView:
+    """A disk of an inventory, read from its arrays when an attribute is used."""
+    __slots__ = ("inventory", "row")
+
+    def __init__(self, inventory: "DiskInventory", row: int):
+        self.inventory = inventory
+        self.row = row
+
+    @property
+    def id(self) -> str:
+        return self.inventory.ids[self.row]
+
+    @property
+    def main_stat(self) -> Optional[Stat]:
+        inventory, row = self.inventory, self.row
+        code = inventory.main_codes[row]
+        if code == NO_STAT:
+            return None
+        level = int(inventory.main_levels[row])
+        return Stat(name=STAT_NAMES[code], value=_to_float(inventory.main_values[row]),
+                    level=None if level == NO_LEVEL else level)
+
+    @property
+    def sub_stats(self) -> List[Stat]:
+        inventory, row = self.inventory, self.row
+        return [Stat(name=STAT_NAMES[code], value=_to_float(value), level=int(level))
+                for code, value, level in zip(inventory.sub_codes[row, :inventory.sub_counts[row]],
+                                              inventory.sub_values[row], inventory.sub_levels[row])]
+
+    def total_substat_score(self, weights: Dict[str, float]) -> float:
+        return self.to_disk().total_substat_score(weights)
+
+    def calculate_potential(self, weights: Dict[str, float]) -> float:
+        return self.to_disk().calculate_potential(weights)
+
+    def to_disk(self) -> Disk:
+        """A standalone `Disk` with the same stats."""
+        return Disk(id=self.id, main_stat=self.main_stat, sub_stats=self.sub_stats)
+
+    def to_dict(self) -> dict:
+        main_stat = self.main_stat
+        return {
+            "id": self.id,
+            "main_stat": main_stat.to_dict() if main_stat else None,
+            "sub_stats": [stat.to_dict() for stat in self.sub_stats]
+        }
+
+    def __repr__(self) -> str:
+        return f"DiskView({self.to_dict()})"
+
+
+class DiskInventory:
+    """Disks stored as struct-of-arrays: stat codes, float32 values and int8 levels in numpy arrays.
+
+    A disk costs about 40 bytes of arrays plus its id, instead of a `Disk` with five `Stat`s and their
+    dictionaries. Sub stats are stored in `MAX_SUB_STATS` slots, `sub_counts` tells how many are used.
+    Row `i` of every array belongs to disk `ids[i]`, `disk(i)` or `inventory[i]` reads it back.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int) -> None:
+        """Grow every array to `capacity` rows, keeping the rows stored so far."""
+        size = self._size
+        arrays = {
+            "_main_codes": np.full(capacity, NO_STAT, dtype=np.int16),
+            "_main_values": np.zeros(capacity, dtype=np.float32),
+            "_main_levels": np.full(capacity, NO_LEVEL, dtype=np.int8),
+            "_sub_codes": np.full((capacity, MAX_SUB_STATS), NO_STAT, dtype=np.int16),
+            "_sub_values": np.zeros((capacity, MAX_SUB_STATS), dtype=np.float32),
+            "_sub_levels": np.zeros((capacity, MAX_SUB_STATS), dtype=np.int8),
+            "_sub_counts": np.zeros(capacity, dtype=np.int8),
+        }
+        for name, array in arrays.items():
+            if size:
+                array[:size] = getattr(self, name)[:size]
+            setattr(self, name, array)
+        self._capacity = capacity
+
+    # The used rows of every array, as views without copies
+    @property
+    def main_codes(self) -> np.ndarray:
+        return self._main_codes[:self._size]
+
+    @property
+    def main_values(self) -> np.ndarray:
+        return self._main_values[:self._size]
+
+    @property
+    def main_levels(self) -> np.ndarray:
+        return self._main_levels[:self._size]
+
+    @property
+    def sub_codes(self) -> np.ndarray:
+        return self._sub_codes[:self._size]
+
+    @property
+    def sub_values(self) -> np.ndarray:
+        return self._sub_values[:self._size]
+
+    @property
+    def sub_levels(self) -> np.ndarray:
+        return self._sub_levels[:self._size]
+
+    @property
+    def sub_counts(self) -> np.ndarray:
+        return self._sub_counts[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the arrays of the stored disks, without the ids."""
+        return sum(array.nbytes for array in (self.main_codes, self.main_values, self.main_levels, self.sub_codes,
+                                              self.sub_values, self.sub_levels, self.sub_counts))
+
+    def append(self, disk: Union[Disk, dict]) -> int:
+        """Store a `Disk` or a disk dictionary (`Disk.to_dict`, `get_disks_and_substats`) and return its row.
+
+        Raises:
+            ValueError: The disk has more than MAX_SUB_STATS sub stats or its id is already stored.
+        """
+        if isinstance(disk, dict):
+            disk_id, main_stat, sub_stats = disk["id"], disk.get("main_stat"), disk.get("sub_stats") or []
+        else:
+            disk_id, main_stat, sub_stats = disk.id, disk.main_stat, disk.sub_stats
+        if len(sub_stats) > MAX_SUB_STATS:
+            raise ValueError(f"Disk {disk_id} has {len(sub_stats)} sub stats, at most {MAX_SUB_STATS} are stored.")
+        if disk_id in self._rows:
+            raise ValueError(f"Disk {disk_id} is already in the inventory.")
+
+        if self._size == self._capacity:
+            self._allocate(self._capacity * 2)
+        row = self._size
+
+        name, value, level = _stat_fields(main_stat)
+        self._main_codes[row] = stat_code(name)
+        self._main_values[row] = value
+        self._main_levels[row] = NO_LEVEL if level is None else level
+        for slot, sub_stat in enumerate(sub_stats):
+            name, value, level = _stat_fields(sub_stat)
+            self._sub_codes[row, slot] = stat_code(name)
+            self._sub_values[row, slot] = value
+            self._sub_levels[row, slot] = level
+        self._sub_counts[row] = len(sub_stats)
+
+        self.ids.append(disk_id)
+        self._rows[disk_id] = row
+        self._size += 1
+        return row
+
+    def extend(self, disks: Iterable[Union[Disk, dict]]) -> None:
+        for disk in disks:
+            self.append(disk)
+
+    @classmethod
+    def from_disks(cls, disks: Iterable[Union[Disk, dict]]) -> "DiskInventory":
+        """Inventory of `Disk`s or disk dictionaries, e.g. `DiskDatabase.get_disks_and_substats()`."""
+        if not isinstance(disks, list):
+            disks = list(disks)
+        inventory = cls(capacity=len(disks))
+        inventory.extend(disks)
+        return inventory
+
+    def row(self, disk_id: str) -> int:
+        """Row of a disk in the arrays, raises KeyError for an unknown id."""
+        return self._rows[disk_id]
+
+    def get(self, disk_id: str) -> Optional[DiskView]:
+        row = self._rows.get(disk_id)
+        return None if row is None else DiskView(self, row)
+
+    def disk(self, row: int) -> DiskView:
+        if not 0 <= row < self._size:
+            raise IndexError(f"Row {row} out of range for an inventory of {self._size} disks.")
+        return DiskView(self, row)
+
+    def __getitem__(self, row: int) -> DiskView:
+        return self.disk(row if row >= 0 else self._size + row)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[DiskView]:
+        return (DiskView(self, row) for row in range(self._size))
+
+    def __contains__(self, disk_id: str) -> bool:
+        return disk_id in self._rows
+
+
+if __name__ == "__main__":
+    # Round trip and memory check against the known-good disk data
+    import json
+    import tracemalloc
+
+    with open("../output/disk_data.json", 'r', encoding='utf-8') as file:
+        disks = [Disk(id=disk_id, main_stat=Stat(**disk_data["main_stat"]) if disk_data["main_stat"] else None,
+                      sub_stats=[Stat(**stat) for stat in disk_data["sub_stats"]])
+                 for disk_id, disk_data in json.load(file).items()]
+
+    inventory = DiskInventory.from_disks(disks)
+    mismatches = [disk.id for disk, view in zip(disks, inventory) if view.to_disk() != disk]
+    print(f"{len(disks) - len(mismatches)}/{len(disks)} disks read back identically.")
+
+    copies = 100_000 // len(disks) + 1
+    tracemalloc.start()
+    objects = [Disk(id=f"{disk.id}_{i}", main_stat=Stat(**disk.main_stat.to_dict()) if disk.main_stat else None,
+                    sub_stats=[Stat(**stat.to_dict()) for stat in disk.sub_stats])
+               for i in range(copies) for disk in disks]
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    large = DiskInventory.from_disks(objects)
+    inventory_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{len(objects)} disks: {object_bytes / len(objects):.0f} bytes per Disk, "
+          f"{inventory_bytes / len(objects):.0f} bytes per inventory row including the id index, "
+          f"{large.nbytes / len(large):.0f} bytes of arrays.")
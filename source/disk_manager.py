@@ -1,6 +1,6 @@
 from typing import List
 
-from pocketbase_database import PocketBaseDatabase
+from source.pocketbase_database import PocketBaseDatabase
 
 
 class DiskManager:
@@ -1,16 +1,38 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List
+
+# Columns `update_disk` may change, a PocketBase disk record has the same fields
+_DISK_COLUMNS = ("main_stat_name", "main_stat_value", "main_stat_level")
 
 
 class DiskDatabase:
     def __init__(self, db_path: str):
+        """Embedded SQLite storage with the same methods as `PocketBaseDatabase`.
+
+        Records are returned as PocketBase returns them: flat dictionaries with a string `id`.
+        Writes go through one connection in WAL mode, so readers are never blocked by a batch upload.
+
+        Args:
+            db_path (str): Database file, created with its tables on first use.
+        """
         self.db_path = db_path
+        # Shared by the API worker threads and the pipeline storage stage, the lock serializes its use
+        self.connection = self.get_connection()
+        self._lock = threading.Lock()
+        self._create_tables()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
 
     def _create_tables(self):
         """Create tables for disks and their stats."""
-        with self.get_connection() as conn:
+        with self.connection as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS disks (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -29,6 +51,150 @@ class DiskDatabase:
                     FOREIGN KEY (disk_id) REFERENCES disks (id) ON DELETE CASCADE
                 )
             """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sub_stats_disk_id ON sub_stats (disk_id)")
+
+    @staticmethod
+    def _reserve_ids(conn, table: str, count: int) -> List[int]:
+        """Ids the next `count` rows of a table will get, so `executemany` can insert them with known ids.
+
+        Must run inside a write transaction, which keeps other writers from taking the same ids.
+        """
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        start = row[0] if row else 0
+        return list(range(start + 1, start + count + 1))
+
+    @contextmanager
+    def _write(self):
+        """One write transaction, `BEGIN IMMEDIATE` takes the database write lock up front."""
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    # Batch methods
+    def create_disks_and_get_ids(self, disks: List[dict]) -> List[dict]:
+        """Insert a batch of disks in one transaction and set `disk_id` on their sub stats."""
+        with self._write() as conn:
+            ids = self._reserve_ids(conn, "disks", len(disks))
+            conn.executemany(
+                "INSERT INTO disks (id, main_stat_name, main_stat_value, main_stat_level) VALUES (?, ?, ?, ?)",
+                [(disk_id, disk["main_stat"]["name"], disk["main_stat"]["value"], disk["main_stat"]["level"])
+                 for disk, disk_id in zip(disks, ids)]
+            )
+
+        # Match the ids to the substats of each disk
+        for disk, disk_id in zip(disks, ids):
+            for sub_stat in disk["sub_stats"]:
+                sub_stat["disk_id"] = str(disk_id)
+
+        return disks
+
+    def create_sub_stats_batch(self, disks_with_ids: List[dict]) -> List[dict]:
+        """Insert the sub stats of a batch of disks in one transaction."""
+        sub_stats = [sub_stat for disk in disks_with_ids for sub_stat in disk["sub_stats"]]
+        with self._write() as conn:
+            ids = self._reserve_ids(conn, "sub_stats", len(sub_stats))
+            conn.executemany(
+                "INSERT INTO sub_stats (id, disk_id, name, value, level) VALUES (?, ?, ?, ?, ?)",
+                [(sub_stat_id, sub_stat["disk_id"], sub_stat["name"], sub_stat["value"], sub_stat["level"])
+                 for sub_stat, sub_stat_id in zip(sub_stats, ids)]
+            )
+        return [{"id": str(sub_stat_id)} for sub_stat_id in ids]
+
+    def get_disks_and_substats(self) -> List[dict]:
+        """All disks with their sub stats, read with one query."""
+        with self._lock:
+            rows = self.connection.execute("""
+                SELECT d.id, d.main_stat_name, d.main_stat_value, d.main_stat_level, s.name, s.value, s.level
+                FROM disks d LEFT JOIN sub_stats s ON s.disk_id = d.id
+                ORDER BY d.id, s.id
+            """).fetchall()
+
+        result = []
+        disk = None
+        for disk_id, main_name, main_value, main_level, name, value, level in rows:
+            if disk is None or disk["id"] != str(disk_id):
+                disk = {
+                    "id": str(disk_id),
+                    "main_stat": {"name": main_name, "value": main_value, "level": main_level},
+                    "sub_stats": []
+                }
+                result.append(disk)
+            if name is not None:
+                disk["sub_stats"].append({"name": name, "value": value, "level": level})
+        return result
+
+    # Disk methods
+    def create_disk(self, disk_data: dict) -> dict:
+        with self._write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO disks (main_stat_name, main_stat_value, main_stat_level) VALUES (?, ?, ?)",
+                tuple(disk_data.get(column) for column in _DISK_COLUMNS)
+            )
+        return {"id": str(cursor.lastrowid), **{column: disk_data.get(column) for column in _DISK_COLUMNS}}
+
+    def get_disks(self) -> List[dict]:
+        return self._records("SELECT id, main_stat_name, main_stat_value, main_stat_level FROM disks ORDER BY id")
+
+    def update_disk(self, disk_id: str, disk_data: dict) -> dict:
+        columns = [column for column in _DISK_COLUMNS if column in disk_data]
+        with self._write() as conn:
+            if columns:
+                conn.execute(f"UPDATE disks SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                             [disk_data[column] for column in columns] + [disk_id])
+        records = self._records("SELECT id, main_stat_name, main_stat_value, main_stat_level FROM disks WHERE id = ?",
+                                (disk_id,))
+        if not records:
+            raise KeyError(f"Disk {disk_id} does not exist.")
+        return records[0]
+
+    def delete_disk(self, disk_id: str) -> bool:
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM disks WHERE id = ?", (disk_id,))
+        return cursor.rowcount > 0
+
+    # Sub-Stat methods
+    def create_sub_stat(self, sub_stat_data: dict) -> dict:
+        with self._write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO sub_stats (disk_id, name, value, level) VALUES (?, ?, ?, ?)",
+                (sub_stat_data["disk_id"], sub_stat_data["name"], sub_stat_data["value"], sub_stat_data["level"])
+            )
+        return {"id": str(cursor.lastrowid), **sub_stat_data}
+
+    def get_substats(self) -> List[dict]:
+        return self._records("SELECT id, disk_id, name, value, level FROM sub_stats ORDER BY id")
+
+    def get_sub_stats_by_disk(self, disk_id: str) -> List[dict]:
+        return self._records("SELECT id, disk_id, name, value, level FROM sub_stats WHERE disk_id = ? ORDER BY id",
+                             (disk_id,))
+
+    def delete_sub_stats_by_disk(self, disk_id: str) -> bool:
+        """Delete all sub-stats for a given disk."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM sub_stats WHERE disk_id = ?", (disk_id,))
+        return True
+
+    def delete_sub_stat(self, sub_stat_id: str) -> bool:
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM sub_stats WHERE id = ?", (sub_stat_id,))
+        return cursor.rowcount > 0
+
+    def _records(self, query: str, parameters: tuple = ()) -> List[dict]:
+        """Rows as PocketBase-like records, ids as strings."""
+        with self._lock:
+            cursor = self.connection.execute(query, parameters)
+            columns = [description[0] for description in cursor.description]
+            records = [dict(zip(columns, row)) for row in cursor]
+        for record in records:
+            record["id"] = str(record["id"])
+            if "disk_id" in record:
+                record["disk_id"] = str(record["disk_id"])
+        return records
 
     def close(self):
         """Close the database connection."""
@@ -1,129 +1,85 @@
-from operator import itemgetter
-from typing import List
+from typing import Dict, List, Optional
 
-from source.constants import SUBSTAT_WEIGHTS
-from source.disk import Disk, Stat
-from source.disk_related.disk_database import DiskDatabase
+from source.disk import Disk, Stat, evaluate_disk
+from source.disk_scoring import rank_disks
+from source.storage import create_database
+
+
+def _disk_record(disk: Disk) -> dict:
+    """Main stat columns of a disk record."""
+    return {
+        "main_stat_name": disk.main_stat.name,
+        "main_stat_value": disk.main_stat.value,
+        "main_stat_level": disk.main_stat.level
+    }
+
+
+def _same_stat(stored: Stat, stat: Stat) -> bool:
+    """Same name and level, and the same value up to the float error of the database."""
+    return stored.name == stat.name and abs(stored.value - stat.value) < 0.0001 and stored.level == stat.level
 
 
 class DiskManager:
 
-    def __init__(self, database: DiskDatabase):
+    def __init__(self, database):
+        """Manage the disks of a storage backend made by `create_database`, SQLite or PocketBase."""
         self.database = database
+        self._disk_index: Optional[Dict[str, Disk]] = None
 
     def add_disk(self, disk: Disk):
         """Add a new disk to the database."""
-        with self.database.connection as conn:
-            # Insert into disks table without specifying an ID
-            cursor = conn.execute("""
-                INSERT INTO disks (main_stat_name, main_stat_value, main_stat_level)
-                VALUES (?, ?, ?)
-            """, (disk.main_stat.name, disk.main_stat.value, disk.main_stat.level))
-
-            # Retrieve the auto-generated ID for the disk
-            disk_id = cursor.lastrowid
-
-            # Insert sub_stats linked to the new disk
-            for sub_stat in disk.sub_stats:
-                conn.execute("""
-                    INSERT INTO sub_stats (disk_id, name, value, level)
-                    VALUES (?, ?, ?, ?)
-                """, (disk_id, sub_stat.name, sub_stat.value, sub_stat.level))
+        self._disk_index = None
+        created_disk = self.database.create_disk(_disk_record(disk))
+        self._create_sub_stats(created_disk["id"], disk.sub_stats)
 
     def get_disks(self) -> List[Disk]:
-        conn = self.database.get_connection()
-        try:
-            cursor = conn.execute("SELECT id, main_stat_name, main_stat_value, main_stat_level FROM disks")
-            disks = cursor.fetchall()
-            result = []
-            for disk_row in disks:
-                disk_id, main_stat_name, main_stat_value, main_stat_level = disk_row
-                cursor = conn.execute("SELECT name, value, level FROM sub_stats WHERE disk_id = ?", (disk_id,))
-                sub_stats = cursor.fetchall()
-                sub_stats = [Stat(name=row[0], value=row[1], level=row[2]) for row in sub_stats]
-                disk = Disk(
-                    id=disk_id,
-                    main_stat=Stat(name=main_stat_name, value=main_stat_value, level=main_stat_level),
-                    sub_stats=sub_stats
-                )
-                result.append(disk)
-            # logging.info(f"Retrieved disks: First two: {result[:2]}, Last two: {result[-2:]}")
-            return result
-        except Exception as e:
-            # logging.error(f"Error retrieving disks: {e}")
-            raise
-        finally:
-            conn.close()
+        """Load every disk with its sub-stats in one query and refresh the id index."""
+        self._disk_index = {
+            record["id"]: Disk(
+                id=record["id"],
+                main_stat=Stat(**record["main_stat"]),
+                sub_stats=[Stat(**sub_stat) for sub_stat in record["sub_stats"]]
+            )
+            for record in self.database.get_disks_and_substats()
+        }
+        return list(self._disk_index.values())
+
+    def disk_index(self) -> Dict[str, Disk]:
+        """Disks by id, as of the last `get_disks`. Loaded on first use, reset by every change made here."""
+        if self._disk_index is None:
+            self.get_disks()
+        return self._disk_index
 
     def remove_disk(self, disk_id: str):
         """Remove a disk and its sub-stats from the database."""
-        with self.database.connection as conn:
-            conn.execute("DELETE FROM sub_stats WHERE disk_id = ?", (disk_id,))
-            conn.execute("DELETE FROM disks WHERE id = ?", (disk_id,))
+        self._disk_index = None
+        self.database.delete_sub_stats_by_disk(disk_id)
+        self.database.delete_disk(disk_id)
 
     def update_disk(self, disk: Disk):
         """Update an existing disk."""
-        with self.database.connection as conn:
-            conn.execute("""
-                UPDATE disks SET main_stat_name = ?, main_stat_value = ?, main_stat_level = ?
-                WHERE id = ?
-            """, (disk.main_stat.name, disk.main_stat.value, disk.main_stat.level, disk.id))
-
-            # Delete and re-insert sub_stats to simplify updates
-            conn.execute("DELETE FROM sub_stats WHERE disk_id = ?", (disk.id,))
-            for sub_stat in disk.sub_stats:
-                conn.execute("""
-                    INSERT INTO sub_stats (disk_id, name, value, level)
-                    VALUES (?, ?, ?, ?)
-                """, (disk.id, sub_stat.name, sub_stat.value, sub_stat.level))
+        self._disk_index = None
+        self.database.update_disk(disk.id, _disk_record(disk))
+
+        # Delete and re-insert sub_stats to simplify updates
+        self.database.delete_sub_stats_by_disk(disk.id)
+        self._create_sub_stats(disk.id, disk.sub_stats)
+
+    def _create_sub_stats(self, disk_id: str, sub_stats: List[Stat]):
+        for sub_stat in sub_stats:
+            self.database.create_sub_stat({"disk_id": disk_id, **sub_stat.to_dict()})
 
     def disk_exists(self, disk: Disk) -> bool:
-        """Check if a disk with the same stats (main + ordered sub-stats) already exists in the database."""
-        with self.database.connection as conn:
-            # Step 1: Retrieve all disk IDs with matching main stats
-            cursor = conn.execute("""
-                SELECT id FROM disks
-                WHERE main_stat_name = ? 
-                AND ABS(main_stat_value - ?) < 0.0001
-                AND main_stat_level = ?
-            """, (disk.main_stat.name, disk.main_stat.value, disk.main_stat.level))
-
-            matching_main_stat_ids = [row[0] for row in cursor.fetchall()]
-            if not matching_main_stat_ids:
-                return False  # No disks with matching main stats
-
-            # Step 2: Check sub-stats for each matching disk ID
-            for disk_id in matching_main_stat_ids:
-                # Retrieve sub-stats for this disk ID, ordered by insertion (ID)
-                db_sub_stats = conn.execute("""
-                    SELECT name, value, level 
-                    FROM sub_stats
-                    WHERE disk_id = ?
-                    ORDER BY id ASC
-                """, (disk_id,)).fetchall()
-
-                # Convert database sub-stats to a list of Stat objects
-                db_sub_stats = [
-                    Stat(name=row[0], value=row[1], level=row[2])
-                    for row in db_sub_stats
-                ]
-
-                # Step 3: Compare sub-stats (length, order, and values)
-                if len(db_sub_stats) != len(disk.sub_stats):
-                    continue  # Skip this disk ID; sub-stat count doesn't match
-
-                match = all(
-                    db_stat.name == disk_stat.name and
-                    abs(db_stat.value - disk_stat.value) < 0.0001 and
-                    db_stat.level == disk_stat.level
-                    for db_stat, disk_stat in zip(db_sub_stats, disk.sub_stats)
-                )
-
-                if match:
-                    return True  # Found a matching disk
-
-            # No matching disk found
-            return False
+        """Check if a disk with the same stats (main + ordered sub-stats) already exists in the database.
+
+        Compares against `disk_index`, so it goes through the backend methods and works with either backend.
+        """
+        return any(
+            _same_stat(stored.main_stat, disk.main_stat)
+            and len(stored.sub_stats) == len(disk.sub_stats)
+            and all(map(_same_stat, stored.sub_stats, disk.sub_stats))
+            for stored in self.disk_index().values()
+        )
 
     def evaluate_disk(self, disk: Disk) -> dict:
         """
@@ -131,39 +87,17 @@ class DiskManager:
         :param disk: A Disk object.
         :return: Evaluation scores and total score as a dictionary.
         """
-        # Fixed main stat score
-        main_stat_score = 10
-
-        # Calculate current and potential substat scores
-        current_score = disk.total_substat_score(SUBSTAT_WEIGHTS)
-        potential_score = disk.calculate_potential(SUBSTAT_WEIGHTS)
-
-        if disk.main_stat.level >= 15:
-            # Evaluate at 0 any disk that is maxed out
-            current_score = 0
-            potential_score = 0
-            main_stat_score = 0
-
-        # Total score combines main stat and substat scores
-        total_score = main_stat_score + current_score + potential_score
-
-        return {
-            "Disk ID": disk.id,
-            "Main Stat Score": main_stat_score,
-            "Current Substat Score": current_score,
-            "Potential Substat Score": potential_score,
-            "Total Score": total_score,
-        }
+        return evaluate_disk(disk)
 
-    def rank_disks(self) -> List[dict]:
+    def rank_disks(self, top: Optional[int] = None) -> List[dict]:
         """
         Rank all disks based on their total scores.
+        :param top: Number of best disks to return, None for all of them.
         :return: Sorted list of disk evaluations.
         """
         disks = self.get_disks()  # Fetch disks from the database
-        evaluations = [self.evaluate_disk(disk) for disk in disks]
-        # Sort by total score in descending order
-        return sorted(evaluations, key=itemgetter("Total Score"), reverse=True)
+        # Scored in one batch, with the same results as `evaluate_disk` for each disk
+        return rank_disks(disks, top=top)
 
     def display_ranking(self, ranked_disks_):
         """
@@ -175,6 +109,7 @@ class DiskManager:
         print("=" * 75)
 
         top_disks = ranked_disks_[:20]
+        disk_index = self.disk_index()
 
         for rank, disk_data in enumerate(top_disks, start=1):
             # Print general stats for the disk
@@ -182,8 +117,8 @@ class DiskManager:
                 f"{rank:<5} {disk_data['Disk ID']:<10} {disk_data['Main Stat Score']:<12.2f} {disk_data['Current Substat Score']:<15.2f} {disk_data['Potential Substat Score']:<18.2f} {disk_data['Total Score']:<12.2f}"
             )
 
-            # Fetch full disk details from database for main stat and substats
-            disk = next((d for d in self.get_disks() if d.id == disk_data["Disk ID"]), None)
+            # Full disk details for main stat and substats, from the disks loaded for the ranking
+            disk = disk_index.get(disk_data["Disk ID"])
             if disk:
                 # Print main stat details
                 print(f"  Main Stat: {disk.main_stat.name} - {disk.main_stat.value} (Level {disk.main_stat.level})")
@@ -198,8 +133,8 @@ class DiskManager:
 
 # Example usage with database
 if __name__ == "__main__":
-    # Initialize DiskDatabase (assumes implementation exists)
-    db = DiskDatabase("../../db/disk_database.db")
+    # Initialize the local SQLite database
+    db = create_database("sqlite", path="../../db/disk_database.db")
     disk_manager = DiskManager(db)
 
     # Example: Add, rank, and display disks
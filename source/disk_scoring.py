@@ -0,0 +1,351 @@
+import math
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from source.constants import SUBSTAT_WEIGHTS, SUBSTATS
+from source.disk import MAX_LEVEL, LEVELS_PER_UPGRADE, POTENTIAL_DECAY, MAIN_STAT_SCORE
+from source.disk_inventory import DiskInventory, STAT_NAMES, STAT_CODES, MAX_SUB_STATS, NO_STAT, NO_LEVEL
+from source.weight_profiles import WeightProfile
+
+# math.exp of every int8 level, np.exp may differ from it in the last bit
+_LEVEL_PENALTY = np.array([math.exp(-POTENTIAL_DECAY * level) for level in range(-128, 128)])
+
+
+class InventoryScores(NamedTuple):
+    """Scores of every disk of an inventory, one float64 array per column of `evaluate_disk`.
+
+    Disks `evaluate_disk` cannot score (a sub stat without a weight, no main stat or level) are NaN.
+    """
+    main: np.ndarray
+    current: np.ndarray
+    potential: np.ndarray
+    total: np.ndarray
+
+
+def decimal_values(values: np.ndarray) -> np.ndarray:
+    """float64 of the 7 significant digit decimal of float32 values: `4.8` stored as float32 gives `4.8` again.
+
+    Stat values have at most 7 significant digits, so they come back exactly as they were parsed.
+    """
+    values = values.astype(np.float64)
+    magnitude = np.floor(np.log10(np.abs(values), out=np.zeros_like(values), where=values != 0)).astype(np.int64)
+    exponent = 6 - magnitude
+    # Scale by an exact power of ten in both directions so the division rounds only once
+    scale = 10.0 ** np.abs(exponent)
+    return np.where(exponent >= 0, np.round(values * scale) / scale, np.round(values / scale) * scale)
+
+
+def _weight_table(weights: Dict[str, float], default: float) -> np.ndarray:
+    """Weight of every stat code, `default` for stats without a weight and 0 for empty slots (code -1, last)."""
+    table = np.array([weights.get(name, default) for name in STAT_NAMES] + [0.0], dtype=np.float64)
+    return table
+
+
+def _potential_slots(codes: np.ndarray) -> tuple:
+    """Sub stats `disk_potential` sees: a repeated name keeps its first slot but takes the value of its last."""
+    keep = codes != NO_STAT
+    source_slot = np.tile(np.arange(MAX_SUB_STATS), (len(codes), 1))
+    for slot in range(MAX_SUB_STATS):
+        for later in range(slot + 1, MAX_SUB_STATS):
+            same = (codes[:, slot] == codes[:, later]) & keep[:, later]
+            keep[:, later] &= ~same
+            source_slot[:, slot] = np.where(same & keep[:, slot], later, source_slot[:, slot])
+    return keep, source_slot
+
+
+def score_inventory(inventory: DiskInventory, weights: Dict[str, float] = SUBSTAT_WEIGHTS) -> InventoryScores:
+    """Score every disk at once, with the same results as `evaluate_disk` for each disk.
+
+    The sums are accumulated slot by slot in the order `evaluate_disk` adds them, so the floats are
+    identical and not just close.
+
+    Args:
+        inventory (DiskInventory): Disks to score.
+        weights (dict): Sub stat weights, `evaluate_disk` uses SUBSTAT_WEIGHTS.
+    """
+    count = len(inventory)
+    codes = inventory.sub_codes.astype(np.int64)
+    values = decimal_values(inventory.sub_values)
+    rows = np.arange(count)[:, None]
+
+    # Current score: `Disk.total_substat_score`, stats without a weight count 0
+    current_weights = _weight_table(weights, 0.0)[codes]
+    current = np.zeros(count)
+    for slot in range(MAX_SUB_STATS):
+        current = current + current_weights[:, slot] * values[:, slot]
+
+    # Potential: `disk_potential`, a stat without a weight makes it fail, here NaN
+    keep, source_slot = _potential_slots(codes)
+    potential_weights = np.where(keep, _weight_table(weights, np.nan)[codes], 0.0)
+    potential_values = np.where(keep, values[rows, source_slot], 0.0)
+    current_value = np.zeros(count)
+    for slot in range(MAX_SUB_STATS):
+        current_value = current_value + potential_weights[:, slot] * potential_values[:, slot]
+
+    levels = inventory.main_levels.astype(np.int64)
+    starting_substats = inventory.sub_counts.astype(np.int64)
+    three_substats = starting_substats == 3
+
+    total_upgrades = np.maximum(0, (MAX_LEVEL - levels) // LEVELS_PER_UPGRADE)
+    meaningful_upgrades = total_upgrades - three_substats
+    average_gain = sum(weights.values()) / len(weights)
+    fourth_substat_value = average_gain * (sum(SUBSTATS.values()) / len(SUBSTATS))
+
+    future_potential = meaningful_upgrades * average_gain
+    future_potential = np.where(three_substats,
+                                future_potential + np.where(levels < MAX_LEVEL, fourth_substat_value, 0),
+                                future_potential)
+    potential = (current_value + future_potential) * _LEVEL_PENALTY[levels + 128]
+
+    # Maxed out disks score 0
+    maxed = levels >= MAX_LEVEL
+    main = np.where(maxed, 0.0, float(MAIN_STAT_SCORE))
+    current = np.where(maxed, 0.0, current)
+    potential = np.where(maxed, 0.0, potential)
+    total = main + current + potential
+
+    unscored = (np.isnan(current_value) | (inventory.main_codes == NO_STAT) | (inventory.main_levels == NO_LEVEL))
+    for column in (main, current, potential, total):
+        column[unscored] = np.nan
+
+    return InventoryScores(main, current, potential, total)
+
+
+def _evaluations(ids: List[str], rows: np.ndarray, main: np.ndarray, current: np.ndarray, potential: np.ndarray,
+                 total: np.ndarray) -> List[dict]:
+    """`evaluate_disk` dictionaries of the given rows, in that order."""
+    return [
+        {
+            "Disk ID": ids[row],
+            "Main Stat Score": main_score,
+            "Current Substat Score": current_score,
+            "Potential Substat Score": potential_score,
+            "Total Score": total_score,
+        }
+        for row, main_score, current_score, potential_score, total_score in zip(
+            rows.tolist(), main[rows].tolist(), current[rows].tolist(), potential[rows].tolist(), total[rows].tolist())
+    ]
+
+
+def top_rows(total: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """Rows of the `k` highest scores, best first, NaN left out. Ties keep the row order, as a stable sort would.
+
+    Only the top `k` rows are sorted, the rest is split off by a linear-time partition.
+    """
+    scores = np.where(np.isnan(total), -np.inf, total)
+    if k is not None and k < len(scores):
+        if k <= 0:
+            return np.arange(0)
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > threshold)
+        candidates = np.concatenate([above, np.flatnonzero(scores == threshold)[:k - len(above)]])
+    else:
+        candidates = np.arange(len(scores))
+    rows = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return rows[scores[rows] > -np.inf]
+
+
+def rank_inventory(inventory: DiskInventory, scores: Optional[InventoryScores] = None,
+                   weights: Dict[str, float] = SUBSTAT_WEIGHTS, top: Optional[int] = None) -> List[dict]:
+    """Evaluations of all scoreable disks, best first, like `rank_disks`. Ties keep the inventory order."""
+    if scores is None:
+        scores = score_inventory(inventory, weights)
+    rows = top_rows(scores.total, top)
+    return _evaluations(inventory.ids, rows, scores.main, scores.current, scores.potential, scores.total)
+
+
+class ProfileScores(NamedTuple):
+    """Scores of every disk (rows) for every weight profile (columns), NaN where a disk cannot be scored."""
+    profiles: List[str]
+    main: np.ndarray
+    current: np.ndarray
+    potential: np.ndarray
+    total: np.ndarray
+
+
+def _stat_matrices(inventory: DiskInventory) -> tuple:
+    """Disks x stat codes matrices of the sub stat values.
+
+    The current score sums every sub stat, the potential only sees the last value of a repeated name,
+    like the dictionary `disk_potential` is given.
+    """
+    shape = (len(inventory), len(STAT_NAMES))
+    codes = inventory.sub_codes.astype(np.int64)
+    values = decimal_values(inventory.sub_values)
+    current, potential, present = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+    for slot in range(MAX_SUB_STATS):
+        rows = np.flatnonzero(codes[:, slot] != NO_STAT)
+        slot_codes = codes[rows, slot]
+        current[rows, slot_codes] += values[rows, slot]
+        potential[rows, slot_codes] = values[rows, slot]
+        present[rows, slot_codes] = 1
+    return current, potential, present
+
+
+def _main_stat_table(profiles: List[WeightProfile]) -> np.ndarray:
+    """Main stat score of every stat code (rows) for every profile (columns), 0 for a missing main stat (last row)."""
+    table = np.zeros((len(STAT_NAMES) + 1, len(profiles)))
+    for column, profile in enumerate(profiles):
+        weights = profile.main_stat_weights
+        if weights is None:
+            table[:-1, column] = MAIN_STAT_SCORE
+            continue
+        element_weight = weights.get("Element DMG Bonus", 0)
+        table[:-1, column] = [weights.get(name, element_weight if name.endswith("DMG Bonus") else 0)
+                              for name in STAT_NAMES]
+    return table
+
+
+def score_profiles(inventory: DiskInventory, profiles: List[WeightProfile]) -> ProfileScores:
+    """Score every disk against every profile in one pass.
+
+    The sub stat values of all disks form a disks x stats matrix and the weights of all profiles a
+    stats x profiles matrix, so the current score of every disk for every profile is one matrix
+    product. Sub stats a profile does not list weigh 0. With the default profile the scores equal
+    `evaluate_disk` up to float rounding, `score_inventory` gives bit-identical results for a single
+    set of weights.
+    """
+    current_matrix, potential_matrix, present = _stat_matrices(inventory)
+    weights = np.array([[profile.substat_weights.get(name, 0.0) for profile in profiles] for name in STAT_NAMES],
+                       dtype=np.float64).reshape(len(STAT_NAMES), len(profiles))
+    unknown = np.array([name not in SUBSTATS for name in STAT_NAMES], dtype=np.float64)
+
+    current = current_matrix @ weights
+    current_value = potential_matrix @ weights
+
+    levels = inventory.main_levels.astype(np.int64)[:, None]
+    three_substats = (inventory.sub_counts == 3)[:, None]
+    # Sub stats a profile leaves out weigh 0, they are still among the stats an upgrade may roll
+    average_gain = np.array([sum(profile.substat_weights.values()) / len(SUBSTATS) for profile in profiles])
+    fourth_substat_value = average_gain * (sum(SUBSTATS.values()) / len(SUBSTATS))
+
+    total_upgrades = np.maximum(0, (MAX_LEVEL - levels) // LEVELS_PER_UPGRADE)
+    future_potential = (total_upgrades - three_substats) * average_gain
+    future_potential = future_potential + np.where(three_substats & (levels < MAX_LEVEL), fourth_substat_value, 0.0)
+    potential = (current_value + future_potential) * _LEVEL_PENALTY[levels + 128]
+
+    maxed = levels >= MAX_LEVEL
+    main = np.where(maxed, 0.0, _main_stat_table(profiles)[inventory.main_codes])
+    current = np.where(maxed, 0.0, current)
+    potential = np.where(maxed, 0.0, potential)
+    total = main + current + potential
+
+    # A sub stat that is not a known sub stat, no main stat or no level: `evaluate_disk` would fail
+    unscored = ((present @ unknown) > 0) | (inventory.main_codes == NO_STAT) | (inventory.main_levels == NO_LEVEL)
+    unscored = np.repeat(unscored[:, None], len(profiles), axis=1)
+    for scores in (main, current, potential, total):
+        scores[unscored] = np.nan
+
+    return ProfileScores([profile.name for profile in profiles], main, current, potential, total)
+
+
+def top_k_per_profile(inventory: DiskInventory, profiles: List[WeightProfile], k: int = 20,
+                      scores: Optional[ProfileScores] = None) -> Dict[str, List[dict]]:
+    """The `k` best disks of every profile, scored together in one pass, by profile name."""
+    if scores is None:
+        scores = score_profiles(inventory, profiles)
+    rankings = {}
+    for column, name in enumerate(scores.profiles):
+        main, current, potential, total = (scores.main[:, column], scores.current[:, column],
+                                           scores.potential[:, column], scores.total[:, column])
+        rankings[name] = _evaluations(inventory.ids, top_rows(total, k), main, current, potential, total)
+    return rankings
+
+
+class RankingPage(NamedTuple):
+    """One page of a ranking: `total` disks match the filters, `evaluations` holds those at `offset`."""
+    total: int
+    offset: int
+    evaluations: List[dict]
+
+
+def ranking_filter(inventory: DiskInventory, scores: InventoryScores, main_stat: Optional[str] = None,
+                   min_level: Optional[int] = None, max_level: Optional[int] = None,
+                   min_score: Optional[float] = None) -> np.ndarray:
+    """Mask of the scoreable disks with that main stat, a main stat level in the range and at least that total."""
+    mask = ~np.isnan(scores.total)
+    if main_stat is not None:
+        # Every stored main stat has a code, a name without one matches no disk
+        code = STAT_CODES.get(main_stat)
+        mask &= (inventory.main_codes == code) if code is not None else False
+    if min_level is not None:
+        mask &= inventory.main_levels >= min_level
+    if max_level is not None:
+        mask &= (inventory.main_levels <= max_level) & (inventory.main_levels != NO_LEVEL)
+    if min_score is not None:
+        mask &= scores.total >= min_score
+    return mask
+
+
+def rank_page(inventory: DiskInventory, scores: Optional[InventoryScores] = None, k: int = 20, offset: int = 0,
+              weights: Dict[str, float] = SUBSTAT_WEIGHTS, **filters) -> RankingPage:
+    """The disks ranked `offset` to `offset + k` among those matching the filters (see `ranking_filter`).
+
+    Only `offset + k` rows are selected and sorted, and only `k` evaluations are built.
+    """
+    if scores is None:
+        scores = score_inventory(inventory, weights)
+    mask = ranking_filter(inventory, scores, **filters)
+    rows = top_rows(np.where(mask, scores.total, np.nan), offset + k)[offset:]
+    return RankingPage(int(mask.sum()), offset,
+                       _evaluations(inventory.ids, rows, scores.main, scores.current, scores.potential, scores.total))
+
+
+def profile_column(scores: ProfileScores, profile: str) -> InventoryScores:
+    """The scores of one profile, to rank or page them like `score_inventory` results."""
+    column = scores.profiles.index(profile)
+    return InventoryScores(scores.main[:, column], scores.current[:, column], scores.potential[:, column],
+                           scores.total[:, column])
+
+
+def rank_disks(disks, weights: Dict[str, float] = SUBSTAT_WEIGHTS, top: Optional[int] = None) -> List[dict]:
+    """Evaluations of `Disk`s or disk dictionaries, best first, scored in one batch. `top` keeps the best ones."""
+    return rank_inventory(DiskInventory.from_disks(disks), weights=weights, top=top)
+
+
+if __name__ == "__main__":
+    # Timings on the known-good disk data plus random disks, the parity checks are in tests/test_disk_scoring.py
+    import json
+    import random
+    import time
+
+    from source.disk import Disk, Stat, evaluate_disk
+    from source.weight_profiles import DEFAULT_PROFILE
+
+    with open("../output/disk_data.json", 'r', encoding='utf-8') as file:
+        disks = [Disk(id=disk_id, main_stat=Stat(**disk_data["main_stat"]) if disk_data["main_stat"] else None,
+                      sub_stats=[Stat(**stat) for stat in disk_data["sub_stats"]])
+                 for disk_id, disk_data in json.load(file).items()]
+
+    random.seed(0)
+    for i in range(20000):
+        sub_stats = [Stat(name=name, value=SUBSTATS[name], level=0)
+                     for name in random.sample(list(SUBSTATS), random.randint(0, MAX_SUB_STATS))]
+        disks.append(Disk(id=f"random_{i}", main_stat=Stat(name="ATK%", value=30.0, level=random.randint(0, 15)),
+                          sub_stats=sub_stats))
+    inventory = DiskInventory.from_disks(disks)
+
+    start = time.perf_counter()
+    scalar_ranking = sorted((evaluate_disk(disk) for disk in disks if disk.main_stat),
+                            key=lambda evaluation: evaluation["Total Score"], reverse=True)
+    scalar_time = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = score_inventory(inventory)
+    rank_inventory(inventory, scores)
+    batch_time = time.perf_counter() - start
+    print(f"Ranking {len(inventory)} disks: {scalar_time * 1000:.0f} ms one disk at a time, "
+          f"{batch_time * 1000:.0f} ms batched.")
+
+    profiles = [DEFAULT_PROFILE] + [
+        WeightProfile(f"build {i}", {name: random.randint(0, 10) for name in SUBSTAT_WEIGHTS},
+                      {name: random.randint(0, 10) for name in ("ATK%", "CRIT Rate", "Element DMG Bonus")})
+        for i in range(1, 32)]
+    start = time.perf_counter()
+    top_k_per_profile(inventory, profiles, 20)
+    print(f"Scoring {len(inventory)} disks against {len(profiles)} profiles with top 20 each: "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    start = time.perf_counter()
+    page = rank_page(inventory, scores, 20)
+    print(f"Best 20 of {page.total} disks: {(time.perf_counter() - start) * 1000:.2f} ms.")
@@ -0,0 +1,66 @@
+import os
+import zipfile
+from typing import List, NamedTuple, Union
+
+import cv2
+import numpy as np
+
+# Archives opened by this process, kept open so every member read does not parse the zip directory again.
+# Keyed by process id as well: a forked pool worker must not share the file offset of its parent's handle.
+_open_archives = {}
+
+
+class ZipMember(NamedTuple):
+    """An image stored inside a zip archive of captures, such as `images.bak`."""
+    archive_path: str
+    name: str
+
+    def __str__(self):
+        return f"{self.archive_path}/{self.name}"
+
+
+# A capture is either a file on disk or a member of a zip archive
+ImageSource = Union[str, ZipMember]
+
+
+def open_archive(archive_path: str) -> zipfile.ZipFile:
+    """Return the open archive, opening it on first use in this process."""
+    key = (os.getpid(), archive_path)
+    archive = _open_archives.get(key)
+    if archive is None:
+        archive = _open_archives[key] = zipfile.ZipFile(archive_path)
+    return archive
+
+
+def is_archive(path: str) -> bool:
+    """Whether the path is a zip archive, whatever its extension (`images.bak` is one)."""
+    return os.path.isfile(path) and zipfile.is_zipfile(path)
+
+
+def list_archive(archive_path: str) -> List[str]:
+    """Names of all files in an archive."""
+    return [info.filename for info in open_archive(archive_path).infolist() if not info.is_dir()]
+
+
+def read_image(source: ImageSource, flags: int = cv2.IMREAD_COLOR):
+    """Read an image from disk or decode it straight from the archive, without a temporary file."""
+    if isinstance(source, ZipMember):
+        data = np.frombuffer(open_archive(source.archive_path).read(source.name), dtype=np.uint8)
+        return cv2.imdecode(data, flags)
+    return cv2.imread(source, flags)
+
+
+def source_signature(source: ImageSource) -> List:
+    """Path, size and modification time of a file, or path, size and CRC of an archive member."""
+    if isinstance(source, ZipMember):
+        info = open_archive(source.archive_path).getinfo(source.name)
+        return [str(source), info.file_size, info.CRC]
+    stat = os.stat(source)
+    return [source, stat.st_size, stat.st_mtime_ns]
+
+
+def close_archives() -> None:
+    """Close every archive opened by this process."""
+    pid = os.getpid()
+    for key in [key for key in _open_archives if key[0] == pid]:
+        _open_archives.pop(key).close()
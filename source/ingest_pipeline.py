@@ -0,0 +1,307 @@
+import heapq
+import threading
+import time
+from operator import itemgetter
+from queue import Queue, Empty
+from typing import Callable, List, Optional
+
+from source.constants import OCR_ENGINE, OCR_STREAM_THREADS, STREAM_QUEUE_SIZE, PIPELINE_PARSE_WORKERS, \
+    PIPELINE_BATCH_SIZE, PIPELINE_FLUSH_INTERVAL
+from source.disk_dedup import DedupIndex, disk_hashes
+from source.disk import evaluate_disk
+from source.json_to_db_data_converter import to_disk
+from source.jsonl_stream import JsonlWriter
+from source.ocr_image_processor import binarize, collect_disk_jobs, create_ocr_engine, get_image_folders, load_crops, \
+    recognize_crops
+from source.stat_parser import parse_disk_text
+
+
+class PipelineStage:
+    """A pool of worker threads reading from a bounded input queue and writing to the next stage.
+
+    `None` marks the end of the input. The last worker of a stage to see it passes it on, so a
+    stage only finishes once all of its workers are done. A full output queue blocks the workers,
+    which pushes back on every stage upstream.
+    """
+
+    def __init__(self, name: str, function: Callable, workers: int = 1, queue_size: int = STREAM_QUEUE_SIZE,
+                 setup: Optional[Callable] = None, finish: Optional[Callable] = None,
+                 idle_interval: Optional[float] = None):
+        """
+        Args:
+            name (str): Stage name used in logs and statistics.
+            function (callable): `function(item, state)` returns the item for the next stage, or None to drop it.
+            workers (int): Number of worker threads.
+            queue_size (int): Capacity of the input queue.
+            setup (callable): Creates the per-worker state, for example an OCR engine. None for no state.
+            finish (callable): `finish(state)` is called when the input ends, and whenever the input was
+                idle for `idle_interval` seconds, e.g. to write a partial batch.
+        """
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+        self.setup = setup
+        self.finish = finish
+        self.idle_interval = idle_interval
+        self.input = Queue(maxsize=queue_size)
+        self.output: Optional[Queue] = None
+
+        self.processed = 0
+        self.busy_time = 0.0
+        self._remaining = self.workers
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self._threads = [threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def _next_item(self, state):
+        if self.idle_interval is None:
+            return self.input.get()
+        while True:
+            try:
+                return self.input.get(timeout=self.idle_interval)
+            except Empty:
+                self.finish(state)
+
+    def _work(self) -> None:
+        state, ready = None, True
+        try:
+            state = self.setup() if self.setup else None
+        except Exception as e:
+            # Keep draining the input, otherwise the stages upstream block forever on a full queue
+            print(f"Error starting a worker of the {self.name} stage, dropping its disks: {e}")
+            ready = False
+        try:
+            while True:
+                item = self._next_item(state)
+                if item is None:
+                    # Put the marker back so the other workers of this stage stop as well
+                    self.input.put(None)
+                    break
+                if not ready:
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    result = self.function(item, state)
+                except Exception as e:
+                    print(f"Error in {self.name} stage: {e}")
+                    continue
+                with self._lock:
+                    self.processed += 1
+                    self.busy_time += time.perf_counter() - start
+
+                if result is not None and self.output is not None:
+                    self.output.put(result)
+        finally:
+            if self.finish and ready:
+                self.finish(state)
+            if state is not None and hasattr(state, "close"):
+                state.close()
+            with self._lock:
+                self._remaining -= 1
+                last = self._remaining == 0
+            if last and self.output is not None:
+                self.output.put(None)
+
+
+class _Batch(list):
+    """Storage stage state: disks waiting to be written."""
+
+
+class IngestPipeline:
+    def __init__(self, database, engine_name: str = OCR_ENGINE, cache_path: Optional[str] = None,
+                 ocr_workers: int = OCR_STREAM_THREADS, parse_workers: int = PIPELINE_PARSE_WORKERS,
+                 batch_size: int = PIPELINE_BATCH_SIZE, dedup: bool = True, raw_tap: Optional[str] = None,
+                 parsed_tap: Optional[str] = None, combine_sub_stats: bool = False,
+                 min_confidence: Optional[float] = None, queue_size: int = STREAM_QUEUE_SIZE):
+        """Capture/OCR, dedup, parse, score and store disks as concurrent stages.
+
+        Every disk flows through all stages on its own, so it is stored and ranked seconds after it
+        was captured instead of after the whole scan. The stages are connected by bounded queues.
+
+        Args:
+            database: Storage with `create_disks_and_get_ids` and `create_sub_stats_batch`, such as
+                `PocketBaseDatabase`.
+            engine_name (str): OCR backend, see `ocr_engines.ENGINES`.
+            cache_path (str): SQLite OCR result cache, None disables the cache.
+            ocr_workers (int): OCR threads, each with its own engine.
+            parse_workers (int): Parser threads.
+            batch_size (int): Disks written to the database at once. A partial batch is written once no
+                new disk arrived for PIPELINE_FLUSH_INTERVAL seconds.
+            dedup (bool): Drop disks already captured in an earlier scan folder before OCR.
+            raw_tap (str): JSONL file receiving the raw OCR output, None to skip it.
+            parsed_tap (str): JSONL file receiving the parsed disk data, None to skip it.
+            combine_sub_stats (bool): Recognize the sub stat crops of a disk with one OCR call.
+            min_confidence (float): Re-OCR doubtful crops, see `recognize_checked`. None disables re-OCR.
+            queue_size (int): Capacity of every queue between two stages.
+        """
+        self.database = database
+        self.engine_name = engine_name
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.combine_sub_stats = combine_sub_stats
+        self.min_confidence = min_confidence
+        self.raw_tap = JsonlWriter(raw_tap) if raw_tap else None
+        self.parsed_tap = JsonlWriter(parsed_tap) if parsed_tap else None
+
+        self._dedup_index = DedupIndex()
+        self.duplicates = 0
+        self.stored = 0
+        self._evaluations = {}
+        self._ranking_lock = threading.Lock()
+
+        stages = []
+        if dedup:
+            stages.append(PipelineStage("dedup", self._dedup, queue_size=queue_size))
+        stages += [
+            PipelineStage("ocr", self._ocr, ocr_workers, queue_size, setup=self._create_engine),
+            PipelineStage("parse", self._parse, parse_workers, queue_size),
+            PipelineStage("score", self._score, queue_size=queue_size),
+            PipelineStage("store", self._store, queue_size=queue_size, setup=_Batch, finish=self._flush,
+                          idle_interval=PIPELINE_FLUSH_INTERVAL),
+        ]
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.output = next_stage.input
+        self.stages = stages
+
+    @property
+    def input(self) -> Queue:
+        """Queue of `(disk_index, disk_key, crops)` items, like the one `ScreenScanner` fills. None ends the input."""
+        return self.stages[0].input
+
+    def _create_engine(self):
+        return create_ocr_engine(self.engine_name, self.cache_path)
+
+    def _dedup(self, item, _):
+        disk_key, crops = item
+        folder = disk_key.rsplit("_disk_", 1)[0]
+        names = ["sub_block"] if "sub_block" in crops else [f"sub_{i}" for i in range(1, 5) if f"sub_{i}" in crops]
+        hashes = disk_hashes([binarize(crops[name]) for name in ["main"] + names])
+        original = self._dedup_index.find(folder, hashes)
+        if original:
+            self.duplicates += 1
+            print(f"  {disk_key} is a second capture of {original}, skipping it")
+            return None
+        self._dedup_index.add(disk_key, folder, hashes)
+        return item
+
+    def _ocr(self, item, engine):
+        disk_key, crops = item
+        result = recognize_crops(crops, engine, self.combine_sub_stats, self.min_confidence)
+        if self.raw_tap:
+            self.raw_tap.write(disk_key, result)
+        return disk_key, result
+
+    def _parse(self, item, _):
+        disk_key, result = item
+        parsed = parse_disk_text(result["main_stat"], result["sub_stats"])
+        if self.parsed_tap:
+            self.parsed_tap.write(disk_key, parsed)
+        return disk_key, parsed
+
+    def _score(self, item, _):
+        disk_key, parsed = item
+        disk = to_disk(disk_key, parsed)
+        # A misread stat is stored but not ranked: a main stat name the parser does not know has no level,
+        # a sub stat name has no weight
+        if disk.main_stat.level is None:
+            print(f"Cannot score disk {disk_key}, unknown main stat {disk.main_stat.name!r}.")
+            return disk.to_dict()
+        try:
+            evaluation = evaluate_disk(disk)
+        except KeyError as e:
+            print(f"Cannot score disk {disk_key}, unknown stat {e}.")
+        else:
+            with self._ranking_lock:
+                self._evaluations[disk_key] = evaluation
+        return disk.to_dict()
+
+    def _store(self, disk, batch: _Batch):
+        batch.append(disk)
+        if len(batch) >= self.batch_size:
+            self._flush(batch)
+
+    def _flush(self, batch: _Batch) -> None:
+        if not batch:
+            return
+        try:
+            self.database.create_sub_stats_batch(self.database.create_disks_and_get_ids(list(batch)))
+            self.stored += len(batch)
+            print(f"Stored {len(batch)} disks ({self.stored} in total).")
+        except Exception as e:
+            print(f"Error storing {len(batch)} disks: {e}")
+        batch.clear()
+
+    def ranking(self, top: Optional[int] = None) -> List[dict]:
+        """Evaluations of the disks processed so far, best first. Safe to call while the pipeline runs."""
+        with self._ranking_lock:
+            evaluations = list(self._evaluations.values())
+        if top is None:
+            return sorted(evaluations, key=itemgetter("Total Score"), reverse=True)
+        # Same order as the full sort, in O(n log top)
+        return heapq.nlargest(top, evaluations, key=itemgetter("Total Score"))
+
+    def start(self) -> None:
+        for stage in self.stages:
+            stage.start()
+
+    def join(self) -> None:
+        """Wait until every disk went through all stages, then close the taps and print the statistics."""
+        for stage in self.stages:
+            stage.join()
+        for tap in (self.raw_tap, self.parsed_tap):
+            if tap:
+                tap.close()
+
+        print(f"Pipeline finished: {self.stored} disks stored, {self.duplicates} duplicates skipped.")
+        for stage in self.stages:
+            print(f"  {stage.name:<6} {stage.workers} workers, {stage.processed} disks, {stage.busy_time:.2f}s busy")
+
+    def run_scan(self, scanner, archive: bool = True) -> None:
+        """Scan the screen and push every disk into the pipeline as soon as it is captured."""
+        self.start()
+        # The scanner queues (disk_index, disk_key, crops), the stages only need the key and the crops
+        scan_queue = _KeyedQueue(self.input)
+        scanner.capture_and_save_disk_images(scan_queue, archive=archive)
+        self.join()
+
+    def run_folders(self, base_dir: str) -> None:
+        """Push the disks of saved capture folders or archives through the pipeline."""
+        jobs = collect_disk_jobs(get_image_folders(base_dir))
+        print(f"Ingesting {len(jobs)} disks from {base_dir}...")
+        self.start()
+        try:
+            for job in jobs:
+                self.input.put((job.key, load_crops(job)))
+        finally:
+            self.input.put(None)
+        self.join()
+
+    def display_ranking(self, top: int = 20) -> None:
+        """Print the best disks processed so far."""
+        print(f"{'Rank':<5} {'Disk ID':<24} {'Main Score':<12} {'Current Score':<15} {'Potential Score':<18} "
+              f"{'Total Score':<12}")
+        print("=" * 89)
+        for rank, evaluation in enumerate(self.ranking(top), start=1):
+            print(f"{rank:<5} {evaluation['Disk ID']:<24} {evaluation['Main Stat Score']:<12.2f} "
+                  f"{evaluation['Current Substat Score']:<15.2f} {evaluation['Potential Substat Score']:<18.2f} "
+                  f"{evaluation['Total Score']:<12.2f}")
+
+
+class _KeyedQueue:
+    """Adapts the scanner's `(disk_index, disk_key, crops)` items to the `(disk_key, crops)` items of the pipeline."""
+
+    def __init__(self, queue: Queue):
+        self.queue = queue
+
+    def put(self, item) -> None:
+        self.queue.put(None if item is None else item[1:])
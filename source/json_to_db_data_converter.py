@@ -1,8 +1,8 @@
 import json
 import os
-from disk import Stat, Disk
-from pocketbase_database import PocketBaseDatabase
-from constants import DATABASE_URL
+from source.disk import Stat, Disk
+from source.constants import DATABASE_URL
+from source.jsonl_stream import is_jsonl, read_jsonl
 
 
 def batch_upload_all_disks(disks, number_of_disks, database):
@@ -30,49 +30,77 @@ def batch_upload_fist_n_disks(disks, number_of_disks, database):
     print(f"Uploaded batch of size {number_of_disks} successfully.")
 
 
+def batch_upload_stream(disks, number_of_disks, database):
+    """Upload disks from an iterable in batches as they arrive, holding only one batch in memory."""
+    batch, batch_number = [], 0
+    for disk in disks:
+        batch.append(disk)
+        if len(batch) == number_of_disks:
+            batch_number += 1
+            database.create_sub_stats_batch(database.create_disks_and_get_ids(batch))
+            print(f"Uploaded batch {batch_number} successfully.")
+            batch = []
+    if batch:
+        database.create_sub_stats_batch(database.create_disks_and_get_ids(batch))
+        print(f"Uploaded batch {batch_number + 1} successfully.")
+
+
+def to_disk(disk_id, disk_data):
+    """Build a Disk from parsed disk data, raises KeyError if a stat misses a field."""
+    main_stat_data = disk_data.get("main_stat")
+    if not main_stat_data:
+        # print(f"Disk {disk_id} is missing 'main_stat' data. Using default value.")
+        main_stat = Stat(
+            name="HP",
+            value=550.0,
+            level=1
+        )
+    else:
+        main_stat = Stat(
+            name=main_stat_data["name"],
+            value=main_stat_data["value"],
+            level=main_stat_data["level"]
+        )
+
+    sub_stats = [Stat(**sub_stat) for sub_stat in disk_data.get("sub_stats", [])]
+    return Disk(id=disk_id, main_stat=main_stat, sub_stats=sub_stats)
+
+
+def convert_disk_records(raw_disks):
+    """Convert (disk id, parsed disk data) pairs to database disk dictionaries, one at a time."""
+    for disk_id, disk_data in raw_disks:
+        try:
+            disk = to_disk(disk_id, disk_data)
+        except KeyError as e:
+            print(f"Missing key {e} in 'main_stat' or 'sub_stats' for disk {disk_id}. Skipping this entry.")
+            continue
+        yield disk.to_dict()
+
+
 def convert_json_to_db(json_file, batch_size, database):
-    """Migrate data from JSON to SQLite database."""
+    """Migrate data from JSON to SQLite database.
+
+    Every disk of the file is uploaded, `batch_size` disks per batch. A `.jsonl` file is streamed:
+    disks are read, converted and uploaded one batch at a time.
+    """
     if not os.path.exists(json_file):
         print(f"File {json_file} does not exist.")
         return
 
-    with open(json_file, "r") as file:
-        raw_disks = json.load(file)
-
-    disks = []
-
-    for disk_id, disk_data in raw_disks.items():
-        main_stat_data = disk_data.get("main_stat")
-        if not main_stat_data:
-            # print(f"Disk {disk_id} is missing 'main_stat' data. Using default value.")
-            main_stat = Stat(
-                name="HP",
-                value=550.0,
-                level=1
-            )
-        else:
-            main_stat = Stat(
-                name=main_stat_data["name"],
-                value=main_stat_data["value"],
-                level=main_stat_data["level"]
-            )
+    if is_jsonl(json_file):
+        raw_disks = read_jsonl(json_file)
+    else:
+        with open(json_file, "r") as file:
+            raw_disks = json.load(file).items()
 
-        try:
-            sub_stats = [Stat(**sub_stat) for sub_stat in disk_data.get("sub_stats", [])]
-            disk = Disk(id=disk_id, main_stat=main_stat, sub_stats=sub_stats)
-
-            # Add the disk to the list for batch upload
-            disks.append(disk.to_dict())
-        except KeyError as e:
-            print(f"Missing key {e} in 'main_stat' or 'sub_stats' for disk {disk_id}. Skipping this entry.")
-
-    # Batch upload the disks
-    batch_upload_fist_n_disks(disks, 5, database)
-    # batch_upload_all_disks(disks, batch_size, database)
+    # Convert and upload the disks one batch at a time
+    batch_upload_stream(convert_disk_records(raw_disks), batch_size, database)
 
     print("Migration complete!")
 
 
 if __name__ == "__main__":
+    from source.pocketbase_database import PocketBaseDatabase
+
     db = PocketBaseDatabase(DATABASE_URL)
     convert_json_to_db("../output/disk_data.json", 3000, db)
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+from typing import Iterable, Iterator, Tuple
+
+# One disk record per line: {"key": <disk key>, "value": <disk data>}
+
+
+def is_jsonl(path: str) -> bool:
+    """Whether a data file uses the one-record-per-line format, chosen by its extension."""
+    return path.endswith(".jsonl")
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[str, dict]]:
+    """Yield (disk key, disk data) from a JSONL file, one line at a time."""
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield record["key"], record["value"]
+
+
+def read_records(path: str) -> Iterator[Tuple[str, dict]]:
+    """Yield (disk key, disk data) from a JSONL file, or from a JSON object file loaded at once."""
+    if is_jsonl(path):
+        yield from read_jsonl(path)
+        return
+    with open(path, 'r', encoding='utf-8') as file:
+        yield from json.load(file).items()
+
+
+def write_jsonl(items: Iterable[Tuple[str, dict]], path: str) -> int:
+    """Write (disk key, disk data) pairs as they come, one line each, and return the number written.
+
+    Readers open the file once it is complete, `read_jsonl` stops at its end.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    count = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        for key, value in items:
+            file.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+class JsonlWriter:
+    """Append (disk key, disk data) records to a JSONL file from several threads as they are produced.
+
+    Every record is flushed, so after a crash the file holds all records written before it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, key: str, value: dict) -> None:
+        line = json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
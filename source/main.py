@@ -1,8 +1,15 @@
-from source.disk_related.disk_database import DiskDatabase
-from source.disk_manager import DiskManager
+import os
+import threading
+from queue import Queue
+
+from source.constants import STREAM_QUEUE_SIZE, REOCR_MIN_CONFIDENCE, PIPELINE_BATCH_SIZE
+from source.disk_related.disk_manager_old import DiskManager
+from source.ingest_pipeline import IngestPipeline
 from source.json_to_db_data_converter import convert_json_to_db
 from source.ocr_data_parser import OCRDataParser
 from source.ocr_image_processor import OCRImageProcessor
+from source.screen_scanner import ScreenScanner
+from source.storage import create_database
 
 suffix = ""  # "_test"
 
@@ -10,6 +17,10 @@ images_path = "../images" + suffix
 raw_json_path = "../output/raw_data" + suffix + ".json"
 disk_json_path = "../output/disk_data" + suffix + ".json"
 database_path = "../db/disk_database" + suffix + ".db"
+ocr_cache_path = "../output/ocr_cache.db"
+ocr_manifest_path = "../output/ocr_manifest" + suffix + ".jsonl"
+raw_tap_path = "../output/raw_data" + suffix + ".jsonl"
+disk_tap_path = "../output/disk_data" + suffix + ".jsonl"
 
 
 def main():
@@ -25,32 +36,70 @@ def main():
     #         break
 
     # Process all images with OCR and dump the raw data into a JSON file
-    image_processor = OCRImageProcessor()
-    image_processor.process_images(images_path, raw_json_path)
+    image_processor = OCRImageProcessor(workers=os.cpu_count() or 1, cache_path=ocr_cache_path,
+                                        min_confidence=REOCR_MIN_CONFIDENCE)
+    image_processor.process_images_incremental(images_path, raw_json_path, ocr_manifest_path)
 
     # Load the raw data from the JSON file and beautify it
     OCRDataParser.load_and_parse_ocr_file(raw_json_path, disk_json_path)
 
     # Convert the JSON data to the database
-    convert_json_to_db(disk_json_path, database_path)
+    convert_json_to_db(disk_json_path, PIPELINE_BATCH_SIZE, create_database("sqlite", path=database_path))
 
     # Evaluate the disks in the database
     evaluate_disks(database_path)
 
 
+def scan_and_process_images(archive=True):
+    """Scan the screen and OCR every disk while the scanner moves on to the next cell."""
+    crop_queue = Queue(maxsize=STREAM_QUEUE_SIZE)
+    image_processor = OCRImageProcessor(cache_path=ocr_cache_path)
+    ocr_thread = threading.Thread(target=image_processor.process_stream, args=(crop_queue, raw_json_path))
+    ocr_thread.start()
+
+    screen_scanner = ScreenScanner(images_path)
+    screen_scanner.capture_and_save_disk_images(crop_queue, archive=archive)
+    screen_scanner.close()
+    ocr_thread.join()
+
+
+def create_pipeline(taps=True):
+    """OCR, parse, score and store every disk as soon as it is captured. The JSONL taps are optional."""
+    return IngestPipeline(create_database(path=database_path), cache_path=ocr_cache_path,
+                          min_confidence=REOCR_MIN_CONFIDENCE,
+                          raw_tap=raw_tap_path if taps else None,
+                          parsed_tap=disk_tap_path if taps else None)
+
+
+def ingest_images():
+    """Single pass over the saved captures: disks are stored and ranked while the rest is still read."""
+    pipeline = create_pipeline()
+    pipeline.run_folders(images_path)
+    pipeline.display_ranking()
+
+
+def scan_and_ingest(archive=True):
+    """Scan the screen and push every disk through OCR, parsing, scoring and storage while scanning goes on."""
+    pipeline = create_pipeline()
+    screen_scanner = ScreenScanner(images_path)
+    pipeline.run_scan(screen_scanner, archive=archive)
+    screen_scanner.close()
+    pipeline.display_ranking()
+
+
 def evaluate_disks(db_path):
-    # Initialize DiskDatabase (assumes implementation exists)
-    db = DiskDatabase(db_path)
+    # Rank from the local SQLite database
+    db = create_database("sqlite", path=db_path)
     disk_manager = DiskManager(db)
 
     # Example: Add, rank, and display disks
-    ranked_disks = disk_manager.rank_disks()
+    ranked_disks = disk_manager.rank_disks(top=20)
     disk_manager.display_ranking(ranked_disks)
 
 
 def do():
     OCRDataParser.load_and_parse_ocr_file(raw_json_path, disk_json_path)
-    convert_json_to_db(disk_json_path, database_path)
+    convert_json_to_db(disk_json_path, PIPELINE_BATCH_SIZE, create_database("sqlite", path=database_path))
     evaluate_disks(database_path)
 
 
@@ -0,0 +1,233 @@
+import json
+import os
+import time
+import tracemalloc
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from source.constants import OCR_ENGINE, GRAY_THRESHOLD, MAIN_STAT_CONFIG, SUB_STAT_BLOCK_CONFIG, \
+    REOCR_MIN_CONFIDENCE
+from source.ocr_data_parser import OCRDataParser
+from source.ocr_engines import create_engine
+from source.stat_resolver import edit_distance
+from source.image_source import read_image, close_archives
+from source.ocr_image_processor import binarize, collect_disk_jobs, get_image_folders, grayscale, recognize_line, \
+    parse_sub_stat_block, recognize_checked
+
+STAGES = ("decode", "threshold", "recognize")
+
+
+class BenchmarkSetting(NamedTuple):
+    """One OCR configuration to benchmark: backend and preprocessing settings."""
+    name: str
+    engine: str = OCR_ENGINE
+    threshold: int = GRAY_THRESHOLD
+    line_config: str = MAIN_STAT_CONFIG
+    block_config: str = SUB_STAT_BLOCK_CONFIG
+    min_confidence: Optional[float] = None  # Re-OCR doubtful crops, see `recognize_checked`
+
+
+def _stage_summary(durations: List[float]) -> dict:
+    durations = np.array(durations or [0.0]) * 1000
+    return {
+        "mean_ms": round(float(durations.mean()), 3),
+        "p50_ms": round(float(np.percentile(durations, 50)), 3),
+        "p95_ms": round(float(np.percentile(durations, 95)), 3),
+        "total_s": round(float(durations.sum()) / 1000, 3),
+    }
+
+
+def _fields(disk: Optional[dict]) -> Dict[str, object]:
+    """Flatten parsed disk data into the fields compared for field-level accuracy."""
+    if not disk or not disk.get("main_stat"):
+        return {}
+    fields = {"main_stat.name": disk["main_stat"]["name"], "main_stat.value": disk["main_stat"]["value"]}
+    for i, sub_stat in enumerate(disk["sub_stats"]):
+        fields[f"sub_stats.{i}.name"] = sub_stat["name"]
+        fields[f"sub_stats.{i}.level"] = sub_stat["level"]
+    return fields
+
+
+def score_accuracy(ocr_data: dict, raw_truth: dict, parsed_truth: Optional[dict]) -> dict:
+    """Compare OCR output with known-good raw and parsed data.
+
+    Character accuracy is 1 - edit distance / characters over all lines, line accuracy the share
+    of lines recognized exactly, and field accuracy the share of parsed stat names, values and
+    levels that match the known-good disk data.
+    """
+    errors = characters = exact_lines = lines = 0
+    matched_fields = fields = 0
+
+    for key, truth in raw_truth.items():
+        if key not in ocr_data or "alias_of" in truth:
+            continue
+        result = ocr_data[key]
+
+        truth_lines = [truth["main_stat"]] + truth["sub_stats"]
+        result_lines = [result["main_stat"]] + result["sub_stats"]
+        result_lines += [""] * (len(truth_lines) - len(result_lines))
+        for truth_line, result_line in zip(truth_lines, result_lines):
+            errors += edit_distance(result_line, truth_line)
+            characters += len(truth_line)
+            exact_lines += result_line == truth_line
+            lines += 1
+
+        if parsed_truth is None or key not in parsed_truth:
+            continue
+        try:
+            parsed = OCRDataParser.parse_disk_text(result["main_stat"], result["sub_stats"])
+        except (ValueError, IndexError, AttributeError, TypeError):
+            # Garbage the parser cannot handle counts as every field wrong
+            parsed = None
+        truth_fields, result_fields = _fields(parsed_truth[key]), _fields(parsed)
+        matched_fields += sum(result_fields.get(name) == value for name, value in truth_fields.items())
+        fields += len(truth_fields)
+
+    return {
+        "lines_compared": lines,
+        "character_accuracy": round(max(0.0, 1 - errors / characters), 4) if characters else None,
+        "line_accuracy": round(exact_lines / lines, 4) if lines else None,
+        "field_accuracy": round(matched_fields / fields, 4) if fields else None,
+    }
+
+
+class OCRBenchmark:
+    def __init__(self, source: str, raw_truth_file: Optional[str] = None, parsed_truth_file: Optional[str] = None,
+                 key_prefix: Optional[str] = None):
+        """Benchmark the OCR stage on archived or extracted captures.
+
+        Args:
+            source (str): Capture folders or zip archives, anything `OCRImageProcessor.process_images` accepts.
+            raw_truth_file (str): Known-good raw OCR output of these captures, e.g. `output/raw_data.json`.
+            parsed_truth_file (str): Known-good parsed disk data, e.g. `output/disk_data.json`.
+            key_prefix (str): Folder name the captures were saved under in the known-good data, when
+                it differs from the folder name in `source` (`images.bak` holds `images_1`).
+        """
+        self.source = source
+        self.key_prefix = key_prefix
+        self.raw_truth = self._load_json(raw_truth_file)
+        self.parsed_truth = self._load_json(parsed_truth_file)
+
+        self.jobs = collect_disk_jobs(get_image_folders(source))
+
+    @staticmethod
+    def _load_json(path: Optional[str]) -> Optional[dict]:
+        if not path:
+            return None
+        if not os.path.exists(path):
+            print(f"File {path} does not exist, skipping it for the accuracy scores.")
+            return None
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def _truth_key(self, key: str) -> str:
+        if not self.key_prefix:
+            return key
+        return f"{self.key_prefix}_disk_{key.rsplit('_disk_', 1)[1]}"
+
+    @staticmethod
+    def _recognize_crop(source, engine, setting: BenchmarkSetting, timings: dict, block: bool = False):
+        start = time.perf_counter()
+        image = read_image(source)
+        decoded = time.perf_counter()
+        config = setting.block_config if block else setting.line_config
+        if setting.min_confidence is None:
+            binary = binarize(image, setting.threshold)
+            thresholded = time.perf_counter()
+            if block:
+                text = parse_sub_stat_block(binary, engine, config)
+            else:
+                text = recognize_line(binary, engine, config)
+        else:
+            # Re-OCR binarizes again on demand, so only the first binarization counts as thresholding
+            gray = grayscale(image)
+            thresholded = time.perf_counter()
+            lines = recognize_checked(gray, engine, config, setting.min_confidence, setting.threshold)
+            text = lines if block else " ".join(lines)
+        recognized = time.perf_counter()
+
+        timings["decode"].append(decoded - start)
+        timings["threshold"].append(thresholded - decoded)
+        timings["recognize"].append(recognized - thresholded)
+        return text
+
+    def run_setting(self, setting: BenchmarkSetting) -> dict:
+        """OCR every capture serially with one setting and report speed, memory and accuracy."""
+        engine = create_engine(setting.engine)
+        timings = {stage: [] for stage in STAGES}
+        ocr_data = {}
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            for job in self.jobs:
+                main_stat = self._recognize_crop(job.main_stat_path, engine, setting, timings)
+                if job.sub_stat_block_path:
+                    sub_stats = self._recognize_crop(job.sub_stat_block_path, engine, setting, timings, block=True)
+                else:
+                    sub_stats = [self._recognize_crop(path, engine, setting, timings) for path in job.sub_stat_paths]
+                ocr_data[self._truth_key(job.key)] = {"main_stat": main_stat, "sub_stats": sub_stats}
+        finally:
+            elapsed = time.perf_counter() - start
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            engine.close()
+
+        crops = len(timings["recognize"])
+        report = {
+            **setting._asdict(),
+            "engine_used": engine.name,
+            "disks": len(self.jobs),
+            "crops": crops,
+            "total_s": round(elapsed, 3),
+            "crops_per_second": round(crops / elapsed, 2) if elapsed else None,
+            "stages": {stage: _stage_summary(timings[stage]) for stage in STAGES},
+            "peak_memory_mb": round(peak_memory / 2 ** 20, 2),
+        }
+        if self.raw_truth is not None:
+            report["accuracy"] = score_accuracy(ocr_data, self.raw_truth, self.parsed_truth)
+        return report
+
+    def run(self, settings: List[BenchmarkSetting], report_file: Optional[str] = None) -> dict:
+        """Benchmark every setting on the same captures and optionally save a JSON report.
+
+        Args:
+            settings (list): Settings to compare side by side.
+            report_file (str): Path of the JSON report, None to only return it.
+
+        Returns:
+            dict: The report, one entry per setting.
+        """
+        print(f"Benchmarking {len(settings)} settings on {len(self.jobs)} disks from {self.source}...")
+        results = []
+        for setting in settings:
+            result = self.run_setting(setting)
+            results.append(result)
+            accuracy = result.get("accuracy", {})
+            print(f"  {setting.name}: {result['crops_per_second']} crops/s, "
+                  f"recognize p50 {result['stages']['recognize']['p50_ms']} ms, "
+                  f"character accuracy {accuracy.get('character_accuracy')}, "
+                  f"field accuracy {accuracy.get('field_accuracy')}")
+        close_archives()
+
+        report = {"source": os.path.abspath(self.source), "settings": results}
+        if report_file:
+            os.makedirs(os.path.dirname(os.path.abspath(report_file)), exist_ok=True)
+            with open(report_file, 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=4, ensure_ascii=False)
+            print(f"Benchmark report saved to {report_file}.")
+        return report
+
+
+if __name__ == "__main__":
+    benchmark = OCRBenchmark("../images.bak", "../output/raw_data.json", "../output/disk_data.json",
+                             key_prefix="images_1")
+    benchmark.run([
+        BenchmarkSetting("pytesseract", engine="pytesseract"),
+        BenchmarkSetting("tesserocr", engine="tesserocr"),
+        BenchmarkSetting("template", engine="template"),
+        BenchmarkSetting("tesserocr, threshold 100", engine="tesserocr", threshold=100),
+        BenchmarkSetting("tesserocr, threshold 140", engine="tesserocr", threshold=140),
+        BenchmarkSetting("tesserocr, re-OCR", engine="tesserocr", min_confidence=REOCR_MIN_CONFIDENCE),
+    ], "../output/ocr_benchmark.json")
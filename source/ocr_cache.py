@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from source.constants import OCR_CACHE_MAX_ENTRIES
+from source.ocr_engines import OCREngine, OCRWord
+
+
+class OCRCache:
+    """Persistent cache of OCR results keyed by the pixels of the preprocessed crop.
+
+    The key is a hash of the binary image, the Tesseract config and the engine name, so any
+    change to the capture, the preprocessing or the OCR settings results in a cache miss.
+    The least recently used entries are evicted once the cache holds more than `max_entries`.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = OCR_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+
+        # Pool workers share the file, so wait on locks instead of failing
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_results (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_ocr_results_last_used ON ocr_results (last_used)")
+        self.connection.commit()
+        self._size = self._count()
+
+    @staticmethod
+    def make_key(binary, config: str, engine_name: str) -> str:
+        """Hash the crop pixels together with everything that influences the OCR result."""
+        digest = hashlib.sha1()
+        digest.update(f"{engine_name}|{config}|{binary.shape}|{binary.dtype}|".encode("utf-8"))
+        digest.update(binary.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for a key, or None on a miss."""
+        row = self.connection.execute("SELECT text FROM ocr_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.connection:
+            self.connection.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        """Store an OCR result and evict the oldest entries if the cache grew too large."""
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, text, last_used) VALUES (?, ?, ?)",
+                (key, text, time.time())
+            )
+            self._size += cursor.rowcount
+            # The size is only an estimate when several processes share the file, recount before evicting
+            if self._size > self.max_entries:
+                self._size = self._count()
+                self._evict()
+
+    def _count(self) -> int:
+        (size,) = self.connection.execute("SELECT COUNT(*) FROM ocr_results").fetchone()
+        return size
+
+    def _evict(self) -> None:
+        if self._size <= self.max_entries:
+            return
+
+        # Evict down to 90% of the limit so the next inserts do not evict again immediately
+        excess = self._size - int(self.max_entries * 0.9)
+        self.connection.execute("""
+            DELETE FROM ocr_results WHERE key IN (
+                SELECT key FROM ocr_results ORDER BY last_used ASC LIMIT ?
+            )
+        """, (excess,))
+        self._size -= excess
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this cache instance and the number of stored entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": self._count()}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+
+class CachedEngine(OCREngine):
+    """Wraps an OCR engine so results are looked up in an `OCRCache` before recognizing."""
+
+    def __init__(self, engine: OCREngine, cache: OCRCache):
+        self.engine = engine
+        self.cache = cache
+        self.name = engine.name
+
+    def recognize(self, binary, config: str) -> str:
+        key = self.cache.make_key(binary, config, self.engine.name)
+        text = self.cache.get(key)
+        if text is None:
+            text = self.engine.recognize(binary, config)
+            self.cache.put(key, text)
+        return text
+
+    def recognize_words(self, binary, config: str) -> List[OCRWord]:
+        # Word boxes are stored as JSON under their own key, next to the plain text results
+        key = self.cache.make_key(binary, "words|" + config, self.engine.name)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return [OCRWord(*word) for word in json.loads(cached)]
+        words = self.engine.recognize_words(binary, config)
+        self.cache.put(key, json.dumps(words))
+        return words
+
+    def close(self) -> None:
+        self.engine.close()
+        self.cache.close()
@@ -0,0 +1,220 @@
+import threading
+from typing import List, NamedTuple
+
+from pytesseract import pytesseract
+
+from source.constants import TESSERACT_PATH, TESSDATA_PATH, OCR_ENGINE, TEMPLATE_BANK_PATH, TEMPLATE_MIN_SCORE, \
+    TEMPLATE_MAX_SPLITS
+
+
+class OCRWord(NamedTuple):
+    """A recognized word with its bounding box and Tesseract confidence (0-100)."""
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+    confidence: float
+
+
+class OCREngine:
+    """Interface for the OCR backends used by the image processor."""
+    name = "base"
+
+    def recognize(self, binary, config: str) -> str:
+        """Recognize the text in a preprocessed (binary) image."""
+        raise NotImplementedError
+
+    def recognize_words(self, binary, config: str) -> List[OCRWord]:
+        """Recognize the words in a preprocessed (binary) image, with their positions."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the engine."""
+
+
+class PytesseractEngine(OCREngine):
+    """Runs one `tesseract` process per call. Slow, but needs nothing beyond pytesseract."""
+    name = "pytesseract"
+
+    def __init__(self):
+        pytesseract.tesseract_cmd = TESSERACT_PATH
+
+    def recognize(self, binary, config: str) -> str:
+        return pytesseract.image_to_string(binary, config=config)
+
+    def recognize_words(self, binary, config: str) -> List[OCRWord]:
+        data = pytesseract.image_to_data(binary, config=config, output_type=pytesseract.Output.DICT)
+        return [
+            OCRWord(text.strip(), left, top, width, height, float(confidence))
+            for text, left, top, width, height, confidence in zip(
+                data["text"], data["left"], data["top"], data["width"], data["height"], data["conf"])
+            if text.strip()
+        ]
+
+
+def _parse_config(config: str):
+    """Split a Tesseract command line config into a page segmentation mode and variables."""
+    psm, variables = None, {}
+    parts = config.split()
+    for i, part in enumerate(parts):
+        if part == "--psm" and i + 1 < len(parts):
+            psm = int(parts[i + 1])
+        elif part == "-c" and i + 1 < len(parts) and "=" in parts[i + 1]:
+            key, value = parts[i + 1].split("=", 1)
+            variables[key] = value
+    return psm, variables
+
+
+class TesserocrEngine(OCREngine):
+    """Keeps a Tesseract model loaded in-process through the tesserocr bindings.
+
+    The language data is loaded once, so every call only pays for recognition.
+    Calls are serialized with a lock because a Tesseract API handle is not thread safe.
+    """
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path: str = TESSDATA_PATH, lang: str = "eng"):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._api = tesserocr.PyTessBaseAPI(path=tessdata_path, lang=lang)
+        self._lock = threading.Lock()
+        self._config = None
+
+    def _apply_config(self, config: str) -> None:
+        if config == self._config:
+            return
+        psm, variables = _parse_config(config)
+        if psm is not None:
+            self._api.SetPageSegMode(psm)
+        for key, value in variables.items():
+            self._api.SetVariable(key, value)
+        self._config = config
+
+    def _set_image(self, binary, config: str) -> None:
+        height, width = binary.shape[:2]
+        channels = 1 if binary.ndim == 2 else binary.shape[2]
+        self._apply_config(config)
+        self._api.SetImageBytes(binary.tobytes(), width, height, channels, width * channels)
+
+    def recognize(self, binary, config: str) -> str:
+        with self._lock:
+            self._set_image(binary, config)
+            return self._api.GetUTF8Text()
+
+    def recognize_words(self, binary, config: str) -> List[OCRWord]:
+        level = self._tesserocr.RIL.WORD
+        words = []
+        with self._lock:
+            self._set_image(binary, config)
+            self._api.Recognize()
+            for result in self._tesserocr.iterate_level(self._api.GetIterator(), level):
+                text = (result.GetUTF8Text(level) or "").strip()
+                if not text:
+                    continue
+                left, top, right, bottom = result.BoundingBox(level)
+                words.append(OCRWord(text, left, top, right - left, bottom - top, result.Confidence(level)))
+        return words
+
+    def close(self) -> None:
+        self._api.End()
+
+
+class TemplateEngine(OCREngine):
+    """Recognizes the game's fixed font by correlating glyphs with a template bank.
+
+    Lines are segmented into glyphs and all glyphs of a line are matched with a single matrix
+    product. When a glyph matches no template well enough, for example because two glyphs touch,
+    the whole crop is handed to the fallback engine.
+    """
+    name = "template"
+
+    def __init__(self, bank_path: str = TEMPLATE_BANK_PATH, fallback: OCREngine = None,
+                 min_score: float = TEMPLATE_MIN_SCORE):
+        from source import template_bank
+
+        self._template_bank = template_bank
+        self.bank = template_bank.TemplateBank.load(bank_path)
+        self.fallback = fallback
+        self.min_score = min_score
+        self.fallback_calls = 0
+
+    def _match_glyphs(self, line, glyphs, depth: int = 0):
+        """Match glyphs, splitting spans that match badly because several glyphs touch."""
+        bank = self._template_bank
+        labels, scores = self.bank.match(bank.glyph_vectors(line, glyphs))
+
+        matched = []
+        for glyph, label, score in zip(glyphs, labels, scores):
+            if score >= self.min_score:
+                matched.append((glyph, label))
+                continue
+
+            parts = bank.split_glyph(line, glyph) if depth < TEMPLATE_MAX_SPLITS else None
+            sub_matches = self._match_glyphs(line, parts, depth + 1) if parts else None
+            if sub_matches is None:
+                return None
+            matched.extend(sub_matches)
+        return matched
+
+    def _recognize_line(self, line) -> str:
+        glyphs = self._template_bank.segment_glyphs(line)
+        if not glyphs:
+            return ""
+
+        matched = self._match_glyphs(line, glyphs)
+        if matched is None:
+            return None
+
+        spaces = self._template_bank.space_positions([glyph for glyph, _ in matched], line.shape[0])
+        return "".join((" " if space else "") + label for space, (_, label) in zip(spaces, matched))
+
+    def recognize(self, binary, config: str) -> str:
+        lines = []
+        for top, bottom in self._template_bank.split_lines(binary):
+            text = self._recognize_line(binary[top:bottom])
+            if text is None:
+                if self.fallback is None:
+                    return ""
+                self.fallback_calls += 1
+                return self.fallback.recognize(binary, config)
+            lines.append(text)
+        return "\n".join(lines)
+
+    def recognize_words(self, binary, config: str) -> List[OCRWord]:
+        # Glyph positions are only known per line, word boxes come from the fallback engine
+        return self.fallback.recognize_words(binary, config) if self.fallback else []
+
+    def close(self) -> None:
+        if self.fallback:
+            self.fallback.close()
+
+
+def _create_template_engine() -> TemplateEngine:
+    try:
+        fallback = TesserocrEngine()
+    except (ImportError, RuntimeError, OSError):
+        fallback = PytesseractEngine()
+    return TemplateEngine(fallback=fallback)
+
+
+ENGINES = {
+    PytesseractEngine.name: PytesseractEngine,
+    TesserocrEngine.name: TesserocrEngine,
+    TemplateEngine.name: _create_template_engine,
+}
+
+
+def create_engine(name: str = OCR_ENGINE) -> OCREngine:
+    """Create the requested OCR engine, falling back to pytesseract when it is unavailable."""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine '{name}'. Available engines: {', '.join(ENGINES)}")
+
+    try:
+        return ENGINES[name]()
+    except (ImportError, RuntimeError, OSError) as e:
+        if name == PytesseractEngine.name:
+            raise
+        print(f"OCR engine '{name}' is unavailable ({e}), falling back to pytesseract.")
+        return PytesseractEngine()
@@ -1,45 +1,502 @@
+import bisect
+import itertools
 import os
 import json
+import posixpath
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from queue import Queue
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
 import cv2
-from pytesseract import pytesseract
+import numpy as np
 
-from source.constants import TESSERACT_PATH, GRAY_THRESHOLD, MAX_GRAY_VALUE, MAIN_STAT_CONFIG
+from source.constants import GRAY_THRESHOLD, MAX_GRAY_VALUE, MAIN_STAT_CONFIG, OCR_ENGINE, SUB_STAT_BLOCK_CONFIG, \
+    OCR_STREAM_THREADS, MOSAIC_CONFIG, MOSAIC_PADDING, REOCR_UPSCALE, ADAPTIVE_BLOCK_SIZE, ADAPTIVE_OFFSET
+from source.disk_dedup import DedupIndex, disk_hashes, hashes_from_hex, hashes_to_hex
+from source.jsonl_stream import is_jsonl, write_jsonl
+from source.image_source import ImageSource, ZipMember, close_archives, is_archive, list_archive, read_image
+from source.ocr_cache import OCRCache, CachedEngine
+from source.ocr_engines import OCREngine, OCRWord, create_engine
+from source.ocr_manifest import OCRManifest, file_signature, save_json_stream
 
+# Engine used by pool workers, created once per process in _init_worker
+_worker_engine = None
 
-def preprocess_image(image_path: str):
-    """Preprocess the captured image for OCR."""
-    image = cv2.imread(image_path)
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    _, binary = cv2.threshold(gray, GRAY_THRESHOLD, MAX_GRAY_VALUE, cv2.THRESH_BINARY)
+
+# Lines a stat crop may legitimately read as, anything else is an OCR mistake
+_STAT_NAMES = r"(ATK|HP|DEF|PEN|PEN Ratio|Impact|Energy Regen|CRIT Rate|CRIT DMG|Anomaly Proficiency|" \
+              r"Anomaly Mastery|(Physical|Fire|Ice|Electric|Ether) DMG Bonus)"
+STAT_LINE_PATTERN = re.compile(rf"^{_STAT_NAMES}( \+\d)? \d+(\.\d+)?%?$")
+_OTHER_LINES = {"", "Set Effect"}
+
+
+def grayscale(image):
+    """Convert a captured BGR or BGRA crop to grayscale, grayscale images are returned as is."""
+    if image.ndim == 2:
+        return image
+    color_conversion = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(image, color_conversion)
+
+
+def binarize(image, threshold: int = GRAY_THRESHOLD):
+    """Convert a captured BGR or BGRA crop to the binary image used for OCR."""
+    _, binary = cv2.threshold(grayscale(image), threshold, MAX_GRAY_VALUE, cv2.THRESH_BINARY)
     return binary
 
 
-def parse_main_stat(image_path: str) -> str:
-    """Parse main stat from image using OCR."""
-    binary = preprocess_image(image_path)
-    result = pytesseract.image_to_string(binary, config=MAIN_STAT_CONFIG)
+def preprocess_image(image_path: ImageSource):
+    """Preprocess the captured image for OCR."""
+    image = read_image(image_path, cv2.IMREAD_UNCHANGED)
+    if image.ndim == 2:
+        # Single channel captures were binarized by the scanner already, see `ScreenScanner.binarize_crops`
+        return image
+    return binarize(image)
+
+
+def load_grayscale(image_path: ImageSource):
+    """Load a captured image as grayscale, for crops that may have to be binarized more than once."""
+    return grayscale(read_image(image_path, cv2.IMREAD_UNCHANGED))
+
+
+def recognize_line(binary, engine: OCREngine, config: str = MAIN_STAT_CONFIG) -> str:
+    """Recognize a single line stat crop."""
+    result = engine.recognize(binary, config)
     return result.strip()  # Strip any trailing spaces or newlines
 
 
-class OCRImageProcessor:
-    def __init__(self):
-        """Initialize OCRImageProcessor with Tesseract path configuration."""
-        pytesseract.tesseract_cmd = TESSERACT_PATH
+def parse_main_stat(image_path: ImageSource, engine: OCREngine) -> str:
+    """Parse main stat from image using OCR."""
+    return recognize_line(preprocess_image(image_path), engine)
+
+
+def parse_sub_stat_block(binary, engine: OCREngine, config: str = SUB_STAT_BLOCK_CONFIG) -> List[str]:
+    """Recognize a multi-line sub stat block with a single OCR call and split it into stat lines."""
+    result = engine.recognize(binary, config)
+    return [line.strip() for line in result.splitlines() if line.strip()]
+
+
+def recognize_disk(main_stat, sub_stats, sub_stat_block, engine: OCREngine, combine_sub_stats: bool = False) -> dict:
+    """OCR the binary crops of a single disk.
+
+    Args:
+        main_stat: Binary main stat crop.
+        sub_stats (list): Binary sub stat line crops, used when there is no sub stat block.
+        sub_stat_block: Binary crop of the whole sub stat block, or None.
+        engine (OCREngine): Engine used for recognition.
+        combine_sub_stats (bool): Stack the sub stat line crops and recognize them with one call.
+
+    Returns:
+        dict: Raw OCR text of the main stat and the sub stats.
+    """
+    if sub_stat_block is not None:
+        sub_stat_texts = parse_sub_stat_block(sub_stat_block, engine)
+    elif combine_sub_stats and sub_stats:
+        # Stack the single line crops so the whole block is recognized in one call
+        sub_stat_texts = parse_sub_stat_block(cv2.vconcat(sub_stats), engine)
+    else:
+        sub_stat_texts = [recognize_line(binary, engine) for binary in sub_stats]
+
+    return {
+        "main_stat": recognize_line(main_stat, engine),
+        "sub_stats": sub_stat_texts
+    }
+
+
+def retry_binaries(gray):
+    """Alternative binarizations for crops the global threshold did not read reliably, cheapest first."""
+    _, otsu = cv2.threshold(gray, 0, MAX_GRAY_VALUE, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    yield otsu
+    yield cv2.adaptiveThreshold(gray, MAX_GRAY_VALUE, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                ADAPTIVE_BLOCK_SIZE, ADAPTIVE_OFFSET)
+    upscaled = cv2.resize(gray, None, fx=REOCR_UPSCALE, fy=REOCR_UPSCALE, interpolation=cv2.INTER_CUBIC)
+    yield binarize(upscaled)
+
+
+def recognize_checked(gray, engine: OCREngine, config: str, min_confidence: float,
+                      threshold: int = GRAY_THRESHOLD) -> List[str]:
+    """Recognize a grayscale crop, re-OCR it with `retry_binaries` only when the result is doubtful.
+
+    A result is doubtful when a word has a confidence below `min_confidence` or a line does not
+    look like a stat. The first variant that passes both checks wins, otherwise the best one.
+
+    Returns:
+        list: The recognized text lines.
+    """
+    best_score, best_lines = None, []
+    for binary in itertools.chain([binarize(gray, threshold)], retry_binaries(gray)):
+        words = engine.recognize_words(binary, config)
+        lines = _words_to_lines(words)
+        grammar_ok = all(line in _OTHER_LINES or STAT_LINE_PATTERN.match(line) for line in lines)
+        confidence = min((word.confidence for word in words), default=100.0)
+
+        if best_score is None or (grammar_ok, confidence) > best_score:
+            best_score, best_lines = (grammar_ok, confidence), lines
+        if grammar_ok and confidence >= min_confidence:
+            break
+    return best_lines
+
+
+def recognize_disk_checked(main_stat, sub_stats, sub_stat_block, engine: OCREngine, min_confidence: float,
+                           combine_sub_stats: bool = False) -> dict:
+    """`recognize_disk` with confidence-driven re-OCR, on grayscale instead of binary crops."""
+    if sub_stat_block is not None:
+        sub_stat_texts = recognize_checked(sub_stat_block, engine, SUB_STAT_BLOCK_CONFIG, min_confidence)
+    elif combine_sub_stats and sub_stats:
+        sub_stat_texts = recognize_checked(cv2.vconcat(sub_stats), engine, SUB_STAT_BLOCK_CONFIG, min_confidence)
+    else:
+        sub_stat_texts = [" ".join(recognize_checked(gray, engine, MAIN_STAT_CONFIG, min_confidence))
+                          for gray in sub_stats]
+
+    return {
+        "main_stat": " ".join(recognize_checked(main_stat, engine, MAIN_STAT_CONFIG, min_confidence)),
+        "sub_stats": sub_stat_texts
+    }
+
+
+def recognize_crops(crops: dict, engine: OCREngine, combine_sub_stats: bool = False,
+                    min_confidence: Optional[float] = None) -> dict:
+    """OCR the captured crops of a disk, keyed `main`, `sub_1`..`sub_4` or `sub_block` like the image files.
+
+    Args:
+        crops (dict): BGR(A) or already binarized crops.
+        engine (OCREngine): Engine used for recognition.
+        combine_sub_stats (bool): Recognize the sub stat line crops with one call.
+        min_confidence (float): Re-OCR doubtful crops, see `recognize_checked`. None disables re-OCR.
+    """
+    convert = binarize if min_confidence is None else grayscale
+    sub_stat_block = convert(crops["sub_block"]) if "sub_block" in crops else None
+    sub_stats = [convert(crops[f"sub_{i}"]) for i in range(1, 5) if f"sub_{i}" in crops]
+    if min_confidence is None:
+        return recognize_disk(convert(crops["main"]), sub_stats, sub_stat_block, engine, combine_sub_stats)
+    return recognize_disk_checked(convert(crops["main"]), sub_stats, sub_stat_block, engine, min_confidence,
+                                  combine_sub_stats)
+
+
+def _words_to_lines(words: List[OCRWord]) -> List[str]:
+    """Join words into text lines, starting a new line when a word sits clearly lower than the last one."""
+    lines, last_top = [], None
+    for word in sorted(words, key=lambda w: (w.top, w.left)):
+        if last_top is None or word.top - last_top > word.height / 2:
+            lines.append([])
+            last_top = word.top
+        lines[-1].append(word)
+    return [" ".join(word.text for word in sorted(line, key=lambda w: w.left)) for line in lines]
+
+
+def recognize_page(disks: list, engine: OCREngine) -> list:
+    """OCR all crops of a page with a single call by stacking them into one mosaic.
+
+    Args:
+        disks (list): (disk key, main stat, sub stat lines, sub stat block) per disk, binary crops.
+        engine (OCREngine): Engine used for recognition.
+
+    Returns:
+        list: (disk key, OCR result dictionary) per disk, in input order.
+    """
+    # (disk position, sub stat index or None for the main stat or "block", crop)
+    crops = []
+    for position, (_, main_stat, sub_stats, sub_stat_block) in enumerate(disks):
+        crops.append((position, None, main_stat))
+        if sub_stat_block is not None:
+            crops.append((position, "block", sub_stat_block))
+        crops.extend((position, i, crop) for i, crop in enumerate(sub_stats))
+
+    width = max(crop.shape[1] for _, _, crop in crops)
+    height = sum(crop.shape[0] + MOSAIC_PADDING for _, _, crop in crops) + MOSAIC_PADDING
+    mosaic = np.zeros((height, width), dtype=np.uint8)
+
+    tops, bottoms, top = [], [], MOSAIC_PADDING
+    for _, _, crop in crops:
+        mosaic[top:top + crop.shape[0], :crop.shape[1]] = crop
+        tops.append(top)
+        bottoms.append(top + crop.shape[0])
+        top += crop.shape[0] + MOSAIC_PADDING
+
+    # Map every word back to the crop its vertical center falls into
+    crop_words = [[] for _ in crops]
+    for word in engine.recognize_words(mosaic, MOSAIC_CONFIG):
+        center = word.top + word.height / 2
+        index = bisect.bisect_right(tops, center) - 1
+        if index >= 0 and center < bottoms[index]:
+            crop_words[index].append(word)
+
+    results = [{"main_stat": "", "sub_stats": []} for _ in disks]
+    for (position, slot, _), words in zip(crops, crop_words):
+        lines = _words_to_lines(words)
+        if slot is None:
+            results[position]["main_stat"] = " ".join(lines)
+        elif slot == "block":
+            results[position]["sub_stats"].extend(lines)
+        else:
+            results[position]["sub_stats"].append(" ".join(lines))
+
+    return [(disk[0], result) for disk, result in zip(disks, results)]
+
+
+class DiskJob(NamedTuple):
+    """Image files belonging to a single disk, either paths or members of a zip archive."""
+    key: str
+    main_stat_path: ImageSource
+    sub_stat_paths: List[ImageSource]
+    sub_stat_block_path: Optional[ImageSource] = None
+    combine_sub_stats: bool = False
+    min_confidence: Optional[float] = None
+
+
+def create_ocr_engine(engine_name: str = OCR_ENGINE, cache_path: Optional[str] = None) -> OCREngine:
+    """Create an OCR engine, wrapped with the result cache when a cache path is given."""
+    engine = create_engine(engine_name)
+    if cache_path:
+        engine = CachedEngine(engine, OCRCache(cache_path))
+    return engine
+
+
+def get_image_folders(base_dir: str) -> List[Tuple[str, Dict[str, ImageSource]]]:
+    """Find all capture folders in the base directory.
+
+    The base directory may hold capture folders as well as zip archives of them, or be a zip
+    archive itself. Archived images are read straight from the archive, nothing is extracted.
+
+    Returns:
+        list: (folder name, {file name: image source}) per capture folder, sorted by path.
+    """
+    base_dir = os.path.abspath(base_dir)
+    if not os.path.exists(base_dir):
+        print(f"Base directory {base_dir} does not exist.")
+        return []
+
+    if is_archive(base_dir):
+        return _get_archive_folders(base_dir)
+
+    folders = []
+    for entry in sorted(os.listdir(base_dir)):
+        path = os.path.join(base_dir, entry)
+        if os.path.isdir(path):
+            folders.append((entry, {name: os.path.join(path, name) for name in os.listdir(path)}))
+        elif is_archive(path):
+            folders.extend(_get_archive_folders(path))
+    return folders
+
+
+def _get_archive_folders(archive_path: str) -> List[Tuple[str, Dict[str, ImageSource]]]:
+    """Group the members of a zip archive by the folder they were captured into.
+
+    Members at the root of the archive use the archive name as folder name.
+    """
+    archive_name = os.path.splitext(os.path.basename(archive_path))[0]
+    folders = {}
+    for member in list_archive(archive_path):
+        folder, name = posixpath.split(member)
+        folder_name = posixpath.basename(folder) or archive_name
+        folders.setdefault(folder_name, {})[name] = ZipMember(archive_path, member)
+    return sorted(folders.items())
+
+
+def collect_disk_jobs(image_folders: list, combine_sub_stats: bool = False,
+                      min_confidence: Optional[float] = None) -> List[DiskJob]:
+    """Build the list of per-disk OCR jobs, in the order the results are saved."""
+    jobs = []
+
+    for folder_name, files in image_folders:
+        for stat_picture in files:
+            if stat_picture.endswith("png"):
+                image_extension = "png"
+            else:
+                image_extension = "jpg"
+
+            if not stat_picture.endswith("_main." + image_extension):
+                continue
+
+            # Derive the disk index and corresponding sub stat files
+            disk_index = stat_picture.split("_")[1]
+            sub_stat_files = [
+                f"disk_{disk_index}_sub_{i}." + image_extension
+                for i in range(1, 5)
+            ]
+
+            jobs.append(DiskJob(
+                key=f"{folder_name}_disk_{disk_index}",
+                main_stat_path=files[stat_picture],
+                sub_stat_paths=[files[name] for name in sub_stat_files if name in files],
+                sub_stat_block_path=files.get(f"disk_{disk_index}_sub_block." + image_extension),
+                combine_sub_stats=combine_sub_stats,
+                min_confidence=min_confidence
+            ))
+
+    return jobs
+
+
+def _init_worker(engine_name: str, cache_path: Optional[str]):
+    """Load the OCR engine once inside a freshly spawned pool worker."""
+    global _worker_engine
+    _worker_engine = create_ocr_engine(engine_name, cache_path)
+
+
+def _ocr_disk(job, engine: OCREngine = None):
+    """OCR the main stat and sub stat images of a single disk.
+
+    Args:
+        job (DiskJob): Image files of the disk.
+        engine (OCREngine): Engine to use. Defaults to the engine of the current pool worker.
+
+    Returns:
+        tuple: (disk key, OCR result dictionary).
+    """
+    return job.key, _recognize_loaded(job, _load_job(job), engine or _worker_engine)
+
+
+def _load_job(job) -> tuple:
+    """Load the crops of a disk the way its OCR needs them, grayscale when re-OCR is enabled."""
+    return _load_disk(job, preprocess_image if job.min_confidence is None else load_grayscale)
+
+
+def _recognize_loaded(job, loaded: tuple, engine: OCREngine) -> dict:
+    """OCR the crops returned by `_load_job`."""
+    main_stat, sub_stats, sub_stat_block = loaded
+    if job.min_confidence is not None:
+        return recognize_disk_checked(main_stat, sub_stats, sub_stat_block, engine, job.min_confidence,
+                                      job.combine_sub_stats)
+    return recognize_disk(main_stat, sub_stats, sub_stat_block, engine, job.combine_sub_stats)
+
+
+def _load_disk(job, load_image=preprocess_image) -> tuple:
+    """Load and binarize the crops of a disk: (main stat, sub stat lines, sub stat block)."""
+    main_stat = load_image(job.main_stat_path)
+    if job.sub_stat_block_path:
+        return main_stat, [], load_image(job.sub_stat_block_path)
+    sub_stats = [load_image(path) for path in job.sub_stat_paths]
+    return main_stat, sub_stats, None
+
+
+def load_crops(job) -> dict:
+    """Read the crops of a disk job as they were captured, keyed like `ScreenScanner` crops."""
+    crops = {"main": read_image(job.main_stat_path, cv2.IMREAD_UNCHANGED)}
+    if job.sub_stat_block_path:
+        crops["sub_block"] = read_image(job.sub_stat_block_path, cv2.IMREAD_UNCHANGED)
+    for i, path in enumerate(job.sub_stat_paths, 1):
+        crops[f"sub_{i}"] = read_image(path, cv2.IMREAD_UNCHANGED)
+    return crops
 
-    @staticmethod
-    def _get_image_subdirectories(base_dir: str) -> list:
-        """Retrieve all subdirectories in the base directory."""
-        base_dir = os.path.abspath(base_dir)
-        if not os.path.exists(base_dir):
-            print(f"Base directory {base_dir} does not exist.")
-            return []
 
-        subdirectories = [
-            os.path.join(base_dir, sub_dir)
-            for sub_dir in os.listdir(base_dir)
-            if os.path.isdir(os.path.join(base_dir, sub_dir))
-        ]
-        return sorted(subdirectories)
+def _job_files(job) -> List[ImageSource]:
+    """All image files a disk job reads."""
+    if job.sub_stat_block_path:
+        return [job.main_stat_path, job.sub_stat_block_path]
+    return [job.main_stat_path] + job.sub_stat_paths
+
+
+def _hash_loaded(loaded: tuple) -> np.ndarray:
+    """Perceptual hashes of the crops returned by `_load_job`, used to detect disks scanned twice."""
+    main_stat, sub_stats, sub_stat_block = loaded
+    crops = [main_stat] + (sub_stats if sub_stat_block is None else [sub_stat_block])
+    # Binary crops pass the threshold unchanged, grayscale crops are binarized like `preprocess_image` does
+    return disk_hashes([binarize(crop) for crop in crops])
+
+
+def _job_folder(disk_key: str) -> str:
+    """Scan folder (page) a disk key belongs to."""
+    return disk_key.rsplit("_disk_", 1)[0]
+
+
+def _dedup_disk(job, index: DedupIndex, engine: OCREngine = None) -> tuple:
+    """Load the crops of a disk once, hash them and OCR the disk unless it was captured in an earlier folder.
+
+    Args:
+        job (DiskJob): Image files of the disk.
+        index (DedupIndex): Hashes of the disks of the earlier folders.
+        engine (OCREngine): Engine to use. Defaults to the engine of the current pool worker.
+
+    Returns:
+        tuple: (disk key, OCR result or `{"alias_of": <original disk key>}`, hashes or None for a duplicate).
+    """
+    loaded = _load_job(job)
+    hashes = _hash_loaded(loaded)
+    original = index.find(_job_folder(job.key), hashes)
+    if original:
+        return job.key, {"alias_of": original}, None
+    return job.key, _recognize_loaded(job, loaded, engine or _worker_engine), hashes
+
+
+def _dedup_page(jobs, index: DedupIndex, engine: OCREngine = None) -> list:
+    """`_dedup_disk` for a whole page, the disks that are not duplicates are recognized with one mosaic."""
+    loaded = {job.key: _load_disk(job) for job in jobs}
+    hashes = {key: _hash_loaded(crops) for key, crops in loaded.items()}
+    aliases = {key: index.find(_job_folder(key), disk_hash) for key, disk_hash in hashes.items()}
+    originals = [(key, *crops) for key, crops in loaded.items() if not aliases[key]]
+    results = dict(recognize_page(originals, engine or _worker_engine)) if originals else {}
+    return [(job.key, {"alias_of": aliases[job.key]}, None) if aliases[job.key]
+            else (job.key, results[job.key], hashes[job.key]) for job in jobs]
+
+
+def _ocr_page(jobs, engine: OCREngine = None):
+    """OCR all disks of a page with one mosaic call, see `recognize_page`."""
+    engine = engine or _worker_engine
+    return recognize_page([(job.key, *_load_disk(job)) for job in jobs], engine)
+
+
+def _ocr_page_in_worker(jobs):
+    """Pool entry point for mosaic mode."""
+    return _ocr_page(jobs)
+
+
+def _ocr_disk_in_worker(job):
+    """Pool entry point: OCR a disk and report the cache hits and misses it caused."""
+    return _count_cache_use(_ocr_disk, job)
+
+
+def _dedup_disk_in_worker(job, index: DedupIndex):
+    """Pool entry point of `_dedup_disk`, reporting the cache hits and misses it caused."""
+    return _count_cache_use(_dedup_disk, job, index)
+
+
+def _dedup_page_in_worker(jobs, index: DedupIndex):
+    """Pool entry point for mosaic mode with dedup."""
+    return _dedup_page(jobs, index)
+
+
+def _count_cache_use(function, *args):
+    """Call a job function of a pool worker and append the cache hits and misses it caused to its result."""
+    cache = getattr(_worker_engine, "cache", None)
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    result = function(*args)
+    if cache:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return (*result, hits, misses)
+
+
+class OCRImageProcessor:
+    def __init__(self, workers: int = 1, engine_name: str = OCR_ENGINE, combine_sub_stats: bool = False,
+                 cache_path: Optional[str] = None, dedup: bool = False, mosaic: bool = False,
+                 min_confidence: Optional[float] = None):
+        """Initialize OCRImageProcessor and load the OCR engine.
+
+        Args:
+            workers (int): Number of worker processes used for OCR. 1 keeps the serial behaviour.
+            engine_name (str): OCR backend, see `ocr_engines.ENGINES`.
+            combine_sub_stats (bool): Recognize the four sub stat crops of a disk with one OCR call.
+                Disks captured as a single sub stat block are always recognized in one call.
+            cache_path (str): SQLite file used to cache OCR results between runs. None disables the cache.
+            dedup (bool): Skip OCR for disks that were already captured in an earlier scan folder and
+                save them as `{"alias_of": <original disk key>}` instead.
+            mosaic (bool): Recognize all disks of a scan folder (one page) with a single OCR call.
+            min_confidence (float): Re-OCR crops with a word below this confidence, or with a line that
+                does not look like a stat, using alternative binarizations. None disables re-OCR.
+                Not used in mosaic mode.
+        """
+        self.workers = max(1, workers)
+        self.engine_name = engine_name
+        self.combine_sub_stats = combine_sub_stats
+        self.cache_path = cache_path
+        self.dedup = dedup
+        self.mosaic = mosaic
+        self.min_confidence = min_confidence
+        self.engine = create_ocr_engine(engine_name, cache_path) if self.workers == 1 else None
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     @staticmethod
     def _ensure_directory(dir_name: str) -> str:
@@ -48,70 +505,286 @@ class OCRImageProcessor:
         os.makedirs(dir_path, exist_ok=True)
         return dir_path
 
-    def process_images(self, base_dir: str, output_file: str):
+    def process_images(self, base_dir: str, output_file: str) -> dict:
         """Process images from subdirectories in the base directory and save results.
 
+        With more than one worker the disks are spread across a process pool. Results are
+        merged back in job order, so the output file is identical to the serial run.
+
         Args:
-            base_dir (str): Parent directory containing subdirectories with images.
-            output_file (str): Path to the output JSON file for saving results.
+            base_dir (str): Parent directory containing subdirectories or zip archives with images,
+                or a single zip archive.
+            output_file (str): Path to the output JSON file for saving results, `.jsonl` for one disk per line.
+
+        Returns:
+            dict: The OCR data.
+        """
+        jobs = self._find_jobs(base_dir)
+        if not jobs:
+            return {}
+
+        results = {}
+        with self._create_executor(len(jobs)) or nullcontext() as executor:
+            for disk_key, result, _ in self._ocr_disks(jobs, executor):
+                results[disk_key] = result
+        self._finish(output_file)
+
+        ocr_data = {job.key: results[job.key] for job in jobs}
+
+        # Save raw OCR results
+        self._save_results(ocr_data, output_file)
+        return ocr_data
+
+    def process_images_incremental(self, base_dir: str, output_file: str, manifest_file: str) -> int:
+        """`process_images` for new or changed images only, with memory use independent of the number of disks.
+
+        Every result is appended to the manifest as soon as it is known, so an interrupted run resumes
+        where it stopped, and the output file is written from the manifest one disk at a time. With dedup,
+        the new disks are matched against the crop hashes the manifest holds for the earlier disks.
+
+        Args:
+            base_dir (str): Parent directory containing subdirectories or zip archives with images,
+                or a single zip archive.
+            output_file (str): Path to the output JSON file for saving results, `.jsonl` for one disk per line.
+            manifest_file (str): JSONL manifest of already processed disks, created on first use.
+
+        Returns:
+            int: Number of disks processed in this run.
         """
-        image_dirs = self._get_image_subdirectories(base_dir)
+        jobs = self._find_jobs(base_dir)
+        if not jobs:
+            return 0
+
+        manifest = OCRManifest(manifest_file)
+        signatures = {job.key: [file_signature(path) for path in _job_files(job)] for job in jobs}
+        done = [job.key for job in jobs if manifest.is_current(job.key, signatures[job.key])]
+        # Only dedup matches new disks against the stored hashes, reading them seeks to every stored entry
+        done = {key: manifest.hashes(key) if self.dedup else None for key in done}
+        print(f"{len(jobs) - len(done)} new or changed disks to process.")
+
+        with self._create_executor(len(jobs) - len(done)) or nullcontext() as executor:
+            for disk_key, result, hashes in self._ocr_disks(jobs, executor, done):
+                manifest.record(disk_key, signatures[disk_key], result,
+                                None if hashes is None else hashes_to_hex(hashes))
+        self._finish(output_file)
+
+        manifest.checkpoint()
+        results = manifest.results(job.key for job in jobs)
+        if is_jsonl(output_file):
+            write_jsonl(results, output_file)
+        else:
+            save_json_stream(results, output_file)
+        manifest.compact()
+        manifest.close()
+        print(f"OCR data successfully saved to {output_file}.")
+        return len(jobs) - len(done)
 
-        if not image_dirs:
+    def _find_jobs(self, base_dir: str) -> List[DiskJob]:
+        image_folders = get_image_folders(base_dir)
+        if not image_folders:
             print(f"No subdirectories found in base directory: {base_dir}")
-            return {}
+            return []
+        return collect_disk_jobs(image_folders, self.combine_sub_stats, self.min_confidence)
 
-        ocr_data = {}
+    def _create_executor(self, job_count: int) -> Optional[ProcessPoolExecutor]:
+        """Process pool for the OCR jobs, None to run them in this process."""
+        if self.workers == 1 or not job_count:
+            return None
+        print(f"Processing {job_count} disks with {self.workers} workers...")
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.engine_name, self.cache_path))
 
-        for image_dir in image_dirs:
-            folder_name = os.path.basename(image_dir)
-            print(f"Processing folder: {folder_name}")
+    def _finish(self, output_file: str) -> None:
+        """Release the archives, report the cache use and create the output directory."""
+        close_archives()
+        if self.cache_path:
+            print(f"OCR cache: {self.cache_hits} hits, {self.cache_misses} misses.")
+        self._ensure_directory(os.path.dirname(output_file))
 
-            pictures = os.listdir(image_dir)
+    def _map(self, function, jobs: list, executor):
+        """Run a job function serially or on the pool, yielding results in job order."""
+        if executor is None:
+            return map(function, jobs)
+        chunk_size = max(1, len(jobs) // (self.workers * 4))
+        # map() yields in submission order, which keeps the output deterministic
+        return executor.map(function, jobs, chunksize=chunk_size)
 
-            for stat_picture in pictures:
-                if stat_picture.endswith("png"):
-                    image_extension = "png"
-                else:
-                    image_extension = "jpg"
+    def _ocr_disks(self, jobs: List[DiskJob], executor, done: Optional[Dict[str, Optional[str]]] = None):
+        """OCR the given disks, yielding (disk key, result, crop hashes or None) in job order.
 
-                if not stat_picture.endswith("_main." + image_extension):
+        Args:
+            jobs (list): Disks in job order.
+            executor (ProcessPoolExecutor): Pool to run the jobs on, None to run them in this process.
+            done (dict): Crop hashes as hex, or None, by key of the disks processed in an earlier run.
+                They are not processed again, only matched against when deduplicating.
+        """
+        done = done or {}
+        if not self.dedup:
+            for disk_key, result in self._ocr_jobs([job for job in jobs if job.key not in done], executor):
+                yield disk_key, result, None
+            return
+
+        duplicates = 0
+        for disk_key, result, hashes in self._ocr_deduplicated(jobs, executor, done):
+            duplicates += hashes is None
+            yield disk_key, result, hashes
+        print(f"Skipped {duplicates} disks already captured in an earlier scan.")
+
+    def _ocr_jobs(self, jobs: List[DiskJob], executor):
+        """OCR the given disks, yielding (disk key, result) in job order."""
+        if self.mosaic:
+            yield from self._ocr_pages(jobs, executor)
+            return
+
+        if executor is None:
+            for job in jobs:
+                print(f"  Processing {job.key}...")
+                yield _ocr_disk(job, self.engine)
+            self._update_cache_stats()
+            return
+
+        for disk_key, result, hits, misses in self._map(_ocr_disk_in_worker, jobs, executor):
+            self.cache_hits += hits
+            self.cache_misses += misses
+            yield disk_key, result
+
+    def _ocr_pages(self, jobs: List[DiskJob], executor):
+        """OCR the given disks one page (scan folder) at a time, yielding (disk key, result) in job order."""
+        pages = self._pages(jobs)
+
+        if executor is None:
+            for folder_name, page_jobs in pages.items():
+                print(f"  Processing page {folder_name} ({len(page_jobs)} disks)...")
+                yield from _ocr_page(page_jobs, self.engine)
+            return
+
+        for page_results in executor.map(_ocr_page_in_worker, pages.values()):
+            yield from page_results
+
+    def _ocr_deduplicated(self, jobs: List[DiskJob], executor, done: Dict[str, Optional[str]]):
+        """OCR the given disks one scan folder at a time, skipping disks captured in an earlier folder.
+
+        Every disk is loaded once: the OCR job hashes the crops it loaded and only recognizes them when
+        they match no disk of the earlier folders. Duplicates get `{"alias_of": <original disk key>}` as
+        result and None as hashes. Disks in `done` are indexed with their stored hashes instead of being
+        processed. Yields (disk key, result, hashes) in job order.
+        """
+        index = DedupIndex()
+        for folder_name, folder_jobs in self._pages(jobs).items():
+            new_jobs = [job for job in folder_jobs if job.key not in done]
+            folder_results = self._dedup_folder(folder_name, new_jobs, index, executor) if new_jobs else []
+            hashes = {disk_key: disk_hash for disk_key, _, disk_hash in folder_results}
+            # Disks of one folder are never duplicates of each other, so they join the index afterwards
+            for job in folder_jobs:
+                if job.key not in done:
+                    disk_hash = hashes[job.key]
+                elif done[job.key] is not None:
+                    disk_hash = hashes_from_hex(done[job.key])
+                else:
                     continue
+                if disk_hash is not None:
+                    index.add(job.key, folder_name, disk_hash)
+            yield from folder_results
+
+    def _dedup_folder(self, folder_name: str, jobs: List[DiskJob], index: DedupIndex, executor) -> list:
+        """Run the dedup OCR jobs of one scan folder against the index of the earlier folders."""
+        if self.mosaic:
+            print(f"  Processing page {folder_name} ({len(jobs)} disks)...")
+            if executor is None:
+                return _dedup_page(jobs, index, self.engine)
+            return executor.submit(_dedup_page_in_worker, jobs, index).result()
+
+        if executor is None:
+            results = []
+            for job in jobs:
+                print(f"  Processing {job.key}...")
+                results.append(_dedup_disk(job, index, self.engine))
+            self._update_cache_stats()
+            return results
+
+        # One chunk per worker, the index is sent along with every chunk
+        chunk_size = -(-len(jobs) // self.workers)
+        results = []
+        for disk_key, result, hashes, hits, misses in executor.map(partial(_dedup_disk_in_worker, index=index), jobs,
+                                                                   chunksize=chunk_size):
+            self.cache_hits += hits
+            self.cache_misses += misses
+            results.append((disk_key, result, hashes))
+        return results
+
+    @staticmethod
+    def _pages(jobs: List[DiskJob]) -> Dict[str, List[DiskJob]]:
+        """Group disk jobs by scan folder, in job order."""
+        pages = {}
+        for job in jobs:
+            pages.setdefault(_job_folder(job.key), []).append(job)
+        return pages
+
+    def _update_cache_stats(self) -> None:
+        """Copy the counters of the cache of the serial engine."""
+        if self.cache_path:
+            self.cache_hits, self.cache_misses = self.engine.cache.hits, self.engine.cache.misses
+
+    def process_stream(self, crop_queue: Queue, output_file: str, threads: int = OCR_STREAM_THREADS) -> dict:
+        """OCR disks pushed by `ScreenScanner.capture_and_save_disk_images` while the scan is running.
+
+        Items are `(disk_index, disk_key, crops)` tuples holding the BGR(A) crops of one disk, and
+        `None` marks the end of the scan. Results are saved in disk order once the queue is drained.
+
+        Args:
+            crop_queue (Queue): Bounded queue shared with the scanner.
+            output_file (str): Path to the output JSON file for saving results.
+            threads (int): Number of OCR threads consuming the queue.
+        """
+        results = {}
+        results_lock = threading.Lock()
+
+        def consume():
+            # Every thread gets its own engine, neither Tesseract handles nor SQLite connections are shared
+            engine = create_ocr_engine(self.engine_name, self.cache_path)
+            try:
+                while True:
+                    item = crop_queue.get()
+                    if item is None:
+                        # Put the marker back so the other threads stop as well
+                        crop_queue.put(None)
+                        break
+
+                    disk_index, disk_key, crops = item
+                    try:
+                        result = recognize_crops(crops, engine, self.combine_sub_stats, self.min_confidence)
+                    except Exception as e:
+                        print(f"Error processing {disk_key}: {e}")
+                        continue
+
+                    print(f"  Processed {disk_key}")
+                    with results_lock:
+                        results[disk_index] = (disk_key, result)
+            finally:
+                engine.close()
+
+        consumers = [threading.Thread(target=consume, daemon=True) for _ in range(max(1, threads))]
+        for consumer in consumers:
+            consumer.start()
+        for consumer in consumers:
+            consumer.join()
+
+        ocr_data = {disk_key: result for _, (disk_key, result) in sorted(results.items())}
 
-                # Derive the disk index and corresponding sub stat files
-                disk_index = stat_picture.split("_")[1]
-                sub_stat_files = [
-                    f"disk_{disk_index}_sub_{i}." + image_extension
-                    for i in range(1, 5)
-                ]
-
-                # Parse the images
-                main_stat_path = os.path.join(image_dir, stat_picture)
-                sub_stat_paths = [
-                    os.path.join(image_dir, sub_stat_file)
-                    for sub_stat_file in sub_stat_files
-                ]
-
-                print(f"  Processing disk {disk_index}...")
-                ocr_data[f"{folder_name}_disk_{disk_index}"] = {
-                    "main_stat": parse_main_stat(main_stat_path),
-                    "sub_stats": [parse_main_stat(path) for path in sub_stat_paths if os.path.exists(path)]
-                }
-
-        # Ensure the output directory exists
         output_dir = os.path.dirname(output_file)
         self._ensure_directory(output_dir)
-
-        # Save raw OCR results
         self._save_results(ocr_data, output_file)
         return ocr_data
 
     @staticmethod
     def _save_results(data, filename):
-        """Save OCR data to a JSON file."""
+        """Save OCR data to a JSON file, or one disk per line if the file name ends in `.jsonl`."""
         try:
-            with open(filename, 'w', encoding='utf-8') as file:
-                json.dump(data, file, indent=4, ensure_ascii=False)
+            if is_jsonl(filename):
+                write_jsonl(data.items(), filename)
+            else:
+                with open(filename, 'w', encoding='utf-8') as file:
+                    json.dump(data, file, indent=4, ensure_ascii=False)
             print(f"OCR data successfully saved to {filename}.")
         except Exception as e:
             print(f"Error saving OCR data: {e}")
@@ -119,8 +792,8 @@ class OCRImageProcessor:
 
 if __name__ == "__main__":
     # Example usage
-    base_dir = "../images"  # Parent directory containing subdirectories like "images_1", "images_2", etc.
+    base_dir = "../images"  # Parent directory containing subdirectories like "images_1", "images_2", or zip archives
     output_file_path = "../output/raw_data.json"  # Provide the output file path
 
-    processor = OCRImageProcessor()
+    processor = OCRImageProcessor(workers=os.cpu_count() or 1)
     processor.process_images(base_dir, output_file_path)
\ No newline at end of file
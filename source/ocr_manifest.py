@@ -0,0 +1,143 @@
+import json
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from source.constants import MANIFEST_CHECKPOINT_INTERVAL
+from source.image_source import ImageSource, source_signature
+
+
+def file_signature(source: ImageSource) -> List:
+    """Signature of an image file or archive member, used to detect new or changed images."""
+    return source_signature(source)
+
+
+class OCRManifest:
+    """Append-only JSONL log of the disks that were already processed.
+
+    Every line holds a disk key, the signature of its image files, its OCR result and, with dedup,
+    the hashes of its crops. A disk is only processed again when its files change. Results are
+    appended as soon as they are known, so an interrupted run resumes where it stopped. Only keys,
+    signatures and line offsets are kept in memory, the results themselves stay on disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries = {}
+        self._stale_lines = 0
+        self._pending_sync = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._load()
+        self._file = open(path, 'a+', encoding='utf-8')
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        offset, valid_end = 0, 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut off by a crash, everything before it is still valid
+                    break
+                if entry["key"] in self._entries:
+                    self._stale_lines += 1
+                self._entries[entry["key"]] = (entry["files"], offset)
+                offset += len(line)
+                valid_end = offset
+
+        if valid_end < os.path.getsize(self.path):
+            print(f"Truncating incomplete manifest entry at byte {valid_end} of {self.path}.")
+            with open(self.path, 'r+b') as file:
+                file.truncate(valid_end)
+
+    def is_current(self, key: str, files: List) -> bool:
+        """Whether the disk was already processed from exactly these files."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] == files
+
+    def record(self, key: str, files: List, result: dict, hashes: Optional[str] = None) -> None:
+        """Append the result of a disk. Flushed at once and synced to disk every few records."""
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        entry = {"key": key, "files": files, "result": result}
+        if hashes is not None:
+            entry["hashes"] = hashes
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+        if key in self._entries:
+            self._stale_lines += 1
+        self._entries[key] = (files, offset)
+
+        self._pending_sync += 1
+        if self._pending_sync >= MANIFEST_CHECKPOINT_INTERVAL:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Force the recorded results to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending_sync = 0
+
+    def _read(self, key: str) -> Optional[dict]:
+        """Read the latest recorded entry of a disk."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._file.seek(entry[1])
+        return json.loads(self._file.readline())
+
+    def result(self, key: str) -> Optional[dict]:
+        """Read the latest recorded result of a disk."""
+        entry = self._read(key)
+        return None if entry is None else entry["result"]
+
+    def hashes(self, key: str) -> Optional[str]:
+        """Crop hashes recorded with the latest result of a disk, None for duplicates or runs without dedup."""
+        entry = self._read(key)
+        return None if entry is None else entry.get("hashes")
+
+    def results(self, keys: Iterable[str]) -> Iterable[Tuple[str, dict]]:
+        """Yield (key, result) for the given keys, reading one result at a time."""
+        for key in keys:
+            result = self.result(key)
+            if result is not None:
+                yield key, result
+
+    def compact(self) -> None:
+        """Rewrite the manifest without superseded entries once they make up most of the file."""
+        if self._stale_lines <= len(self._entries):
+            return
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as temp_file:
+            for key in list(self._entries):
+                temp_file.write(json.dumps(self._read(key), ensure_ascii=False) + "\n")
+        self._file.close()
+        os.replace(temp_path, self.path)
+
+        self._entries, self._stale_lines = {}, 0
+        self._load()
+        self._file = open(self.path, 'a+', encoding='utf-8')
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._file.close()
+
+
+def save_json_stream(items: Iterable[Tuple[str, dict]], filename: str) -> None:
+    """Write (key, value) pairs as one JSON object without holding them in memory.
+
+    The output is identical to `json.dump(dict(items), file, indent=4, ensure_ascii=False)`.
+    """
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write("{")
+        empty = True
+        for key, value in items:
+            value_json = json.dumps(value, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+            file.write(("\n" if empty else ",\n") + f"    {json.dumps(key, ensure_ascii=False)}: {value_json}")
+            empty = False
+        file.write("}" if empty else "\n}")
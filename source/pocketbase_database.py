@@ -61,44 +61,10 @@ class PocketBaseDatabase:
         return disks
 
     def get_disks_and_substats(self) -> List[dict]:
-
-        batch_requests = [
-            {
-                "method": "GET",
-                "url": "/api/collections/disks/records",
-                "headers": {"Content-Type": "application/json"},
-                "body": {}
-            },
-            {
-                "method": "GET",
-                "url": "/api/collections/sub_stats/records",
-                "headers": {"Content-Type": "application/json"},
-                "body": {}
-            }
-
-        ]
-
-        payload = {"requests": batch_requests}
-
-        # Log payload for debugging
-        print("Payload being sent:", json.dumps(payload, indent=4))
-
-        response = requests.post(
-            f"{self.base_url}/batch",
-            json=payload,
-            headers=self._headers(),
-        )
-
-        # Log response
-        if not response.ok:
-            print("Response status code:", response.status_code)
-            print("Error response body:", response.text)
-
-        # Raise error for bad status codes
-        response.raise_for_status()
-
-        disks = None
-        sub_stats = None
+        """All disks with their sub stats, each collection read page by page."""
+        # The batch endpoint only runs write requests, the records are listed with plain GETs
+        disks = self._get_all_records("disks")
+        sub_stats = self._get_all_records("sub_stats")
 
         # Group sub_stats by disk_id for easier lookup
         sub_stats_by_disk = {}
@@ -173,6 +139,23 @@ class PocketBaseDatabase:
         # Return parsed response
         return response.json()
 
+    def _get_all_records(self, collection: str, per_page: int = 500) -> List[dict]:
+        """Every record of a collection, requested `per_page` records at a time."""
+        records = []
+        page = 1
+        while True:
+            response = requests.get(
+                f"{self.base_url}/collections/{collection}/records",
+                params={"page": page, "perPage": per_page},
+                headers=self._headers()
+            )
+            response.raise_for_status()
+            result = response.json()
+            records.extend(result.get("items", []))
+            if page >= result.get("totalPages", 0):
+                return records
+            page += 1
+
     def _headers(self) -> Dict[str, str]:
         """Generate headers for the requests."""
         headers = {"Content-Type": "application/json"}
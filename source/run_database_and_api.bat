@@ -1,3 +1,3 @@
 @echo off
 start cmd /k "cd /d C:\Users\gara\Documents\Projects\disc\db && .\pocketbase.exe serve"
-start cmd /k "cd /d C:\Users\gara\Documents\Projects\disc\source && uvicorn api:app --reload"
\ No newline at end of file
+start cmd /k "cd /d C:\Users\gara\Documents\Projects\disc\source && uvicorn source.api:app --app-dir .. --reload"
\ No newline at end of file
@@ -1,13 +1,18 @@
 import os
+import json
 import cv2
 import numpy as np
 import mss
 import pydirectinput
 import time
-from typing import Dict, Tuple
+from queue import Queue
+from typing import Dict, Optional, Tuple
 
 from source.constants import ROWS, COLS, RESOLUTION, MAIN_STAT_REGION, SUB_STAT_REGION_1, \
-    SUB_STAT_REGION_2, SUB_STAT_REGION_3, SUB_STAT_REGION_4, START_POS, CELL_SIZE, IMAGE_EXTENSION
+    SUB_STAT_REGION_2, SUB_STAT_REGION_3, SUB_STAT_REGION_4, FULL_SUB_STAT_REGION, START_POS, CELL_SIZE, \
+    IMAGE_EXTENSION, SETTLE_TIMEOUT, SETTLE_POLL_INTERVAL, SETTLE_DIFF_THRESHOLD, SETTLE_STABLE_POLLS, \
+    SETTLE_DOWNSCALE
+from source.ocr_image_processor import binarize
 
 
 def _calculate_region_pixels(region_percent):
@@ -22,12 +27,53 @@ def _calculate_region_pixels(region_percent):
     return region
 
 
+def _bounding_box(regions: Dict[str, Dict]) -> Tuple[Dict, Dict[str, Tuple[slice, slice]]]:
+    """Compute the box enclosing all regions and the slices of each region inside that box."""
+    left = min(region["left"] for region in regions.values())
+    top = min(region["top"] for region in regions.values())
+    right = max(region["left"] + region["width"] for region in regions.values())
+    bottom = max(region["top"] + region["height"] for region in regions.values())
+
+    box = {"left": left, "top": top, "width": right - left, "height": bottom - top}
+    slices = {
+        name: (slice(region["top"] - top, region["top"] - top + region["height"]),
+               slice(region["left"] - left, region["left"] - left + region["width"]))
+        for name, region in regions.items()
+    }
+    return box, slices
+
+
+def _settle_patch(buffer: np.ndarray) -> np.ndarray:
+    """Downscale a panel grab to a small patch that is cheap to compare."""
+    # The green channel is a good enough brightness proxy for white text on a dark panel
+    return buffer[::SETTLE_DOWNSCALE, ::SETTLE_DOWNSCALE, 1].astype(np.int16)
+
+
+def _patch_difference(patch: np.ndarray, other: np.ndarray) -> float:
+    """Mean absolute difference between two settle patches."""
+    return float(np.abs(patch - other).mean())
+
+
 class ScreenScanner:
-    def __init__(self, images_path):
-        """Initialize ScreenScanner with grid parameters."""
+    def __init__(self, images_path, sub_stat_block: bool = False, adaptive_settle: bool = True,
+                 binarize_crops: bool = False):
+        """Initialize ScreenScanner with grid parameters.
+
+        Args:
+            images_path (str): Root directory for the captured images.
+            sub_stat_block (bool): Capture the four sub stats as one image (`disk_NNN_sub_block`)
+                so the OCR stage can recognize them with a single call.
+            adaptive_settle (bool): Capture as soon as the stat panel has redrawn instead of
+                waiting a fixed time after every click.
+            binarize_crops (bool): Archive the crops already binarized, as 1-bit PNGs. They are many
+                times smaller and the OCR stage reads them without converting or thresholding again.
+        """
+        self.adaptive_settle = adaptive_settle
+        self.binarize_crops = binarize_crops
+
         # Safety settings
         pydirectinput.FAILSAFE = True
-        pydirectinput.PAUSE = 0.1
+        pydirectinput.PAUSE = 0 if adaptive_settle else 0.1
 
         # Convert regions from percentages to pixels
         self.main_stat_region = _calculate_region_pixels(MAIN_STAT_REGION)
@@ -35,6 +81,12 @@ class ScreenScanner:
         self.substat_region_2 = _calculate_region_pixels(SUB_STAT_REGION_2)
         self.substat_region_3 = _calculate_region_pixels(SUB_STAT_REGION_3)
         self.substat_region_4 = _calculate_region_pixels(SUB_STAT_REGION_4)
+        self.full_substat_region = _calculate_region_pixels(FULL_SUB_STAT_REGION)
+        self.sub_stat_block = sub_stat_block
+
+        # One grab of the bounding box of all regions per disk, the crops are sliced out of it
+        self.capture_box, self.crop_slices = _bounding_box(self._disk_regions())
+        self.sct = mss.mss()
 
         # Directories for screenshots
         self.images_root = self._ensure_root_directory(images_path)
@@ -58,8 +110,78 @@ class ScreenScanner:
                 return sub_dir
             suffix += 1
 
-    def capture_and_save_disk_images(self) -> None:
-        """Capture screenshots for all disk positions in the grid."""
+    def _disk_regions(self) -> Dict[str, Dict]:
+        """Regions captured for every disk, keyed by the crop name used in the file names."""
+        if self.sub_stat_block:
+            return {"main": self.main_stat_region, "sub_block": self.full_substat_region}
+        return {
+            "main": self.main_stat_region,
+            "sub_1": self.substat_region_1,
+            "sub_2": self.substat_region_2,
+            "sub_3": self.substat_region_3,
+            "sub_4": self.substat_region_4,
+        }
+
+    def _grab_panel(self) -> np.ndarray:
+        """Grab the bounding box of all disk regions as a BGRA buffer."""
+        return np.asarray(self.sct.grab(self.capture_box))
+
+    def _crop_panel(self, buffer: np.ndarray) -> Dict[str, np.ndarray]:
+        """Slice the crops of every region out of a panel grab."""
+        return {name: buffer[rows, cols] for name, (rows, cols) in self.crop_slices.items()}
+
+    def grab_disk(self) -> Dict[str, np.ndarray]:
+        """Grab the stat panel once and return the crops of every region.
+
+        The crops are BGRA views into the same screenshot buffer, nothing is copied or converted.
+        """
+        return self._crop_panel(self._grab_panel())
+
+    def wait_for_settle(self, previous_patch: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, float, bool]:
+        """Poll the stat panel until it shows a new disk and has stopped changing.
+
+        Args:
+            previous_patch (np.ndarray): Settle patch of the previous disk, None for the first one.
+
+        Returns:
+            tuple: (last panel grab, its settle patch, seconds waited, whether the panel settled
+            before SETTLE_TIMEOUT).
+        """
+        start = time.perf_counter()
+        last_patch, stable_polls = None, 0
+
+        while True:
+            buffer = self._grab_panel()
+            patch = _settle_patch(buffer)
+            elapsed = time.perf_counter() - start
+
+            if last_patch is not None and _patch_difference(patch, last_patch) < SETTLE_DIFF_THRESHOLD:
+                stable_polls += 1
+            else:
+                stable_polls = 0
+
+            changed = previous_patch is None or _patch_difference(patch, previous_patch) >= SETTLE_DIFF_THRESHOLD
+            if changed and stable_polls >= SETTLE_STABLE_POLLS:
+                return buffer, patch, elapsed, True
+            if elapsed >= SETTLE_TIMEOUT:
+                # Two disks with identical stats never look different, so give up and capture anyway
+                return buffer, patch, elapsed, False
+
+            last_patch = patch
+            time.sleep(SETTLE_POLL_INTERVAL)
+
+    def close(self) -> None:
+        """Release the screen grabber."""
+        self.sct.close()
+
+    def capture_and_save_disk_images(self, crop_queue: Optional[Queue] = None, archive: bool = True) -> None:
+        """Capture screenshots for all disk positions in the grid.
+
+        Args:
+            crop_queue (Queue): If given, every disk is pushed as `(disk_index, disk_key, crops)` so the
+                OCR stage can work while the scan goes on. `None` is pushed once the scan ends.
+            archive (bool): Also write the crops to the image directory.
+        """
         print("Starting screen scanning in 5 seconds...")
         print("Move mouse to upper-left corner to abort.")
         for i in range(3, 0, -1):
@@ -67,6 +189,9 @@ class ScreenScanner:
             time.sleep(1)
 
         disk_index = 0
+        folder_name = os.path.basename(self.image_dir)
+        previous_patch = None
+        scan_log = {}
 
         try:
             for row in range(ROWS):
@@ -78,28 +203,58 @@ class ScreenScanner:
 
                     # Get and click the grid position
                     x, y = get_cell_position(row, col)
-                    click_position(x, y)
-                    # Wait for the screen to update
-                    time.sleep(0.2)
-
-                    # Capture screenshots
-                    main_stat_path = os.path.join(self.image_dir, f"disk_{disk_index_str}_main." + IMAGE_EXTENSION)
-                    sub_stat_path_1 = os.path.join(self.image_dir, f"disk_{disk_index_str}_sub_1." + IMAGE_EXTENSION)
-                    sub_stat_path_2 = os.path.join(self.image_dir, f"disk_{disk_index_str}_sub_2." + IMAGE_EXTENSION)
-                    sub_stat_path_3 = os.path.join(self.image_dir, f"disk_{disk_index_str}_sub_3." + IMAGE_EXTENSION)
-                    sub_stat_path_4 = os.path.join(self.image_dir, f"disk_{disk_index_str}_sub_4." + IMAGE_EXTENSION)
-
-                    capture_region(main_stat_path, self.main_stat_region)
-                    capture_region(sub_stat_path_1, self.substat_region_1)
-                    capture_region(sub_stat_path_2, self.substat_region_2)
-                    capture_region(sub_stat_path_3, self.substat_region_3)
-                    capture_region(sub_stat_path_4, self.substat_region_4)
+                    if self.adaptive_settle:
+                        click_position(x, y, move_duration=0, pause=0)
+                        # Capture as soon as the panel shows the new disk
+                        buffer, previous_patch, settle_time, settled = self.wait_for_settle(previous_patch)
+                        crops = self._crop_panel(buffer)
+                        scan_log[f"disk_{disk_index_str}"] = {
+                            "row": row, "col": col, "settle_time": round(settle_time, 4), "settled": settled
+                        }
+                        if not settled:
+                            print(f"Panel did not settle within {SETTLE_TIMEOUT}s, capturing anyway")
+                    else:
+                        click_position(x, y)
+                        # Wait for the screen to update
+                        time.sleep(0.2)
+
+                        # Capture screenshots
+                        crops = self.grab_disk()
+
+                    if archive:
+                        for name, crop in crops.items():
+                            self._save_crop(f"disk_{disk_index_str}_{name}", crop)
+
+                    if crop_queue is not None:
+                        # Blocks when the OCR stage falls behind, which bounds the memory used by pending crops
+                        crop_queue.put((disk_index, f"{folder_name}_disk_{disk_index_str}", crops))
 
         except Exception as e:
             print(f"Error during screen scanning: {e}")
         finally:
+            if crop_queue is not None:
+                crop_queue.put(None)
+            if scan_log:
+                self._save_scan_log(scan_log)
             print("\nScreen scanning complete!")
 
+    def _save_crop(self, file_name: str, crop: np.ndarray) -> None:
+        """Write a captured BGRA crop to the image directory, in color or binarized."""
+        if self.binarize_crops:
+            # Lossless 1-bit PNG, JPEG artifacts would change the thresholded pixels
+            cv2.imwrite(os.path.join(self.image_dir, file_name + ".png"), binarize(crop), [cv2.IMWRITE_PNG_BILEVEL, 1])
+        else:
+            cv2.imwrite(os.path.join(self.image_dir, file_name + "." + IMAGE_EXTENSION),
+                        cv2.cvtColor(crop, cv2.COLOR_BGRA2BGR))
+
+    def _save_scan_log(self, scan_log: dict) -> None:
+        """Save the per-cell settle times next to the captured images."""
+        log_path = os.path.join(self.image_dir, "scan_log.json")
+        with open(log_path, 'w', encoding='utf-8') as file:
+            json.dump(scan_log, file, indent=4)
+        settle_times = [entry["settle_time"] for entry in scan_log.values()]
+        print(f"Average settle time: {sum(settle_times) / len(settle_times):.3f}s, saved to {log_path}")
+
 
 def get_cell_position(row: int, col: int) -> Tuple[int, int]:
     """Calculate the screen coordinates for a given grid position."""
@@ -108,23 +263,15 @@ def get_cell_position(row: int, col: int) -> Tuple[int, int]:
     return x, y
 
 
-def click_position(x: int, y: int) -> None:
+def click_position(x: int, y: int, move_duration: float = 0.1, pause: float = 0.05) -> None:
     """Click at the specified coordinates with smooth movement."""
-    pydirectinput.moveTo(x, y, 0.1)
-    time.sleep(0.05)
+    pydirectinput.moveTo(x, y, move_duration)
+    time.sleep(pause)
     pydirectinput.click()
-    time.sleep(0.05)
-
-
-def capture_region(output_path: str, region: Dict) -> None:
-    """Capture a specific region of the screen."""
-    with mss.mss() as sct:
-        screenshot = sct.grab(region)
-        img = np.array(screenshot)
-        img_bgr = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-        cv2.imwrite(output_path, img_bgr)
+    time.sleep(pause)
 
 
 if __name__ == "__main__":
     scanner = ScreenScanner("../images")
     scanner.capture_and_save_disk_images()
+    scanner.close()
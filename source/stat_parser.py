@@ -0,0 +1,180 @@
+import math
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from source.constants import SUBSTATS, MAIN_STAT_LEVELS
+from source.stat_resolver import resolve_sub_stat_name
+
+# Stat names ATK, HP and DEF exist both as flat and as percentage stats, the `%` of the value decides
+_FLAT_NAMES = {"ATK": "Flat ATK", "HP": "Flat HP", "DEF": "Flat DEF"}
+_PERCENT_NAMES = {"ATK": "ATK%", "HP": "HP%", "DEF": "DEF%"}
+
+# Known OCR misreadings of sub stat names
+SUB_STAT_ALIASES = {
+    "Anomaly Proficlency": "Anomaly Proficiency",
+    "MP": "HP", "AP": "HP", "Ld": "HP", "uP": "HP", "hd": "HP",
+}
+
+# Sub stat names made of two words, the first word alone is not a stat
+_TWO_WORD_PREFIXES = frozenset({"CRIT", "Anomaly"})
+
+# Main stat values: `%` is dropped and `a` is a misread `4`
+_VALUE_TRANSLATION = str.maketrans({"%": None, "a": "4"})
+
+
+def _build_name_table(aliases: Dict[str, str]) -> Dict[Tuple[str, bool], str]:
+    """(OCR name, is percentage) -> stat name, for every name that is resolved to another one."""
+    table = {}
+    for raw_name in set(aliases) | set(_FLAT_NAMES):
+        name = aliases.get(raw_name, raw_name)
+        table[(raw_name, False)] = _FLAT_NAMES.get(name, name)
+        table[(raw_name, True)] = _PERCENT_NAMES.get(name, name)
+    return table
+
+
+_MAIN_STAT_NAMES = _build_name_table({})
+_SUB_STAT_NAMES = _build_name_table(SUB_STAT_ALIASES)
+
+
+def _check_sorted(levels: Dict[str, List[float]]) -> Dict[str, List[float]]:
+    for name, values in levels.items():
+        if any(a > b for a, b in zip(values, values[1:])):
+            raise ValueError(f"MAIN_STAT_LEVELS['{name}'] must be sorted for the level lookup")
+    return levels
+
+
+_LEVELS = _check_sorted(MAIN_STAT_LEVELS)
+
+
+def infer_main_stat_level(stat_name: str, stat_value: float) -> Optional[int]:
+    """Level of a main stat from its value: the last level whose value is below the given one."""
+    levels = _LEVELS.get(stat_name)
+    if levels is None:
+        if not stat_name.endswith("Bonus"):
+            return None
+        levels = _LEVELS["Element DMG Bonus"]
+    if math.isnan(stat_value):
+        return len(levels) - 1
+    # First level whose value is at least the stat value
+    level = bisect_left(levels, stat_value)
+    if level == len(levels):
+        return len(levels) - 1
+    return level - 1 if level > 0 else 0
+
+
+def parse_main_stat_text(stat_text: str) -> Optional[dict]:
+    """Parse a main stat line such as `HP 2200` or `CRIT Rate 24%`."""
+    if not stat_text:
+        return None
+
+    parts = stat_text.split()
+    stat_name = " ".join(parts[:-1]) if len(parts) > 2 else parts[0]
+    value_text = parts[-1]
+    stat_value = float(value_text.translate(_VALUE_TRANSLATION))
+    stat_name = _MAIN_STAT_NAMES.get((stat_name, "%" in value_text), stat_name)
+
+    return {
+        "name": stat_name,
+        "value": stat_value,
+        "level": infer_main_stat_level(stat_name, stat_value)
+    }
+
+
+def parse_sub_stat_text(stat_text: str) -> Optional[dict]:
+    """Parse a sub stat line such as `ATK +2 9%`, where `+n` is the number of upgrades."""
+    if not stat_text or "Set Effect" in stat_text:
+        return None
+    stat_name, level, value = _parse_sub_stat_fields(stat_text)
+    return {"name": stat_name, "level": level, "value": value}
+
+
+def _level_and_value(parts: List[str]) -> Tuple[int, Optional[str]]:
+    """Split the tokens after a sub stat name into the upgrade level (`+n`) and the value."""
+    level, value_part = 0, None
+    for part in parts:
+        if part.startswith("+"):
+            level = int(part.replace("+", ""))
+        else:
+            value_part = part
+    return level, value_part
+
+
+def _name_length(parts: List[str]) -> int:
+    """Number of leading tokens that belong to the stat name, up to the first level or value token."""
+    for i, part in enumerate(parts):
+        if part.startswith("+") or any(char.isdigit() for char in part):
+            return i
+    return len(parts)
+
+
+@lru_cache(maxsize=4096)
+def _parse_sub_stat_fields(stat_text: str) -> Tuple[str, int, float]:
+    # Sub stats only take a few hundred distinct values, so most lines of a dump are cache hits
+    parts = stat_text.split()
+    if parts[0] in _TWO_WORD_PREFIXES:
+        stat_name = f"{parts[0]} {parts[1]}"
+        level, value_part = _level_and_value(parts[2:])
+    else:
+        stat_name = parts[0]
+        level, value_part = _level_and_value(parts[1:])
+
+    stat_name = _SUB_STAT_NAMES.get((stat_name, value_part.endswith("%")), stat_name)
+
+    if stat_name not in SUBSTATS:
+        # A misread nobody added to SUB_STAT_ALIASES yet, try the closest known name
+        name_length = _name_length(parts)
+        resolved = resolve_sub_stat_name(" ".join(parts[:name_length])) if name_length else None
+        try:
+            resolved_level, resolved_value_part = _level_and_value(parts[name_length:])
+        except ValueError:
+            resolved = None
+        if resolved is not None and resolved_value_part is not None:
+            level = resolved_level
+            stat_name = _SUB_STAT_NAMES.get((resolved, resolved_value_part.endswith("%")), resolved)
+
+    base_value = SUBSTATS.get(stat_name)
+    if base_value is None:
+        value = 0
+    elif level > 0:
+        value = round(base_value * (level + 1), 2)
+    else:
+        value = base_value
+
+    return stat_name, level, value
+
+
+def parse_disk_text(main_stat_text: str, sub_stat_texts: Iterable[str]) -> dict:
+    """Parse the raw OCR text of a disk into structured data."""
+    main_stat = parse_main_stat_text(main_stat_text)
+    sub_stats = [result for sub_text in sub_stat_texts
+                 if sub_text and (result := parse_sub_stat_text(sub_text)) is not None]
+    return {"main_stat": main_stat, "sub_stats": sub_stats}
+
+
+def parse_records(records: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+    """Parse (disk key, raw OCR data) pairs one at a time. Disks captured again (`alias_of`) are skipped."""
+    for disk, stats in records:
+        if "alias_of" not in stats:
+            yield disk, parse_disk_text(stats["main_stat"], stats["sub_stats"])
+
+
+def parse_many(ocr_data: Dict[str, dict]) -> Dict[str, dict]:
+    """Parse a whole raw OCR dump. Disks captured again in a later scan (`alias_of`) are skipped."""
+    return dict(parse_records(ocr_data.items()))
+
+
+if __name__ == "__main__":
+    # Parity check: the known-good disk data was produced from this raw OCR output
+    import json
+
+    with open("../output/raw_data.json", 'r', encoding='utf-8') as file:
+        raw_data = json.load(file)
+    with open("../output/disk_data.json", 'r', encoding='utf-8') as file:
+        disk_data = json.load(file)
+
+    parsed = parse_many(raw_data)
+    mismatches = [disk for disk in disk_data if parsed.get(disk) != disk_data[disk]]
+    print(f"{len(disk_data) - len(mismatches)}/{len(disk_data)} disks parsed identically.")
+    if mismatches:
+        print(f"Mismatches: {', '.join(mismatches[:10])}")
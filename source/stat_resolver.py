@@ -0,0 +1,89 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from source.constants import SUBSTATS, FUZZY_MAX_DISTANCE_RATIO, FUZZY_CACHE_SIZE
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    # A shared prefix and suffix never add edits, near matches usually only differ in a few middle characters
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree over a word list for nearest-neighbour search by edit distance.
+
+    By the triangle inequality only children whose edge distance lies within `max_distance` of
+    the query's distance to a node can hold a match, so most of the vocabulary is never compared.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, query: str, max_distance: int) -> List[Tuple[int, str]]:
+        """All words within `max_distance` of the query, as (distance, word), closest first."""
+        matches = []
+        nodes = [self.root] if self.root else []
+        while nodes:
+            word, children = nodes.pop()
+            distance = edit_distance(query, word)
+            if distance <= max_distance:
+                matches.append((distance, word))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    nodes.append(child)
+        return sorted(matches)
+
+
+# Sub stat names as they are printed in game: `ATK` for both `Flat ATK` and `ATK%`
+SUB_STAT_VOCABULARY = sorted({name.removeprefix("Flat ").removesuffix("%") for name in SUBSTATS})
+_SUB_STAT_TREE = BKTree(SUB_STAT_VOCABULARY)
+
+
+@lru_cache(maxsize=FUZZY_CACHE_SIZE)
+def resolve_sub_stat_name(text: str) -> Optional[str]:
+    """Map a possibly misread sub stat name to the closest name of the vocabulary.
+
+    The match is only trusted when it needs at most FUZZY_MAX_DISTANCE_RATIO edits per character
+    (at least one) and no other name is as close, otherwise None is returned.
+    """
+    max_distance = max(1, int(len(text) * FUZZY_MAX_DISTANCE_RATIO))
+    matches = _SUB_STAT_TREE.search(text, max_distance)
+    if not matches or (len(matches) > 1 and matches[1][0] == matches[0][0]):
+        return None
+    return matches[0][1]
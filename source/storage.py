@@ -0,0 +1,21 @@
+from source.constants import DATABASE_BACKEND, DATABASE_URL, DATABASE_PATH
+
+
+def create_database(backend: str = DATABASE_BACKEND, url: str = DATABASE_URL, path: str = DATABASE_PATH):
+    """Create the disk storage selected by DATABASE_BACKEND.
+
+    Both backends have the same methods, so `DiskManager`, the API and the converters work with either.
+
+    Args:
+        backend (str): "pocketbase" for the PocketBase server at `url`, "sqlite" for the local file at `path`.
+        url (str): PocketBase API url.
+        path (str): SQLite database file.
+    """
+    # Imported on demand, the SQLite backend does not need the PocketBase client libraries
+    if backend == "pocketbase":
+        from source.pocketbase_database import PocketBaseDatabase
+        return PocketBaseDatabase(url)
+    if backend == "sqlite":
+        from source.disk_related.disk_database import DiskDatabase
+        return DiskDatabase(path)
+    raise ValueError(f"Unknown database backend '{backend}'. Available backends: pocketbase, sqlite")
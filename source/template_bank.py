@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import zipfile
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from source.constants import TEMPLATE_GLYPH_SIZE, TEMPLATE_SAMPLES_PER_GLYPH, TEMPLATE_SPACE_RATIO, \
+    TEMPLATE_BANK_PATH, MAIN_STAT_CONFIG
+from source.ocr_engines import PytesseractEngine
+from source.ocr_image_processor import binarize, STAT_LINE_PATTERN
+
+# Only lines that look like a stat are used to label glyphs, OCR mistakes would end up in the bank otherwise
+_LABEL_PATTERN = STAT_LINE_PATTERN
+
+
+def split_lines(binary) -> List[Tuple[int, int]]:
+    """Find the (top, bottom) rows of every text line in a binary image."""
+    ink_rows = np.flatnonzero(binary.any(axis=1))
+    if ink_rows.size == 0:
+        return []
+
+    # A new line starts wherever there is at least one empty row between two inked rows
+    breaks = np.flatnonzero(np.diff(ink_rows) > 1)
+    starts = np.concatenate(([ink_rows[0]], ink_rows[breaks + 1]))
+    ends = np.concatenate((ink_rows[breaks], [ink_rows[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def segment_glyphs(line) -> List[Tuple[int, int]]:
+    """Split a single binary text line into glyphs.
+
+    Connected components are merged when they overlap horizontally, which keeps the dot of
+    an `i` and the parts of a `%` together.
+
+    Returns:
+        list: (left, right) columns of every glyph, from left to right.
+    """
+    count, _, stats, _ = cv2.connectedComponentsWithStats(line, connectivity=8)
+    spans = sorted((left, left + width) for left, _, width, _, _ in stats[1:count])
+
+    glyphs = []
+    for left, right in spans:
+        if glyphs and left < glyphs[-1][1]:
+            glyphs[-1] = (glyphs[-1][0], max(glyphs[-1][1], right))
+        else:
+            glyphs.append((left, right))
+    return glyphs
+
+
+def split_glyph(line, glyph: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+    """Split touching glyphs at the column with the least ink, None if the span is too narrow."""
+    left, right = glyph
+    if right - left < line.shape[0] // 2:
+        return None
+
+    # Only cut in the middle part so a split never produces slivers
+    margin = (right - left) // 5
+    ink = np.count_nonzero(line[:, left + margin:right - margin], axis=0)
+    cut = left + margin + int(ink.argmin())
+    return [(left, cut), (cut, right)]
+
+
+def glyph_vectors(line, glyphs: List[Tuple[int, int]]) -> np.ndarray:
+    """Normalize glyphs to fixed size, zero mean, unit norm vectors for correlation.
+
+    Glyphs are scaled by the line height so that their aspect ratio and their position on the
+    baseline (`.` against `-`) are preserved.
+    """
+    width, height = TEMPLATE_GLYPH_SIZE
+    scale = height / line.shape[0]
+    vectors = np.zeros((len(glyphs), width * height), dtype=np.float32)
+
+    for i, (left, right) in enumerate(glyphs):
+        glyph_width = min(width, max(1, round((right - left) * scale)))
+        resized = cv2.resize(line[:, left:right], (glyph_width, height), interpolation=cv2.INTER_AREA)
+        canvas = np.zeros((height, width), dtype=np.float32)
+        offset = (width - glyph_width) // 2
+        canvas[:, offset:offset + glyph_width] = resized
+        vectors[i] = canvas.ravel()
+
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def space_positions(glyphs: List[Tuple[int, int]], line_height: int) -> List[bool]:
+    """For every glyph, whether a space precedes it."""
+    return [i > 0 and left - glyphs[i - 1][1] > line_height * TEMPLATE_SPACE_RATIO
+            for i, (left, _) in enumerate(glyphs)]
+
+
+class TemplateBank:
+    """Glyph templates of the game font, matched with one matrix product per line."""
+
+    def __init__(self, vectors: np.ndarray, labels: List[str]):
+        self.vectors = vectors
+        self.labels = labels
+
+    def match(self, vectors: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """Return the best label and its correlation score for every glyph vector."""
+        scores = vectors @ self.vectors.T
+        best = scores.argmax(axis=1)
+        return [self.labels[i] for i in best], scores[np.arange(len(best)), best]
+
+    def save(self, path: str = TEMPLATE_BANK_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, vectors=self.vectors, labels=np.array(self.labels))
+
+    @classmethod
+    def load(cls, path: str = TEMPLATE_BANK_PATH) -> "TemplateBank":
+        with np.load(path) as data:
+            return cls(data["vectors"], data["labels"].tolist())
+
+
+def build_template_bank(samples: Iterable[Tuple[np.ndarray, str]]) -> TemplateBank:
+    """Build a template bank from binary single-line crops and their known text.
+
+    Crops whose glyph count does not match the number of characters of the text are skipped,
+    so merged or broken glyphs never get a wrong label.
+    """
+    exemplars = {}
+
+    for binary, text in samples:
+        if not _LABEL_PATTERN.match(text):
+            continue
+        lines = split_lines(binary)
+        if len(lines) != 1:
+            continue
+
+        line = binary[lines[0][0]:lines[0][1]]
+        glyphs = segment_glyphs(line)
+        characters = text.replace(" ", "")
+        if len(glyphs) != len(characters):
+            continue
+        # A span much wider than the line is high means glyphs touch and the count matched by accident
+        if any(right - left > line.shape[0] * 1.5 for left, right in glyphs):
+            continue
+
+        for character, vector in zip(characters, glyph_vectors(line, glyphs)):
+            bucket = exemplars.setdefault(character, [])
+            if len(bucket) < TEMPLATE_SAMPLES_PER_GLYPH:
+                bucket.append(vector)
+
+    labels = [character for character, vectors in exemplars.items() for _ in vectors]
+    vectors = np.array([vector for vectors in exemplars.values() for vector in vectors], dtype=np.float32)
+    print(f"Template bank built with {len(labels)} templates for {len(exemplars)} characters.")
+    return TemplateBank(vectors.reshape(len(labels), -1), labels)
+
+
+def _archive_samples(archive_path: str, raw_data_path: Optional[str], key_prefix: str, labeler):
+    """Yield (binary crop, known text) pairs from a zipped capture folder.
+
+    The text comes from the raw OCR output of these captures if one is given, otherwise every
+    crop is labeled by the `labeler` OCR engine.
+    """
+    raw_data = None
+    if raw_data_path:
+        with open(raw_data_path, 'r', encoding='utf-8') as file:
+            raw_data = json.load(file)
+
+    with zipfile.ZipFile(archive_path) as archive:
+        for name in sorted(archive.namelist()):
+            match = re.search(r"disk_(\d+)_(main|sub_(\d))\.(png|jpg)$", name)
+            if not match:
+                continue
+
+            image = cv2.imdecode(np.frombuffer(archive.read(name), dtype=np.uint8), cv2.IMREAD_COLOR)
+            binary = binarize(image)
+
+            if raw_data is None:
+                yield binary, labeler.recognize(binary, MAIN_STAT_CONFIG).strip()
+                continue
+
+            disk = raw_data.get(f"{key_prefix}_disk_{match.group(1)}")
+            if not disk:
+                continue
+            if match.group(2) == "main":
+                yield binary, disk["main_stat"]
+            elif int(match.group(3)) <= len(disk["sub_stats"]):
+                yield binary, disk["sub_stats"][int(match.group(3)) - 1]
+
+
+def bootstrap_from_archive(archive_path: str, raw_data_path: Optional[str] = None, key_prefix: str = "images_1",
+                           output_path: Optional[str] = TEMPLATE_BANK_PATH) -> TemplateBank:
+    """Bootstrap the template bank from archived captures such as `images.bak`.
+
+    Args:
+        archive_path (str): Zip file with `disk_NNN_main` / `disk_NNN_sub_k` images.
+        raw_data_path (str): Raw OCR output holding the text of these captures. When None the
+            captures are labeled with Tesseract.
+        key_prefix (str): Folder name the archived captures were saved under in the raw OCR output.
+        output_path (str): Where to save the bank, None to only return it.
+    """
+    labeler = None if raw_data_path else PytesseractEngine()
+    bank = build_template_bank(_archive_samples(archive_path, raw_data_path, key_prefix, labeler))
+    if output_path:
+        bank.save(output_path)
+        print(f"Template bank saved to {output_path}.")
+    return bank
+
+
+if __name__ == "__main__":
+    bootstrap_from_archive("../images.bak")
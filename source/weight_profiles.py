@@ -0,0 +1,89 @@
+import json
+import os
+import re
+from typing import Dict, NamedTuple, Optional
+
+from source.constants import SUBSTAT_WEIGHTS, SUBSTATS, WEIGHT_PROFILES_PATH, MAIN_STATS, MAIN_STAT_LEVELS, \
+    ELEMENTAL_TYPES
+
+_PROFILE_NAME_PATTERN = re.compile(r"^[\w\- ]+$")
+# Names a main stat weight may use, "Element DMG Bonus" weighs every element not listed on its own
+_MAIN_STAT_NAMES = set(name for names in MAIN_STATS.values() for name in names) | set(MAIN_STAT_LEVELS) | \
+                   {f"{element} DMG Bonus" for element in ELEMENTAL_TYPES}
+
+
+class WeightProfile(NamedTuple):
+    """Named stat weights, e.g. for one character build.
+
+    Sub stats missing from `substat_weights` weigh 0. `main_stat_weights` maps a main stat name to
+    its score, "Element DMG Bonus" standing for every element. None keeps the fixed main stat score
+    of `evaluate_disk`.
+    """
+    name: str
+    substat_weights: Dict[str, float]
+    main_stat_weights: Optional[Dict[str, float]] = None
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "substat_weights": self.substat_weights,
+                "main_stat_weights": self.main_stat_weights}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WeightProfile":
+        """Build and validate a profile, raises ValueError for an invalid name or an unknown stat."""
+        main_stat_weights = data.get("main_stat_weights")
+        profile = cls(data["name"], dict(data["substat_weights"]),
+                      None if main_stat_weights is None else dict(main_stat_weights))
+        if not _PROFILE_NAME_PATTERN.match(profile.name):
+            raise ValueError(f"Invalid profile name '{profile.name}', use letters, digits, spaces, - and _.")
+        if not profile.substat_weights:
+            raise ValueError(f"Profile {profile.name} has no sub stat weights.")
+        unknown = [name for name in profile.substat_weights if name not in SUBSTATS]
+        if unknown:
+            raise ValueError(f"Profile {profile.name} weighs unknown sub stats: {', '.join(unknown)}.")
+        unknown = [name for name in profile.main_stat_weights or () if name not in _MAIN_STAT_NAMES]
+        if unknown:
+            raise ValueError(f"Profile {profile.name} weighs unknown main stats: {', '.join(unknown)}.")
+        return profile
+
+
+# The weights of constants.py, the profile `evaluate_disk` scores with
+DEFAULT_PROFILE = WeightProfile("default", SUBSTAT_WEIGHTS)
+
+
+def load_profile(path: str) -> WeightProfile:
+    with open(path, 'r', encoding='utf-8') as file:
+        return WeightProfile.from_dict(json.load(file))
+
+
+def load_profiles(folder: str = WEIGHT_PROFILES_PATH) -> Dict[str, WeightProfile]:
+    """The default profile and every `*.json` profile of a folder, by name. Invalid files are skipped."""
+    profiles = {DEFAULT_PROFILE.name: DEFAULT_PROFILE}
+    if not os.path.isdir(folder):
+        return profiles
+    for file_name in sorted(os.listdir(folder)):
+        if not file_name.endswith(".json"):
+            continue
+        try:
+            profile = load_profile(os.path.join(folder, file_name))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Skipping weight profile {file_name}: {e}")
+            continue
+        profiles[profile.name] = profile
+    return profiles
+
+
+def save_profile(profile: WeightProfile, folder: str = WEIGHT_PROFILES_PATH) -> str:
+    """Save a profile as `<name>.json` in the folder and return the path."""
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{profile.name}.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(profile.to_dict(), file, indent=4, ensure_ascii=False)
+    return path
+
+
+def delete_profile(name: str, folder: str = WEIGHT_PROFILES_PATH) -> bool:
+    path = os.path.join(folder, f"{name}.json")
+    if not _PROFILE_NAME_PATTERN.match(name) or not os.path.exists(path):
+        return False
+    os.remove(path)
+    return True
@@ -0,0 +1,143 @@
+import threading
+
+import pytest
+
+from source.disk_related.disk_database import DiskDatabase
+from source.disk import Disk, Stat
+from source.disk_related.disk_manager_old import DiskManager
+
+
+def make_disk(disk_id: str = None, crit_rate: float = 2.4) -> dict:
+    return {
+        "id": disk_id,
+        "main_stat": {"name": "ATK%", "value": 30.0, "level": 15},
+        "sub_stats": [{"name": "CRIT Rate", "value": crit_rate, "level": 0},
+                      {"name": "Flat HP", "value": 112, "level": 1}]
+    }
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = DiskDatabase(str(tmp_path / "disks.db"))
+    yield database
+    database.close()
+
+
+def test_batch_insert_sets_ids_on_the_sub_stats(database):
+    disks = database.create_disks_and_get_ids([make_disk() for _ in range(3)])
+    sub_stat_ids = database.create_sub_stats_batch(disks)
+
+    assert [sub_stat["disk_id"] for disk in disks for sub_stat in disk["sub_stats"]] == ["1", "1", "2", "2", "3", "3"]
+    assert sub_stat_ids == [{"id": str(i)} for i in range(1, 7)]
+    assert [record["disk_id"] for record in database.get_substats()] == ["1", "1", "2", "2", "3", "3"]
+
+    # The next batch continues after the ids already taken
+    more = database.create_disks_and_get_ids([make_disk()])
+    assert more[0]["sub_stats"][0]["disk_id"] == "4"
+
+
+def test_concurrent_batches_get_distinct_ids(database):
+    def upload():
+        for _ in range(10):
+            database.create_sub_stats_batch(database.create_disks_and_get_ids([make_disk() for _ in range(5)]))
+
+    threads = [threading.Thread(target=upload) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    disks = database.get_disks_and_substats()
+    assert len(disks) == 200
+    assert all(len(disk["sub_stats"]) == 2 for disk in disks)
+
+
+def test_record_methods(database):
+    disk = database.create_disk({"main_stat_name": "Flat HP", "main_stat_value": 2200.0, "main_stat_level": 15})
+    sub_stat = database.create_sub_stat({"disk_id": disk["id"], "name": "PEN", "value": 9, "level": 0})
+
+    assert database.get_disks() == [disk]
+    assert database.get_sub_stats_by_disk(disk["id"]) == [sub_stat]
+    assert database.update_disk(disk["id"], {"main_stat_level": 12})["main_stat_level"] == 12
+    with pytest.raises(KeyError):
+        database.update_disk("404", {"main_stat_level": 12})
+
+    assert database.delete_disk(disk["id"])
+    assert not database.delete_disk(disk["id"])
+    # Sub stats go with their disk
+    assert database.get_substats() == []
+
+
+def test_disk_manager_writes_through_the_database_methods(database, monkeypatch):
+    writes = []
+    write = database._write
+
+    def counting_write():
+        writes.append(1)
+        return write()
+
+    monkeypatch.setattr(database, "_write", counting_write)
+    manager = DiskManager(database)
+    manager.add_disk(Disk(id=None, main_stat=Stat("ATK%", 30.0, 15), sub_stats=[Stat("CRIT Rate", 2.4, 0)]))
+    assert writes
+
+    (disk,) = manager.get_disks()
+    assert disk.sub_stats == [Stat("CRIT Rate", 2.4, 0)]
+
+    manager.update_disk(Disk(id=disk.id, main_stat=Stat("ATK%", 30.0, 15),
+                             sub_stats=[Stat("CRIT Rate", 4.8, 1), Stat("PEN", 9, 0)]))
+    assert manager.disk_index()[disk.id].sub_stats == [Stat("CRIT Rate", 4.8, 1), Stat("PEN", 9, 0)]
+
+    manager.remove_disk(disk.id)
+    assert manager.get_disks() == []
+    assert database.get_substats() == []
+
+
+def test_join_loader_matches_the_per_table_records(database):
+    disks = [make_disk(crit_rate=2.4 * (i + 1)) for i in range(5)]
+    disks[2]["sub_stats"] = []
+    database.create_sub_stats_batch(database.create_disks_and_get_ids(disks))
+    database.create_disk({"main_stat_name": "PEN Ratio", "main_stat_value": 24.0, "main_stat_level": 15})
+
+    sub_stats = {}
+    for record in database.get_substats():
+        sub_stats.setdefault(record["disk_id"], []).append(
+            {"name": record["name"], "value": record["value"], "level": record["level"]})
+    expected = [{
+        "id": record["id"],
+        "main_stat": {"name": record["main_stat_name"], "value": record["main_stat_value"],
+                      "level": record["main_stat_level"]},
+        "sub_stats": sub_stats.get(record["id"], [])
+    } for record in database.get_disks()]
+
+    loaded = database.get_disks_and_substats()
+    assert loaded == expected
+    assert [len(disk["sub_stats"]) for disk in loaded] == [2, 2, 0, 2, 2, 0]
+    assert loaded[4]["sub_stats"][0]["value"] == pytest.approx(12.0)
+
+
+def test_disk_index_follows_the_loaded_disks(database):
+    database.create_sub_stats_batch(database.create_disks_and_get_ids([make_disk() for _ in range(3)]))
+    manager = DiskManager(database)
+
+    index = manager.disk_index()
+    assert list(index) == ["1", "2", "3"]
+    assert manager.disk_index() is index
+
+    manager.remove_disk("2")
+    assert list(manager.disk_index()) == ["1", "3"]
+
+
+def test_disk_exists_compares_main_and_ordered_sub_stats(database):
+    manager = DiskManager(database)
+    sub_stats = [Stat("CRIT Rate", 2.4, 0), Stat("PEN", 9, 1)]
+    manager.add_disk(Disk(id=None, main_stat=Stat("ATK%", 30.0, 15), sub_stats=sub_stats))
+
+    assert manager.disk_exists(Disk(id=None, main_stat=Stat("ATK%", 30.00001, 15), sub_stats=sub_stats))
+    assert not manager.disk_exists(Disk(id=None, main_stat=Stat("ATK%", 30.0, 12), sub_stats=sub_stats))
+    assert not manager.disk_exists(Disk(id=None, main_stat=Stat("ATK%", 30.0, 15), sub_stats=sub_stats[::-1]))
+    assert not manager.disk_exists(Disk(id=None, main_stat=Stat("ATK%", 30.0, 15), sub_stats=sub_stats[:1]))
+
+    # Runs on the records of the backend methods, never on the shared connection
+    database.connection.close()
+    assert manager.disk_exists(Disk(id=None, main_stat=Stat("ATK%", 30.0, 15), sub_stats=sub_stats))
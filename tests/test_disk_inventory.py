@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from source.disk import Disk, Stat
+from source.disk_inventory import MAX_SUB_STATS, STAT_NAMES, DiskInventory, stat_code
+
+DISK_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "disk_data.json")
+
+
+@pytest.fixture(scope="module")
+def disk_data() -> dict:
+    with open(DISK_DATA, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def to_disk(disk_id: str, data: dict) -> Disk:
+    return Disk(id=disk_id, main_stat=Stat(**data["main_stat"]) if data["main_stat"] else None,
+                sub_stats=[Stat(**stat) for stat in data["sub_stats"]])
+
+
+def test_round_trip_of_disks(disk_data):
+    disks = [to_disk(disk_id, data) for disk_id, data in disk_data.items()]
+    inventory = DiskInventory.from_disks(disks)
+
+    assert len(inventory) == len(disks)
+    assert [view.to_disk() for view in inventory] == disks
+    # Values read back as the decimals they were stored from, not as widened float32
+    assert [view.to_dict()["sub_stats"] for view in inventory] == [data["sub_stats"] for data in disk_data.values()]
+
+
+def test_round_trip_of_database_records(disk_data):
+    records = [{"id": str(i), **data} for i, data in enumerate(disk_data.values(), 1)]
+    inventory = DiskInventory.from_disks(records)
+
+    assert [view.to_dict() for view in inventory] == records
+
+
+def test_growth_and_lookup():
+    inventory = DiskInventory(capacity=1)
+    for i in range(100):
+        inventory.append(Disk(id=f"disk_{i}", main_stat=Stat("Flat HP", 2200.0, 15),
+                              sub_stats=[Stat("PEN", 9, i % 5)]))
+
+    assert len(inventory) == 100
+    assert inventory.row("disk_42") == 42
+    assert inventory.get("disk_42").sub_stats == [Stat("PEN", 9, 2)]
+    assert inventory[-1].id == "disk_99"
+    assert "disk_7" in inventory and "disk_100" not in inventory
+    assert inventory.get("disk_100") is None
+    with pytest.raises(IndexError):
+        inventory.disk(100)
+
+
+def test_missing_main_stat_and_level():
+    inventory = DiskInventory()
+    inventory.append({"id": "a", "main_stat": None, "sub_stats": []})
+    inventory.append({"id": "b", "main_stat": {"name": "ATK%", "value": 30.0, "level": None}, "sub_stats": []})
+
+    assert inventory.get("a").main_stat is None
+    assert inventory.get("b").main_stat == Stat("ATK%", 30.0, None)
+
+
+def test_unknown_stat_names_are_interned():
+    code = stat_code("CRIT Rafe")
+    assert STAT_NAMES[code] == "CRIT Rafe"
+    assert stat_code("CRIT Rafe") == code
+
+    inventory = DiskInventory()
+    inventory.append(Disk(id="a", main_stat=Stat("ATK%", 30.0, 15), sub_stats=[Stat("CRIT Rafe", 2.4, 0)]))
+    assert inventory.get("a").sub_stats == [Stat("CRIT Rafe", 2.4, 0)]
+
+
+def test_rejected_disks():
+    inventory = DiskInventory()
+    inventory.append(Disk(id="a", main_stat=None, sub_stats=[]))
+    with pytest.raises(ValueError):
+        inventory.append(Disk(id="a", main_stat=None, sub_stats=[]))
+    with pytest.raises(ValueError):
+        inventory.append(Disk(id="b", main_stat=None, sub_stats=[Stat("PEN", 9, 0)] * (MAX_SUB_STATS + 1)))
+    assert len(inventory) == 1
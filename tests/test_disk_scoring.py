@@ -0,0 +1,126 @@
+import json
+import math
+import os
+import random
+
+import numpy as np
+import pytest
+
+from source.constants import SUBSTATS
+from source.disk import MAX_LEVEL, Disk, Stat, evaluate_disk
+from source.disk_inventory import MAX_SUB_STATS, DiskInventory
+from source.disk_scoring import rank_disks, rank_inventory, rank_page, score_inventory
+
+DISK_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "disk_data.json")
+
+
+def known_disks() -> list:
+    with open(DISK_DATA, 'r', encoding='utf-8') as file:
+        return [Disk(id=disk_id, main_stat=Stat(**data["main_stat"]) if data["main_stat"] else None,
+                     sub_stats=[Stat(**stat) for stat in data["sub_stats"]])
+                for disk_id, data in json.load(file).items()]
+
+
+def random_disks(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    disks = []
+    for i in range(count):
+        sub_stats = []
+        for _ in range(rng.randint(0, MAX_SUB_STATS)):
+            # Values as the parser computes them from the base value and the number of upgrades
+            name, level = rng.choice(list(SUBSTATS)), rng.randint(0, 5)
+            value = round(SUBSTATS[name] * (level + 1), 2) if level > 0 else SUBSTATS[name]
+            sub_stats.append(Stat(name=name, value=value, level=level))
+        main_stat = Stat(name="ATK%", value=round(rng.uniform(0, 30), 1), level=rng.randint(0, 16))
+        disks.append(Disk(id=f"random_{i}", main_stat=main_stat, sub_stats=sub_stats))
+    return disks
+
+
+@pytest.fixture(scope="module")
+def disks() -> list:
+    return known_disks() + random_disks(5000)
+
+
+@pytest.fixture(scope="module")
+def inventory(disks) -> DiskInventory:
+    return DiskInventory.from_disks(disks)
+
+
+def scalar_evaluation(disk: Disk):
+    """`evaluate_disk`, None for the disks it cannot score."""
+    try:
+        return evaluate_disk(disk)
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+
+def test_scores_are_bit_identical_to_evaluate_disk(disks, inventory):
+    scores = score_inventory(inventory)
+
+    scored = 0
+    for row, disk in enumerate(disks):
+        expected = scalar_evaluation(disk)
+        if expected is None:
+            assert math.isnan(scores.total[row]), disk.id
+            continue
+        scored += 1
+        actual = (scores.main[row], scores.current[row], scores.potential[row], scores.total[row])
+        assert actual == (expected["Main Stat Score"], expected["Current Substat Score"],
+                          expected["Potential Substat Score"], expected["Total Score"]), disk.id
+    assert scored > len(disks) * 0.9
+
+
+def test_ranking_matches_a_stable_sort_of_evaluate_disk(disks, inventory):
+    evaluations = [evaluation for evaluation in map(scalar_evaluation, disks) if evaluation is not None]
+    expected = sorted(evaluations, key=lambda evaluation: evaluation["Total Score"], reverse=True)
+
+    assert rank_inventory(inventory) == expected
+    assert rank_inventory(inventory, top=25) == expected[:25]
+    assert rank_disks(disks, top=25) == expected[:25]
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"main_stat": "ATK%"},
+    {"min_level": 3, "max_level": 12},
+    {"main_stat": "ATK%", "min_level": 9, "min_score": 20.0},
+    {"main_stat": "Not A Stat"},
+])
+def test_pages_are_slices_of_the_full_ranking(disks, inventory, filters):
+    by_id = {disk.id: disk for disk in disks}
+
+    def matches(evaluation: dict) -> bool:
+        main_stat = by_id[evaluation["Disk ID"]].main_stat
+        return ((filters.get("main_stat") is None or main_stat.name == filters["main_stat"])
+                and main_stat.level >= filters.get("min_level", main_stat.level)
+                and main_stat.level <= filters.get("max_level", main_stat.level)
+                and evaluation["Total Score"] >= filters.get("min_score", -math.inf))
+
+    expected = [evaluation for evaluation in rank_inventory(inventory) if matches(evaluation)]
+    for k, offset in [(20, 0), (20, 20), (7, 33), (50, len(expected) - 10), (20, len(expected) + 5)]:
+        page = rank_page(inventory, k=k, offset=max(0, offset), **filters)
+        assert page.total == len(expected)
+        assert page.evaluations == expected[max(0, offset):max(0, offset) + k]
+
+
+def test_custom_weights(disks, inventory):
+    weights = {name: float(i % 4) for i, name in enumerate(SUBSTATS)}
+    scores = score_inventory(inventory, weights)
+
+    for row, disk in enumerate(disks[:500]):
+        # Maxed out disks score 0 whatever the weights
+        if not math.isnan(scores.total[row]) and disk.main_stat.level < MAX_LEVEL:
+            assert scores.current[row] == disk.total_substat_score(weights)
+
+
+def test_unscoreable_disks_are_left_out():
+    inventory = DiskInventory.from_disks([
+        Disk(id="no main stat", main_stat=None, sub_stats=[]),
+        Disk(id="unknown level", main_stat=Stat("ATK%", 30.0, None), sub_stats=[]),
+        Disk(id="misread", main_stat=Stat("ATK%", 30.0, 15), sub_stats=[Stat("CRIT Rafe", 2.4, 0)]),
+        Disk(id="scored", main_stat=Stat("ATK%", 30.0, 9), sub_stats=[Stat("CRIT Rate", 2.4, 0)]),
+    ])
+    scores = score_inventory(inventory)
+
+    assert np.isnan(scores.total[:3]).all()
+    assert [evaluation["Disk ID"] for evaluation in rank_inventory(inventory)] == ["scored"]
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from source.disk_related.disk_database import DiskDatabase
+from source import ocr_engines
+from source.ingest_pipeline import IngestPipeline
+
+# Every crop is as wide as the number of its text, so the engine can tell the crops apart
+TEXTS = ["CRIT Rate 24%", "CRlT Rate 24%", "ATK 19", "HP 112", "DEF +1 30", "PEN 9"]
+
+
+class WidthEngine(ocr_engines.OCREngine):
+    """Reads a crop as the text its width stands for."""
+    name = "width"
+
+    def recognize(self, binary, config: str) -> str:
+        return TEXTS[binary.shape[1] - 1] + "\n"
+
+
+def crops(main_stat: str, sub_stats: list) -> dict:
+    texts = {"main": main_stat, **{f"sub_{i}": text for i, text in enumerate(sub_stats, 1)}}
+    return {name: np.zeros((8, TEXTS.index(text) + 1, 3), dtype=np.uint8) for name, text in texts.items()}
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = DiskDatabase(str(tmp_path / "disks.db"))
+    yield database
+    database.close()
+
+
+def test_disk_with_an_unrecognized_main_stat_is_stored_but_not_ranked(database, monkeypatch):
+    monkeypatch.setitem(ocr_engines.ENGINES, WidthEngine.name, WidthEngine)
+    pipeline = IngestPipeline(database, engine_name=WidthEngine.name, ocr_workers=1, parse_workers=1, dedup=False)
+    sub_stats = ["ATK 19", "HP 112", "DEF +1 30", "PEN 9"]
+
+    pipeline.start()
+    pipeline.input.put(("images_1_disk_1", crops("CRIT Rate 24%", sub_stats)))
+    pipeline.input.put(("images_1_disk_2", crops("CRlT Rate 24%", sub_stats)))
+    pipeline.input.put(None)
+    pipeline.join()
+
+    assert pipeline.stored == 2
+    disks = database.get_disks_and_substats()
+    assert [(disk["main_stat"]["name"], disk["main_stat"]["level"]) for disk in disks] == \
+           [("CRIT Rate", 15), ("CRlT Rate", None)]
+    assert all(len(disk["sub_stats"]) == 4 for disk in disks)
+    assert [evaluation["Disk ID"] for evaluation in pipeline.ranking()] == ["images_1_disk_1"]
@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+from source.disk_related.disk_database import DiskDatabase
+from source.json_to_db_data_converter import convert_json_to_db
+from source.jsonl_stream import write_jsonl
+
+DISK_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "disk_data.json")
+
+
+@pytest.fixture
+def disk_data() -> dict:
+    with open(DISK_DATA, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize("extension", ["json", "jsonl"])
+def test_every_disk_is_uploaded(tmp_path, disk_data, extension):
+    path = str(tmp_path / f"disk_data.{extension}")
+    if extension == "json":
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(disk_data, file)
+    else:
+        write_jsonl(disk_data.items(), path)
+    database = DiskDatabase(str(tmp_path / "disks.db"))
+
+    convert_json_to_db(path, 50, database)
+
+    disks = database.get_disks_and_substats()
+    assert len(disks) == len(disk_data)
+    assert [disk["sub_stats"] for disk in disks] == [disk["sub_stats"] for disk in disk_data.values()]
+    database.close()
@@ -0,0 +1,82 @@
+import itertools
+from types import SimpleNamespace
+
+import numpy as np
+
+from source import ocr_cache
+from source.ocr_cache import CachedEngine, OCRCache
+from source.ocr_engines import OCREngine, OCRWord
+
+
+class CountingEngine(OCREngine):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def recognize(self, binary, config: str) -> str:
+        self.calls += 1
+        return f"text {int(binary.sum())}"
+
+    def recognize_words(self, binary, config: str):
+        self.calls += 1
+        return [OCRWord("word", 0, 0, 10, 10, 95.0)]
+
+
+def crop(value: int) -> np.ndarray:
+    return np.full((4, 4), value, dtype=np.uint8)
+
+
+def test_hit_after_miss(tmp_path):
+    engine = CountingEngine()
+    cached = CachedEngine(engine, OCRCache(str(tmp_path / "cache.db")))
+
+    assert cached.recognize(crop(1), "--psm 7") == cached.recognize(crop(1), "--psm 7")
+    assert engine.calls == 1
+    assert cached.cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    # Another config is another key
+    cached.recognize(crop(1), "--psm 6")
+    assert engine.calls == 2
+    cached.close()
+
+
+def test_word_results_round_trip(tmp_path):
+    engine = CountingEngine()
+    cached = CachedEngine(engine, OCRCache(str(tmp_path / "cache.db")))
+
+    words = cached.recognize_words(crop(2), "--psm 6")
+    assert cached.recognize_words(crop(2), "--psm 6") == words
+    assert isinstance(words[0], OCRWord)
+    assert engine.calls == 1
+    cached.close()
+
+
+def test_results_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = OCRCache(path)
+    cache.put("key", "text")
+    cache.close()
+
+    cache = OCRCache(path)
+    assert cache.get("key") == "text"
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    # A strictly increasing clock, so the least recently used entry is never a tie
+    clock = itertools.count()
+    monkeypatch.setattr(ocr_cache, "time", SimpleNamespace(time=lambda: next(clock)))
+    cache = OCRCache(str(tmp_path / "cache.db"), max_entries=10)
+    for i in range(10):
+        cache.put(f"key{i}", str(i))
+    # Touch the oldest entry so it survives the eviction
+    assert cache.get("key0") == "0"
+
+    cache.put("key10", "10")
+
+    assert cache.stats()["entries"] == 9
+    assert cache.get("key0") == "0"
+    assert cache.get("key1") is None
+    assert cache.get("key10") == "10"
+    cache.close()
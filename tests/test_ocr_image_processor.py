@@ -0,0 +1,135 @@
+import json
+from collections import Counter
+
+import cv2
+import numpy as np
+import pytest
+
+from source import ocr_engines, ocr_image_processor
+from source.ocr_image_processor import OCRImageProcessor
+
+
+class PixelEngine(ocr_engines.OCREngine):
+    """Reads a crop as its pixel sum, so equal crops give equal results."""
+    name = "pixels"
+
+    def recognize(self, binary, config: str) -> str:
+        return f"{int(binary.sum())}\n"
+
+    def recognize_words(self, binary, config: str):
+        return [ocr_engines.OCRWord(str(int(binary.sum())), 0, 0, binary.shape[1], binary.shape[0], 99.0)]
+
+
+def stat_crop(text: str) -> np.ndarray:
+    crop = np.zeros((32, 320, 3), dtype=np.uint8)
+    cv2.putText(crop, text, (4, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    return crop
+
+
+def save_disk(folder, index: int, main_stat: str, sub_stats: list) -> None:
+    folder.mkdir(exist_ok=True)
+    cv2.imwrite(str(folder / f"disk_{index}_main.png"), stat_crop(main_stat))
+    for i, sub_stat in enumerate(sub_stats, 1):
+        cv2.imwrite(str(folder / f"disk_{index}_sub_{i}.png"), stat_crop(sub_stat))
+
+
+DISK_A = ("CRIT Rate 24%", ["ATK 19", "HP 112", "DEF +1 30", "PEN 9"])
+DISK_B = ("ATK 2200", ["CRIT DMG 9.6%", "Impact 6%", "ATK% 6%", "HP% +2 9%"])
+
+
+@pytest.fixture
+def captures(tmp_path, monkeypatch):
+    monkeypatch.setitem(ocr_engines.ENGINES, PixelEngine.name, PixelEngine)
+    save_disk(tmp_path / "images_1", 1, *DISK_A)
+    # Identical disks of one page are different disks
+    save_disk(tmp_path / "images_1", 2, *DISK_A)
+    save_disk(tmp_path / "images_2", 1, *DISK_A)
+    save_disk(tmp_path / "images_2", 2, *DISK_A)
+    save_disk(tmp_path / "images_2", 3, *DISK_B)
+    return tmp_path
+
+
+def test_identical_disks_of_a_later_folder_alias_one_earlier_capture(captures):
+    output = captures / "raw_data.json"
+    ocr_data = OCRImageProcessor(engine_name=PixelEngine.name, dedup=True).process_images(str(captures), str(output))
+
+    assert "alias_of" not in ocr_data["images_1_disk_1"]
+    assert "alias_of" not in ocr_data["images_1_disk_2"]
+    original = ocr_data["images_2_disk_1"]["alias_of"]
+    assert original in ("images_1_disk_1", "images_1_disk_2")
+    assert ocr_data["images_2_disk_2"] == {"alias_of": original}
+    assert "alias_of" not in ocr_data["images_2_disk_3"]
+    assert ocr_data["images_1_disk_1"] == ocr_data["images_1_disk_2"]
+    with open(output, encoding="utf-8") as file:
+        assert json.load(file) == ocr_data
+
+
+@pytest.mark.parametrize("min_confidence", [None, 80])
+def test_every_crop_is_decoded_once(captures, monkeypatch, min_confidence):
+    reads = Counter()
+    read_image = ocr_image_processor.read_image
+
+    def counting_read(source, *args):
+        reads[source] += 1
+        return read_image(source, *args)
+
+    monkeypatch.setattr(ocr_image_processor, "read_image", counting_read)
+    processor = OCRImageProcessor(engine_name=PixelEngine.name, dedup=True, min_confidence=min_confidence)
+    processor.process_images(str(captures), str(captures / "raw_data.json"))
+
+    assert len(reads) == 5 * 5
+    assert set(reads.values()) == {1}
+
+
+def test_incremental_run_matches_full_run(captures):
+    processor = OCRImageProcessor(engine_name=PixelEngine.name, dedup=True)
+    ocr_data = processor.process_images(str(captures), str(captures / "full.json"))
+    manifest = str(captures / "manifest.jsonl")
+    output = captures / "raw_data.json"
+
+    assert processor.process_images_incremental(str(captures), str(output), manifest) == 5
+    with open(output, encoding="utf-8") as file:
+        assert json.load(file) == ocr_data
+
+    assert processor.process_images_incremental(str(captures), str(output), manifest) == 0
+    with open(output, encoding="utf-8") as file:
+        assert json.load(file) == ocr_data
+
+
+def test_new_folder_is_deduplicated_against_the_manifest(captures, monkeypatch):
+    processor = OCRImageProcessor(engine_name=PixelEngine.name, dedup=True)
+    manifest = str(captures / "manifest.jsonl")
+    output = captures / "raw_data.json"
+    processor.process_images_incremental(str(captures), str(output), manifest)
+
+    save_disk(captures / "images_3", 1, *DISK_A)
+    save_disk(captures / "images_3", 2, *DISK_B)
+    reads = Counter()
+    read_image = ocr_image_processor.read_image
+
+    def counting_read(source, *args):
+        reads[source] += 1
+        return read_image(source, *args)
+
+    monkeypatch.setattr(ocr_image_processor, "read_image", counting_read)
+    assert processor.process_images_incremental(str(captures), str(output), manifest) == 2
+
+    # Only the new folder is loaded, the earlier disks are matched by their stored hashes
+    assert all("images_3" in source for source in reads)
+    with open(output, encoding="utf-8") as file:
+        ocr_data = json.load(file)
+    assert ocr_data["images_3_disk_1"] == ocr_data["images_2_disk_1"]
+    assert ocr_data["images_3_disk_2"] == {"alias_of": "images_2_disk_3"}
+
+
+def test_stored_hashes_are_only_read_with_dedup(captures, monkeypatch):
+    processor = OCRImageProcessor(engine_name=PixelEngine.name)
+    manifest = str(captures / "manifest.jsonl")
+    output = captures / "raw_data.json"
+    processor.process_images_incremental(str(captures), str(output), manifest)
+
+    def failing_hashes(self, key):
+        raise AssertionError(f"Read the hashes of {key} without dedup")
+
+    monkeypatch.setattr(ocr_image_processor.OCRManifest, "hashes", failing_hashes)
+    assert processor.process_images_incremental(str(captures), str(output), manifest) == 0
@@ -0,0 +1,64 @@
+import json
+
+from source.ocr_manifest import OCRManifest, save_json_stream
+
+FILES = [["disk_1_main.png", 100, 1.0]]
+
+
+def test_results_survive_reopening(tmp_path):
+    path = str(tmp_path / "manifest.jsonl")
+    manifest = OCRManifest(path)
+    manifest.record("images_1_disk_1", FILES, {"main_stat": "ATK 19"})
+    manifest.close()
+
+    manifest = OCRManifest(path)
+    assert manifest.is_current("images_1_disk_1", FILES)
+    assert not manifest.is_current("images_1_disk_1", [["disk_1_main.png", 101, 2.0]])
+    assert manifest.result("images_1_disk_1") == {"main_stat": "ATK 19"}
+    manifest.close()
+
+
+def test_resume_after_truncated_line(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    manifest = OCRManifest(str(path))
+    manifest.record("images_1_disk_1", FILES, {"main_stat": "ATK 19"})
+    manifest.record("images_1_disk_2", FILES, {"main_stat": "HP 112"})
+    manifest.close()
+
+    # A crash in the middle of the third record
+    complete_size = path.stat().st_size
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('{"key": "images_1_disk_3", "files": [["disk_3_ma')
+
+    manifest = OCRManifest(str(path))
+    assert path.stat().st_size == complete_size
+    assert manifest.is_current("images_1_disk_2", FILES)
+    assert not manifest.is_current("images_1_disk_3", FILES)
+
+    # Appending continues on a clean line
+    manifest.record("images_1_disk_3", FILES, {"main_stat": "DEF 30"})
+    manifest.close()
+    with open(path, encoding='utf-8') as file:
+        assert [json.loads(line)["key"] for line in file] == ["images_1_disk_1", "images_1_disk_2", "images_1_disk_3"]
+
+
+def test_compact_keeps_latest_results_and_hashes(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    manifest = OCRManifest(str(path))
+    for i in range(3):
+        manifest.record("images_1_disk_1", FILES, {"main_stat": f"ATK {i}"}, hashes="ff00")
+    manifest.compact()
+
+    assert path.read_text(encoding='utf-8').count("\n") == 1
+    assert manifest.result("images_1_disk_1") == {"main_stat": "ATK 2"}
+    assert manifest.hashes("images_1_disk_1") == "ff00"
+    manifest.close()
+
+
+def test_json_stream_matches_json_dump(tmp_path):
+    items = {"images_1_disk_1": {"main_stat": "ATK 19", "sub_stats": ["HP 112"]}, "images_2_disk_1": {"alias_of": "x"}}
+    save_json_stream(items.items(), str(tmp_path / "stream.json"))
+    save_json_stream([], str(tmp_path / "empty.json"))
+
+    assert (tmp_path / "stream.json").read_text(encoding='utf-8') == json.dumps(items, indent=4, ensure_ascii=False)
+    assert (tmp_path / "empty.json").read_text(encoding='utf-8') == "{}"
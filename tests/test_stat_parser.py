@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+
+from source import stat_parser
+from source.ocr_data_parser import OCRDataParser
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
+
+
+def load_output(name: str) -> dict:
+    with open(os.path.join(OUTPUT_DIR, name), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def test_parity_with_the_disk_data_of_the_old_parser():
+    # disk_data.json was produced from raw_data.json by the parser stat_parser replaced
+    assert stat_parser.parse_many(load_output("raw_data.json")) == load_output("disk_data.json")
+
+
+def test_ocr_data_parser_delegates():
+    raw_data = load_output("raw_data.json")
+    assert OCRDataParser.parse_ocr_data(raw_data) == stat_parser.parse_many(raw_data)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ATK 19", {"name": "Flat ATK", "level": 0, "value": 19}),
+    ("ATK +2 9%", {"name": "ATK%", "level": 2, "value": 9.0}),
+    ("CRIT Rate +1 4.8%", {"name": "CRIT Rate", "level": 1, "value": 4.8}),
+    ("Anomaly Proficlency +2 27", {"name": "Anomaly Proficiency", "level": 2, "value": 27}),
+    ("Set Effect", None),
+    ("", None),
+])
+def test_sub_stat_lines(text, expected):
+    assert stat_parser.parse_sub_stat_text(text) == expected
+
+
+def test_main_stat_level_is_inferred_from_the_value():
+    assert stat_parser.parse_main_stat_text("HP 2200") == {"name": "Flat HP", "value": 2200.0, "level": 15}
+    assert stat_parser.parse_main_stat_text("") is None
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from source.stat_parser import parse_sub_stat_text
+from source.stat_resolver import BKTree, SUB_STAT_VOCABULARY, edit_distance, resolve_sub_stat_name
+
+
+def reference_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def test_edit_distance_matches_the_full_table():
+    rng = random.Random(7)
+    for _ in range(2000):
+        a = "".join(rng.choice("ACRT ") for _ in range(rng.randrange(8)))
+        b = "".join(rng.choice("ACRT ") for _ in range(rng.randrange(8)))
+        assert edit_distance(a, b) == reference_distance(a, b)
+
+
+def test_bk_tree_search_matches_a_linear_scan():
+    tree = BKTree(SUB_STAT_VOCABULARY)
+    for query in ["CRlT Rate", "Anomaly Proficlency", "PEM", "Impct", "xyz"]:
+        for max_distance in range(4):
+            expected = sorted((edit_distance(query, word), word) for word in SUB_STAT_VOCABULARY
+                              if edit_distance(query, word) <= max_distance)
+            assert tree.search(query, max_distance) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("CRlT Rate", "CRIT Rate"),
+    ("CRIT DMC", "CRIT DMG"),
+    ("Anomaly Proficlency", "Anomaly Proficiency"),
+    ("Anomaly Proflciency", "Anomaly Proficiency"),
+    ("AT", "ATK"),
+    ("HP", "HP"),
+    # Too far from every name, or as close to two names
+    ("Something", None),
+    ("CRIT", None),
+])
+def test_misreads(text, expected):
+    assert resolve_sub_stat_name(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("CRlT Rate +1 4.8%", {"name": "CRIT Rate", "level": 1, "value": 4.8}),
+    ("CRIT DMC 4.8%", {"name": "CRIT DMG", "level": 0, "value": 4.8}),
+    ("AT +3 12%", {"name": "ATK%", "level": 3, "value": 12.0}),
+    ("Garbage 12", {"name": "Garbage", "level": 0, "value": 0}),
+])
+def test_parser_resolves_misread_names(text, expected):
+    assert parse_sub_stat_text(text) == expected
@@ -0,0 +1,75 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from source.constants import SUBSTATS
+from source.disk_inventory import DiskInventory
+from source.disk_scoring import profile_column, score_inventory, score_profiles, top_k_per_profile
+from source.weight_profiles import DEFAULT_PROFILE, WeightProfile, load_profiles, save_profile
+
+DISK_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "disk_data.json")
+
+
+@pytest.fixture(scope="module")
+def inventory() -> DiskInventory:
+    with open(DISK_DATA, 'r', encoding='utf-8') as file:
+        return DiskInventory.from_disks({"id": disk_id, **data} for disk_id, data in json.load(file).items())
+
+
+def test_default_profile_matches_score_inventory(inventory):
+    expected = score_inventory(inventory)
+    actual = profile_column(score_profiles(inventory, [DEFAULT_PROFILE]), DEFAULT_PROFILE.name)
+
+    for column, expected_column in zip(actual, expected):
+        np.testing.assert_allclose(column, expected_column, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_partial_profile_weighs_missing_sub_stats_zero(inventory):
+    partial = WeightProfile.from_dict({"name": "crit", "substat_weights": {"CRIT Rate": 2, "CRIT DMG": 1}})
+    full = WeightProfile("full", {name: partial.substat_weights.get(name, 0) for name in SUBSTATS})
+    scores = score_profiles(inventory, [partial, full, DEFAULT_PROFILE])
+
+    scoreable = ~np.isnan(score_inventory(inventory).total)
+    assert scoreable.sum() > 200
+    assert (~np.isnan(scores.total[:, 0]) == scoreable).all()
+    np.testing.assert_array_equal(scores.total[:, 0], scores.total[:, 1])
+
+    ranking = top_k_per_profile(inventory, [partial], 10)["crit"]
+    assert len(ranking) == 10
+
+
+def test_main_stat_weights(inventory):
+    profile = WeightProfile.from_dict({"name": "fire", "substat_weights": {"CRIT Rate": 1},
+                                       "main_stat_weights": {"ATK%": 20, "Element DMG Bonus": 5,
+                                                             "Fire DMG Bonus": 30}})
+    main = score_profiles(inventory, [profile]).main[:, 0]
+    for view, score, level in zip(inventory, main, inventory.main_levels):
+        if np.isnan(score) or level >= 15:
+            continue
+        name = view.main_stat.name
+        expected = {"ATK%": 20, "Fire DMG Bonus": 30}.get(name, 5 if name.endswith("DMG Bonus") else 0)
+        assert score == expected, name
+
+
+@pytest.mark.parametrize("data, message", [
+    ({"name": "a/b", "substat_weights": {"CRIT Rate": 1}}, "Invalid profile name"),
+    ({"name": "empty", "substat_weights": {}}, "no sub stat weights"),
+    ({"name": "typo", "substat_weights": {"CRIT Rte": 1}}, "unknown sub stats: CRIT Rte"),
+    ({"name": "main", "substat_weights": {"CRIT Rate": 1}, "main_stat_weights": {"PEN": 1}},
+     "unknown main stats: PEN"),
+])
+def test_invalid_profiles_are_rejected(data, message):
+    with pytest.raises(ValueError, match=message):
+        WeightProfile.from_dict(data)
+
+
+def test_saved_profiles_load_back(tmp_path):
+    profile = WeightProfile.from_dict({"name": "anomaly", "substat_weights": {"Anomaly Proficiency": 3},
+                                       "main_stat_weights": {"Anomaly Mastery": 15}})
+    save_profile(profile, str(tmp_path))
+    (tmp_path / "broken.json").write_text("{", encoding='utf-8')
+
+    profiles = load_profiles(str(tmp_path))
+    assert profiles == {"default": DEFAULT_PROFILE, "anomaly": profile}